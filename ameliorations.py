@@ -6,81 +6,341 @@ Auteur : Gérald LIN
 """
 
 from graphe import *
+from plus_courts_chemins import *
+from distances import *
+from profilage import *
+from instantanes import *
+from flux import *
+from resultats import *
+from array import array
 import random
 import argparse
+import csv
+import functools
+import glob
+import heapq
+import itertools
+import mmap
 import os
+import struct
+import sys
 
 
-def charger_donnees(graphe, fichier):
-    with open(fichier, 'r') as my_file:
-        # nom du fichier
-        name = fichier.split('.')[0]
-        text_split = my_file.read().split('# connexions')
-
-        # liste des stations
-        lst_stations = text_split[0].lstrip('#stations\n ').rstrip('\n').split('\n')
-        for elm in lst_stations:
-            station = elm.split(':')
-            graphe.ajouter_sommet((int(station[0]), station[1]))
-        
-        # liste des connexions
-        lst_connexions = text_split[1].strip('\n').split('\n')
-        for elm in lst_connexions:
+# Lecture d'un fichier de données, ligne par ligne. Les deux générateurs
+# consomment le même itérateur de lignes : lire_stations() s'arrête sur l'en-tête
+# "# connexions", lire_connexions() lit le reste du fichier.
+
+def lire_stations(lignes):
+    for elm in lignes:
+        elm = elm.strip()
+        if elm.startswith('# connexions'):
+            return
+        if elm and not elm.startswith('#'):
+            station = elm.split(':', 1)
+            yield int(station[0]), station[1]
+
+
+def lire_connexions(lignes, name):
+    for elm in lignes:
+        elm = elm.strip()
+        if elm and not elm.startswith('#'):
             tmp = elm.split('/')
-            graphe.ajouter_arete(int(tmp[0]), int(tmp[1]), name)
+            # la durée de parcours (troisième champ) vaut 1 si elle est absente
+            duree = int(tmp[2]) if len(tmp) > 2 else 1
+            yield int(tmp[0]), int(tmp[1]), name, duree
+
+
+# Cache binaire d'un fichier de données, enregistré à côté de celui-ci
+# (METRO_1.txt -> METRO_1.bin). Il contient, après un en-tête :
+#   - les identifiants des stations (entiers sur 8 octets),
+#   - la position de fin du nom de chaque station (entiers sur 4 octets),
+#   - les noms des stations, encodés en UTF-8 et mis bout à bout,
+#   - les extrémités des connexions (entiers sur 8 octets, deux par connexion),
+#   - la durée de parcours de chaque connexion (entiers sur 4 octets).
+# L'en-tête mémorise la date de modification et la taille du fichier texte :
+# si celui-ci a changé, le cache est ignoré puis réécrit.
+
+CACHE_MAGIQUE = b'RSXC'
+CACHE_VERSION = 2
+CACHE_ENTETE = struct.Struct('<4sHBqqIII')
+
+
+def chemin_cache(fichier):
+    return os.path.splitext(fichier)[0] + '.bin'
+
+
+def lire_cache(fichier):
+    infos = os.stat(fichier)
+    try:
+        with open(chemin_cache(fichier), 'rb') as my_file:
+            with mmap.mmap(my_file.fileno(), 0, access=mmap.ACCESS_READ) as donnees:
+                magique, version, petit_boutiste, date, taille, nb_stations, nb_connexions, taille_noms = \
+                    CACHE_ENTETE.unpack_from(donnees)
+                if (magique, version, date, taille) != (CACHE_MAGIQUE, CACHE_VERSION, infos.st_mtime_ns, infos.st_size):
+                    return None
+
+                position = CACHE_ENTETE.size
+                identifiants = array('q')
+                identifiants.frombytes(donnees[position:position + 8 * nb_stations])
+                position += 8 * nb_stations
+                fins_noms = array('I')
+                fins_noms.frombytes(donnees[position:position + 4 * nb_stations])
+                position += 4 * nb_stations
+                texte_noms = donnees[position:position + taille_noms].decode('utf-8')
+                position += taille_noms
+                connexions = array('q')
+                connexions.frombytes(donnees[position:position + 16 * nb_connexions])
+                position += 16 * nb_connexions
+                durees = array('I')
+                durees.frombytes(donnees[position:position + 4 * nb_connexions])
+
+    except (OSError, ValueError, struct.error):
+        return None
+
+    if bool(petit_boutiste) != (sys.byteorder == 'little'):
+        for tableau in (identifiants, fins_noms, connexions, durees):
+            tableau.byteswap()
+
+    noms = list()
+    debut = 0
+    for fin in fins_noms:
+        noms.append(texte_noms[debut:fin])
+        debut = fin
+
+    return identifiants, noms, connexions, durees
+
+
+def ecrire_cache(fichier, identifiants, noms, connexions, durees):
+    infos = os.stat(fichier)
+    # les positions de fin des noms sont exprimées en caractères, pas en octets
+    fins_noms = array('I', itertools.accumulate(map(len, noms)))
+    texte_noms = ''.join(noms).encode('utf-8')
+    entete = CACHE_ENTETE.pack(CACHE_MAGIQUE, CACHE_VERSION, sys.byteorder == 'little',
+                               infos.st_mtime_ns, infos.st_size,
+                               len(identifiants), len(connexions) // 2, len(texte_noms))
+
+    try:
+        with open(chemin_cache(fichier), 'wb') as my_file:
+            my_file.write(entete)
+            array('q', identifiants).tofile(my_file)
+            fins_noms.tofile(my_file)
+            my_file.write(texte_noms)
+            array('q', connexions).tofile(my_file)
+            array('I', durees).tofile(my_file)
+    except OSError:
+        # le cache n'est qu'une optimisation : on ignore un dossier en lecture seule
+        pass
+
+
+# nom de la ligne d'un fichier de données : "données/METRO_1.txt" -> "METRO_1"
+def nom_ligne(fichier):
+    return os.path.splitext(os.path.basename(fichier))[0]
+
+
+# Lit un fichier de données et renvoie le nom de sa ligne, puis les stations et
+# les connexions sous forme compacte : tableau des identifiants, liste des noms,
+# tableau des extrémités des connexions (deux cases par connexion) et tableau
+# de leurs durées de parcours.
+# Avec cache=True, le cache binaire est lu, ou créé s'il est absent ou périmé.
+def lire_fichier(fichier, cache=False):
+    name = nom_ligne(fichier)
+    donnees = lire_cache(fichier) if cache else None
+    if donnees is not None:
+        return (name,) + donnees
+
+    identifiants, noms, connexions, durees = array('q'), list(), array('q'), array('I')
+    with open(fichier, 'r', encoding='utf-8') as my_file:
+        for u, nom in lire_stations(my_file):
+            identifiants.append(u)
+            noms.append(nom)
+        for u, v, __not_used__, duree in lire_connexions(my_file, name):
+            connexions.append(u)
+            connexions.append(v)
+            durees.append(duree)
+
+    if cache:
+        ecrire_cache(fichier, identifiants, noms, connexions, durees)
+    return name, identifiants, noms, connexions, durees
+
+
+# insère dans le graphe les données renvoyées par lire_fichier()
+def inserer_donnees(graphe, donnees):
+    name, identifiants, noms, connexions, durees = donnees
+    graphe.ajouter_sommets(zip(identifiants, noms))
+    graphe.ajouter_aretes_ponderees(zip(connexions[0::2], connexions[1::2], itertools.repeat(name), durees))
+
+
+def charger_donnees(graphe, fichier, cache=False):
+    if cache:
+        inserer_donnees(graphe, lire_fichier(fichier, cache))
+        return
+
+    # sans cache, les stations et les connexions sont insérées au fil de la lecture
+    with open(fichier, 'r', encoding='utf-8') as my_file:
+        graphe.ajouter_sommets(lire_stations(my_file))
+        graphe.ajouter_aretes_ponderees(lire_connexions(my_file, nom_ligne(fichier)))
+
+
+# Renvoie un groupe de processus. concurrent.futures (qui importe
+# multiprocessing et logging) n'est importé qu'à sa première utilisation : le
+# programme démarre plus vite lorsqu'il n'en a pas besoin.
+def groupe_processus(processus, **options):
+    from concurrent.futures import ProcessPoolExecutor
+    return ProcessPoolExecutor(max_workers=processus, **options)
+
+
+# Charge plusieurs fichiers de données dans le graphe. Avec processus > 1, les
+# fichiers sont lus en parallèle par un groupe de processus, puis le processus
+# principal insère les données reçues dans l'ordre des fichiers. Une station
+# présente sur plusieurs lignes n'est créée qu'une fois (même identifiant), et
+# chaque connexion garde le nom de sa ligne.
+def charger_fichiers(graphe, fichiers, processus=1, cache=False):
+    if processus > 1 and len(fichiers) > 1:
+        with groupe_processus(processus) as executeur:
+            for donnees in executeur.map(lire_fichier, fichiers, itertools.repeat(cache)):
+                inserer_donnees(graphe, donnees)
+    else:
+        for fichier in fichiers:
+            charger_donnees(graphe, fichier, cache)
+
+
+# renvoie la liste triée des fichiers désignés par un dossier ou un motif (glob)
+def trouver_fichiers(motif):
+    if os.path.isdir(motif):
+        motif = os.path.join(motif, '*.txt')
+    return sorted(glob.glob(motif))
+
+
+def charger_repertoire(graphe, motif, processus=1, cache=False):
+    fichiers = trouver_fichiers(motif)
+    charger_fichiers(graphe, fichiers, processus, cache)
+    return fichiers
+
+
+# dossiers où sont cherchés les fichiers des lignes de métro et de RER
+DOSSIERS_DONNEES = ('.', 'données')
+
+
+# Renvoie les fichiers des lignes demandées (toutes si la liste est vide),
+# cherchés dans les dossiers de données successifs. Un même fichier présent
+# dans plusieurs dossiers n'est retenu qu'une fois.
+def fichiers_lignes(prefixe, lignes):
+    trouves = dict()
+    for dossier in DOSSIERS_DONNEES:
+        for chemin in glob.glob(os.path.join(dossier, prefixe + '*.txt')):
+            trouves.setdefault(os.path.basename(chemin), chemin)
+
+    if len(lignes) == 0:
+        return [trouves[nom] for nom in sorted(trouves)]
+
+    # une ligne introuvable provoque l'erreur habituelle à l'ouverture
+    return [trouves.get(prefixe + line + '.txt', prefixe + line + '.txt') for line in lignes]
+
+
+# Décorateur : le résultat de fonction(graphe) est mémorisé par le graphe pour
+# sa version actuelle (voir CacheAnalyses dans graphe.py). Plusieurs options
+# de la ligne de commande peuvent ainsi partager un même parcours.
+def memorise(fonction):
+    @functools.wraps(fonction)
+    def fonction_memorisee(graphe):
+        return graphe.memoriser(fonction.__name__, lambda: fonction(graphe))
+    return fonction_memorisee
 
 
 def init_dict(sommets, valeur):
     res = dict()
     for key in sommets:
         res[key] = valeur
+    compter('initialisations', len(res))
     return res
 
 
+# Renvoie pour chaque sommet la liste de ses voisins (sans doublon) dans l'ordre
+# croissant. Un seul tri global des sommets suffit : en parcourant les sommets
+# triés et en ajoutant chacun d'eux à la liste de ses voisins, chaque liste est
+# remplie directement dans l'ordre (principe du tri par paquets).
+def voisins_ordonnes(graphe):
+    ordre = init_dict(graphe.sommets(), None)
+    for u in ordre:
+        ordre[u] = list()
+
+    for u in sorted(ordre):
+        for v in {v for v, __not_used__ in graphe.voisins(u)}:
+            ordre[v].append(u)
+
+    return ordre
+
+
+@memorise
 def numerotations(graphe):
     debut = init_dict(graphe.sommets(), 0)
     parent = init_dict(graphe.sommets(), None)
     ancetre = init_dict(graphe.sommets(), 0)
+    ordre = voisins_ordonnes(graphe)
     instant = 0
 
-    def numerotation_recursive(sommet):
-        nonlocal instant
-        instant += 1
-
-        # affectation de la date d'exploration et de l'ancêtre
-        debut[sommet] = ancetre[sommet] = instant
-
-        # pour tous les voisins triés de sommet
-        for u, __not_used__ in sorted(graphe.voisins(sommet), key=lambda elm: elm[0]):
-
-            # si le voisin est déjà exploré
-            if debut[u] != 0:
-                # si le parent est différent du voisin
-                if parent[sommet] != u:
-                    ancetre[sommet] = min(ancetre[sommet], debut[u])
+    # Parcours en profondeur itératif : la pile contient les sommets en cours
+    # d'exploration, chacun associé à un itérateur sur ses voisins restants.
+    # On évite ainsi la limite de récursion sur les grands réseaux.
+    for racine in sorted(graphe.sommets()):
+        if debut[racine] != 0:
+            continue
 
+        instant += 1
+        debut[racine] = ancetre[racine] = instant
+        pile = [(racine, iter(ordre[racine]))]
+
+        while pile:
+            sommet, suivants = pile[-1]
+
+            for u in suivants:
+                # si le voisin est déjà exploré
+                if debut[u] != 0:
+                    # si le parent est différent du voisin
+                    if parent[sommet] != u:
+                        ancetre[sommet] = min(ancetre[sommet], debut[u])
+
+                # sinon on descend dans le voisin, la suite des voisins
+                # de "sommet" sera reprise au retour
+                else:
+                    parent[u] = sommet
+                    instant += 1
+                    debut[u] = ancetre[u] = instant
+                    pile.append((u, iter(ordre[u])))
+                    break
+
+            # tous les voisins ont été vus : remontée vers le parent
             else:
-                parent[u] = sommet
-                numerotation_recursive(u)
-                ancetre[sommet] = min(ancetre[sommet], ancetre[u])
-
-    for u in sorted(graphe.sommets()):
-        if debut[u] == 0:
-            numerotation_recursive(u)
+                pile.pop()
+                if pile:
+                    pere = pile[-1][0]
+                    ancetre[pere] = min(ancetre[pere], ancetre[sommet])
 
+    compter('visites_dfs', instant)
     return (debut, parent, ancetre)
 
 
+# renvoie les sommets triés par date de début croissante (tri par paquets, les
+# dates étant les entiers de 1 à n)
+def ordre_exploration(debut):
+    ordre = [None] * len(debut)
+    for u in debut:
+        ordre[debut[u] - 1] = u
+    return ordre
+
+
 # renvoie le nombre de successeurs de sommet
 def nb_successeurs(sommet, graphe, parent):
-    res = 0
+    successeurs = set()
     for v, __not_used__ in graphe.voisins(sommet):
         # si parent[v] == sommet, alors v est successeur de sommet
+        # (compté une seule fois s'il est relié à sommet par plusieurs lignes)
         if parent[v] == sommet:
-            res += 1
-    return res
+            successeurs.add(v)
+    return len(successeurs)
 
 
+@memorise
 def points_articulation(reseau):
     articulations = set()
     debut, parent, ancetre = numerotations(reseau)
@@ -104,9 +364,10 @@ def points_articulation(reseau):
         if (parent[u] not in racines) and (ancetre[u] >= debut[parent[u]]):
             articulations.add(parent[u])
 
-    return articulations
+    return frozenset(articulations)
 
 
+@memorise
 def ponts(reseau):
     ponts = set()
     debut, parent, ancetre = numerotations(reseau)
@@ -115,256 +376,1242 @@ def ponts(reseau):
         if (parent[u] != None) and (ancetre[u] > debut[parent[u]]):
             ponts.add((parent[u], u))
     
-    return ponts
+    return frozenset(ponts)
+
+
+# Numérote les composantes 2-arête-connexes du graphe, c'est-à-dire les
+# composantes connexes qui restent une fois les ponts retirés.
+# Renvoie le dictionnaire sommet -> numéro de composante et la liste des
+# sommets de chaque composante.
+def composantes_sans_ponts(graphe, ens_ponts):
+    composante = init_dict(graphe.sommets(), None)
+    membres = list()
+
+    for depart in sorted(graphe.sommets()):
+        if composante[depart] is not None:
+            continue
+
+        # parcours itératif de la composante de "depart" sans emprunter de pont
+        num = len(membres)
+        composante[depart] = num
+        compo = [depart]
+        pile = [depart]
+        while pile:
+            sommet = pile.pop()
+            for u, __not_used__ in graphe.voisins(sommet):
+                if composante[u] is None \
+                and (sommet, u) not in ens_ponts \
+                and (u, sommet) not in ens_ponts:
+                    composante[u] = num
+                    compo.append(u)
+                    pile.append(u)
 
+        membres.append(compo)
 
-def csp_feuille(graphe):
-    feuilles = set()
-    ens_ext = set()
-    ens_ponts = ponts(graphe)
-    deja_explore = init_dict(graphe.sommets(), False)
+    return composante, membres
+
+
+# Renvoie l'arbre des ponts : ses sommets sont les numéros des composantes
+# 2-arête-connexes, et chaque pont relie les composantes de ses extrémités.
+# L'arbre est donné par la liste des voisins de chaque composante.
+def arbre_des_ponts(graphe, ens_ponts):
+    composante, membres = composantes_sans_ponts(graphe, ens_ponts)
+    arbre = [list() for __not_used__ in membres]
 
-    # ensemble des extrémités
     for u, v in ens_ponts:
-        ens_ext.add(u)
-        ens_ext.add(v)
-
-    # Trouver une composante sans pont à partir d'un sommet u de départ.
-    # (u, v) est le pont associé à u.
-    # Indique également si cette composante contient plusieurs extrémités de pont.
-    def trouver_compo(sommet, pont_associe):
-        nonlocal contains_multi_ponts
-        compo.add(sommet)
-        deja_explore[sommet] = True
-
-        for u, __not_used__ in graphe.voisins(sommet):
-            if u in ens_ext:
-                if u not in pont_associe:
-                    contains_multi_ponts = True
-
-            elif not deja_explore[u]:
-                trouver_compo(u, pont_associe)
-
-    # parcours de toutes les extrémités
-    for pont in ens_ponts:
-        for sommet in pont:
-            for key in graphe.sommets():
-                deja_explore[key] = False
-
-            contains_multi_ponts = False
-            compo = set()
-            trouver_compo(sommet, pont)
-
-            # Si la composante créée contient au plus une extrémité de pont
-            # alors elle est considérée comme une feuille.
-            if not contains_multi_ponts:
-                feuilles.add(tuple(compo))
+        arbre[composante[u]].append(composante[v])
+        arbre[composante[v]].append(composante[u])
+
+    return composante, membres, arbre
+
+
+# Renvoie les ponts et l'arbre des ponts du graphe (composante de chaque sommet,
+# membres et voisins de chaque composante), mémorisés pour sa version actuelle.
+def decomposition_ponts(graphe):
+    ens_ponts = ponts(graphe)
+    composante, membres, arbre = graphe.memoriser('arbre_des_ponts', lambda: arbre_des_ponts(graphe, ens_ponts))
+    return ens_ponts, composante, membres, arbre
+
+
+def csp_feuille(graphe):
+    ens_ponts, composante, membres, arbre = decomposition_ponts(graphe)
+
+    # Une composante est une feuille si elle n'est reliée au reste du graphe
+    # que par un seul pont.
+    feuilles = [tuple(membres[c]) for c in range(len(membres)) if len(arbre[c]) == 1]
 
     # l'ensemble des ponts est renvoyé pour éviter de le recalculer dans "amelioration_ponts()"
-    return list(feuilles), ens_ponts
+    return feuilles, ens_ponts
 
 
 def trouver_sous_graphe(graphe):
     feuilles, ens_ponts = csp_feuille(graphe)
-    feuille_deja_explo = init_dict(feuilles, False)
 
     # tableau contenant tous les sous-graphes de "graphe"
     sous_graphe = dict()
-    deja_explore = init_dict(graphe.sommets(), False)
-
-    # Parcours des sous-graphes à partir de sommet, si le sommet "cible" est rencontré
-    # alors les sommets en paramètre appartenant respectivement à leur CSP feuille
-    # font parties du même sous-graphe.
-    def meme_sous_graphe(sommet, cible):
-        deja_explore[sommet] = True
-
-        # Sommet "cible" rencontré alors la CSP auquel appartient "cible" est dans le
-        # même sous-graphe que celui de "sommet".
-        if sommet == cible:
-            sous_graphe[i].append(feuilles[j])
-            feuille_deja_explo[feuilles[j]] = True
-        else:
-            for u, __not_used__ in graphe.voisins(sommet):
-                if not deja_explore[u]:
-                    meme_sous_graphe(u, cible)
 
-    # ajout des CSP feuilles à leur sous-graphe
+    # Deux CSP feuilles font partie du même sous-graphe si leurs sommets ont le
+    # même représentant dans l'index des composantes connexes du graphe.
+    # Chaque sous-graphe est numéroté par l'indice de sa première feuille.
+    numero = dict()
     for i in range(len(feuilles)):
-        if not feuille_deja_explo[feuilles[i]]:
-            # création d'un nouveau sous-graphe
-            sous_graphe[i] = [feuilles[i]]
-            feuille_deja_explo[feuilles[i]] = True
+        representant = graphe.composante(feuilles[i][0])
+        if representant not in numero:
+            numero[representant] = i
+            sous_graphe[i] = list()
+        sous_graphe[numero[representant]].append(feuilles[i])
 
-            for j in range(i + 1, len(feuilles)):
-                if not feuille_deja_explo[feuilles[j]]:
-                    for key in graphe.sommets():
-                        deja_explore[key] = False
+    return sous_graphe, ens_ponts
 
-                    meme_sous_graphe(feuilles[i][0], feuilles[j][0])
 
-    return sous_graphe, ens_ponts
+# Renvoie les feuilles de chaque arbre de l'arbre des ponts, dans l'ordre d'un
+# parcours en profondeur de cet arbre (une liste de feuilles par arbre ayant
+# au moins une arête).
+def feuilles_par_arbre(arbre):
+    res = list()
+    vu = [False] * len(arbre)
+
+    for racine in range(len(arbre)):
+        if vu[racine] or len(arbre[racine]) == 0:
+            continue
+
+        feuilles = list()
+        vu[racine] = True
+        pile = [racine]
+        while pile:
+            c = pile.pop()
+            if len(arbre[c]) == 1:
+                feuilles.append(c)
+            # empilés en ordre inverse pour être visités en ordre croissant
+            for d in sorted(arbre[c], reverse=True):
+                if not vu[d]:
+                    vu[d] = True
+                    pile.append(d)
+        res.append(feuilles)
 
+    return res
 
-# renvoie un ensemble d'arêtes à ajouter pour supprimer les ponts
-def amelioration_ponts(reseau):
-    aretes_amelioration = set();
-    sous_graphe, ens_ponts = trouver_sous_graphe(reseau)
-    
-    # Vérifie si un sous-graphe est composé uniquement
-    # de deux sommets et d'un pont entre.
-    def verifier_mini_graphe():
-        if len(sg_tmp) == 2 and (len(sg_tmp[0]), len(sg_tmp[1])) == (1, 1):
-            nb_voisins_1 = len(reseau.voisins(sg_tmp[0][0]))
-            nb_voisins_2 = len(reseau.voisins(sg_tmp[1][0]))
-            if nb_voisins_1 == 1 and nb_voisins_2 == 1:
-                return True
-        return False
-
-    # ajout des arêtes permettant d'améliorer le réseau
-    for num_sg in sous_graphe:
-        sg_tmp = sous_graphe[num_sg]
-
-        if verifier_mini_graphe():
-            aretes_amelioration.add((sg_tmp[0][0], sg_tmp[1][0]))
 
-        else:
-            for i in range(len(sg_tmp) - 1):
-                # choix aléatoire des sommets
-                u = random.choice(sg_tmp[i])
-                v = random.choice(sg_tmp[i + 1])
-                # Tant que l'arête potentielle à ajouter est identique à un pont
-                # on continue de choisir aléatoirement les sommets.
-                while (u, v) in ens_ponts or (v, u) in ens_ponts:
-                    u = random.choice(sg_tmp[i])
-                    v = random.choice(sg_tmp[i + 1])
-
-                aretes_amelioration.add((u, v))
-    
+# Ajoute aux arêtes données celles qui relient les sommets choisis dans les k
+# feuilles d'un arbre (dans l'ordre d'un parcours en profondeur) : le i-ème au
+# (i + k // 2)-ème, et le dernier au premier si k est impair.
+def relier_feuilles(sommets, aretes):
+    k = len(sommets)
+    h = k // 2
+    for i in range(h):
+        aretes.add((sommets[i], sommets[i + h]))
+    if k % 2 == 1:
+        aretes.add((sommets[k - 1], sommets[0]))
+
+
+# Renvoie True si les composantes c et d de l'arbre des ponts, reliées par un
+# pont, forment à elles seules un arbre et sont chacune réduites à une station :
+# le pont est alors une composante connexe à lui seul, qu'aucune arête entre
+# stations existantes ne peut renforcer (la seule possible reproduirait la même
+# connexion, et une arête multiple ne compte pas comme un second chemin).
+def arete_isolee(c, d, membres, arbre):
+    return arbre[c] == [d] and arbre[d] == [c] and len(membres[c]) == len(membres[d]) == 1
+
+
+# Renvoie les ponts qui forment à eux seuls une composante connexe (voir
+# arete_isolee()) : amelioration_ponts() ne peut pas les supprimer.
+def ponts_isoles(reseau):
+    ens_ponts, composante, membres, arbre = decomposition_ponts(reseau)
+    return {(u, v) for u, v in ens_ponts if arete_isolee(composante[u], composante[v], membres, arbre)}
+
+
+# Renvoie un ensemble d'arêtes à ajouter pour supprimer les ponts.
+#
+# Algorithme d'Eswaran et Tarjan : dans chaque arbre de l'arbre des ponts ayant
+# k feuilles, il faut au moins ceil(k / 2) nouvelles arêtes, car chaque feuille
+# doit en recevoir une. On numérote les feuilles l_0, ..., l_k-1 dans l'ordre
+# d'un parcours en profondeur, puis on relie l_i à l_i+h pour i < h = k // 2,
+# et l_k-1 à l_0 si k est impair. Chaque arête de l'arbre sépare les feuilles
+# en deux intervalles consécutifs (à rotation près) : l'un d'eux contient au
+# plus la moitié des feuilles, dont l'une est forcément reliée à l'autre
+# intervalle. Plus aucune arête n'est donc un pont, avec ceil(k / 2) arêtes.
+#
+# Dans une composante feuille, on relie de préférence un sommet qui n'est pas
+# l'extrémité d'un pont : le premier trouvé, ou un sommet tiré au hasard si une
+# graine est donnée (le résultat reste reproductible).
+#
+# Exception : une composante connexe réduite à deux stations et à la connexion
+# qui les relie est ignorée (voir ponts_isoles()), ce pont restant le seul
+# après l'ajout des arêtes renvoyées.
+def amelioration_ponts(reseau, graine=None):
+    aretes_amelioration = set()
+    ens_ponts, composante, membres, arbre = decomposition_ponts(reseau)
+    alea = random.Random(graine) if graine is not None else None
+
+    extremites = set()
+    for u, v in ens_ponts:
+        extremites.add(u)
+        extremites.add(v)
+
+    def choisir_sommet(feuille):
+        candidats = [u for u in membres[feuille] if u not in extremites] or membres[feuille]
+        return alea.choice(candidats) if alea is not None else candidats[0]
+
+    for feuilles in feuilles_par_arbre(arbre):
+        if len(feuilles) == 2 and arete_isolee(feuilles[0], feuilles[1], membres, arbre):
+            continue
+        relier_feuilles([choisir_sommet(feuille) for feuille in feuilles], aretes_amelioration)
+
     return aretes_amelioration
 
 
-# renvoie un ensemble d'arêtes à ajouter pour supprimer les points d'articulation
+class DecompositionBiconnexe(object):
+    """Blocs (composantes biconnexes), points d'articulation et arbre des blocs
+    d'un graphe, calculés en un seul parcours en profondeur (algorithme de
+    Hopcroft et Tarjan avec une pile d'arêtes).
+
+    Le parcours se fait sur la représentation CSR d'un GrapheCompact, et tous
+    les résultats sont stockés dans des array : les sommets du bloc b sont les
+    cases debuts_blocs[b] à debuts_blocs[b + 1] - 1 de sommets_blocs, et
+    l'arbre des blocs est lui aussi au format CSR (debuts_arbre, cibles_arbre).
+    Ses sommets 0 à b - 1 sont les blocs, les suivants sont les points
+    d'articulation, reliés aux blocs qui les contiennent.
+    La mémoire utilisée est ainsi de quelques entiers par sommet et par arête,
+    sans objet Python par sommet.
+
+    Comme pour ponts(), les arêtes multiples (même couple de stations sur
+    plusieurs lignes) comptent pour une seule, et les boucles sont ignorées.
+    Les sommets isolés n'appartiennent à aucun bloc.
+    """
+
+    def __init__(self, compact, identifiants=None):
+        """Décompose le GrapheCompact donné. Les sommets sont désignés par
+        leurs identifiants d'origine si identifiants vaut compact.identifiants,
+        et par leurs numéros dans compact sinon."""
+        self.identifiants = range(compact.nombre_sommets()) if identifiants is None else identifiants
+        self.indices = None if identifiants is None else compact.indices
+        n = compact.nombre_sommets()
+        debuts, cibles = compact.debuts, compact.cibles
+
+        debut = array('i', [0]) * n
+        ancetre = array('i', [0]) * n
+        parent = array('i', [-1]) * n
+        # prochaine demi-arête à examiner pour chaque sommet
+        suivante = array('l', debuts)
+        # dernier bloc contenant chaque sommet, et nombre de blocs le contenant
+        self.bloc_sommet = array('i', [-1]) * n
+        nb_blocs = array('i', [0]) * n
+
+        self.debuts_blocs = array('l', [0])
+        self.sommets_blocs = array('i')
+        pile_u, pile_v = array('i'), array('i')
+        exploration = array('i')
+        instant = 0
+
+        for racine in range(n):
+            if debut[racine] != 0:
+                continue
+
+            instant += 1
+            debut[racine] = ancetre[racine] = instant
+            exploration.append(racine)
+
+            while exploration:
+                u = exploration[-1]
+
+                if suivante[u] < debuts[u + 1]:
+                    v = cibles[suivante[u]]
+                    suivante[u] += 1
+                    # arête de l'arbre : on descend dans v
+                    if debut[v] == 0:
+                        parent[v] = u
+                        instant += 1
+                        debut[v] = ancetre[v] = instant
+                        pile_u.append(u)
+                        pile_v.append(v)
+                        exploration.append(v)
+                    # arête de retour vers un ancêtre (vue une seule fois,
+                    # depuis le descendant)
+                    elif v != parent[u] and debut[v] < debut[u]:
+                        pile_u.append(u)
+                        pile_v.append(v)
+                        if debut[v] < ancetre[u]:
+                            ancetre[u] = debut[v]
+                    continue
+
+                # tous les voisins ont été vus : remontée vers le parent
+                exploration.pop()
+                p = parent[u]
+                if p < 0:
+                    continue
+                if ancetre[u] < ancetre[p]:
+                    ancetre[p] = ancetre[u]
+
+                # p sépare u du reste : les arêtes empilées depuis {p, u}
+                # forment un bloc
+                if ancetre[u] >= debut[p]:
+                    b = len(self.debuts_blocs) - 1
+                    while True:
+                        a, c = pile_u.pop(), pile_v.pop()
+                        for w in (a, c):
+                            if self.bloc_sommet[w] != b:
+                                self.bloc_sommet[w] = b
+                                nb_blocs[w] += 1
+                                self.sommets_blocs.append(w)
+                        if a == p and c == u:
+                            break
+                    self.debuts_blocs.append(len(self.sommets_blocs))
+
+        compter('visites_dfs', instant)
+        self.articulations = array('i', (u for u in range(n) if nb_blocs[u] >= 2))
+
+        # arbre des blocs, en deux passes : degrés puis remplissage
+        nb = self.nombre_blocs()
+        numero = array('i', [-1]) * n
+        for i, w in enumerate(self.articulations):
+            numero[w] = nb + i
+        degres = array('l', [0]) * (nb + len(self.articulations) + 1)
+        for b in range(nb):
+            for w in self.sommets_bloc(b):
+                if numero[w] >= 0:
+                    degres[b + 1] += 1
+                    degres[numero[w] + 1] += 1
+        for x in range(1, len(degres)):
+            degres[x] += degres[x - 1]
+        self.debuts_arbre = array('l', degres)
+        self.cibles_arbre = array('i', [0]) * degres[-1]
+        for b in range(nb):
+            for w in self.sommets_bloc(b):
+                if numero[w] >= 0:
+                    c = numero[w]
+                    self.cibles_arbre[degres[b]] = c
+                    self.cibles_arbre[degres[c]] = b
+                    degres[b] += 1
+                    degres[c] += 1
+
+    def arbre(self):
+        """Renvoie l'arbre des blocs sous forme de listes d'adjacence."""
+        return [list(self.voisins_arbre(x)) for x in range(len(self.debuts_arbre) - 1)]
+
+    def bloc(self, b):
+        """Renvoie la liste des sommets du bloc numéro b."""
+        return [self.identifiants[w] for w in self.sommets_bloc(b)]
+
+    def blocs(self):
+        """Renvoie la liste des blocs, chacun sous forme de liste de sommets."""
+        return [self.bloc(b) for b in range(self.nombre_blocs())]
+
+    def blocs_contenant(self, sommet):
+        """Renvoie la liste des numéros des blocs contenant le sommet donné
+        (plusieurs pour un point d'articulation, aucun pour un sommet isolé)."""
+        w = sommet if self.indices is None else self.indices[sommet]
+        b = self.bloc_sommet[w]
+        if b < 0:
+            return []
+        for x in self.voisins_arbre(b):
+            if self.articulations[x - self.nombre_blocs()] == w:
+                return list(self.voisins_arbre(x))
+        return [b]
+
+    def nombre_blocs(self):
+        """Renvoie le nombre de blocs du graphe."""
+        return len(self.debuts_blocs) - 1
+
+    def points_articulation(self):
+        """Renvoie l'ensemble des points d'articulation du graphe."""
+        return frozenset(self.identifiants[w] for w in self.articulations)
+
+    def sommets_bloc(self, b):
+        """Renvoie le tableau des numéros (dans le graphe compact) des sommets
+        du bloc b."""
+        return self.sommets_blocs[self.debuts_blocs[b]:self.debuts_blocs[b + 1]]
+
+    def voisins_arbre(self, x):
+        """Renvoie les voisins du sommet x de l'arbre des blocs."""
+        return self.cibles_arbre[self.debuts_arbre[x]:self.debuts_arbre[x + 1]]
+
+
+# Renvoie la décomposition en blocs du graphe (voir DecompositionBiconnexe).
+# Un Graphe est d'abord figé au format CSR ; les résultats sont exprimés avec
+# ses identifiants de sommets.
+@memorise
+def composantes_biconnexes(graphe):
+    if isinstance(graphe, (GrapheCompact, GrapheFlux)):
+        return DecompositionBiconnexe(graphe)
+    compact = graphe.figer()
+    return DecompositionBiconnexe(compact, compact.identifiants)
+
+
+# Ponts et points d'articulation d'un graphe lu en flux (voir GrapheFlux),
+# désignés par les identifiants des stations, obtenus par la décomposition en
+# blocs : sa mémoire se limite à quelques tableaux d'entiers, et un pont est
+# un bloc de deux sommets (le parent puis l'enfant, comme dans ponts()).
+@memorise
+def ponts_flux(graphe):
+    decomposition = composantes_biconnexes(graphe)
+    identifiants = graphe.identifiants
+    res = set()
+    for b in range(decomposition.nombre_blocs()):
+        bloc = decomposition.sommets_bloc(b)
+        if len(bloc) == 2:
+            res.add((identifiants[bloc[0]], identifiants[bloc[1]]))
+    return frozenset(res)
+
+
+@memorise
+def points_articulation_flux(graphe):
+    identifiants = graphe.identifiants
+    return frozenset(identifiants[w] for w in composantes_biconnexes(graphe).articulations)
+
+
+# Renvoie la liste des sommets de chaque bloc, la liste des points
+# d'articulation et l'arbre des blocs, sous forme de listes Python (voir
+# composantes_biconnexes() pour la version compacte).
+@memorise
+def arbre_des_blocs(graphe):
+    decomposition = composantes_biconnexes(graphe)
+    coupures = [decomposition.identifiants[w] for w in decomposition.articulations]
+    return decomposition.blocs(), coupures, decomposition.arbre()
+
+
+# Renvoie un ensemble d'arêtes à ajouter pour supprimer les points d'articulation.
+#
+# Les feuilles de l'arbre des blocs sont des blocs ne contenant qu'un point
+# d'articulation. Comme pour les ponts, on relie les feuilles de chaque arbre
+# deux à deux (voir relier_feuilles()), en choisissant dans chaque feuille un
+# sommet autre que son point d'articulation : ceil(k / 2) arêtes pour k
+# feuilles, le minimum possible pour que chaque feuille en reçoive une.
+# Ce premier appariement peut laisser subsister des points d'articulation (par
+# exemple un sommet dont les branches restent reliées deux à deux entre elles).
+# L'analyse est donc refaite sur le graphe complété, et les blocs de chaque
+# point d'articulation restant sont reliés en chaîne.
+# L'ensemble est linéaire : deux décompositions en blocs au plus.
 def amelioration_points_articulation(reseau):
-    aretes_amelioration = set();
-    debut, parent, ancetre = numerotations(reseau)
-    ens_artic = points_articulation(reseau)
+    aretes_amelioration = set()
+    membres, coupures, arbre = arbre_des_blocs(reseau)
+    ens_artic = set(coupures)
 
-    # tableau des articulations à traiter
-    artic_deja_traite = init_dict(ens_artic, False)
-    for point in ens_artic:
-        artic_deja_traite[point] = False
+    for feuilles in feuilles_par_arbre(arbre):
+        sommets = [next(u for u in membres[b] if u not in ens_artic) for b in feuilles]
+        relier_feuilles(sommets, aretes_amelioration)
 
-    def artic_toutes_traitees():
-        nonlocal point_date_max
-        for point in artic_deja_traite:
-            if not artic_deja_traite[point]:
-                point_date_max = point
-                return False
-        return True
+    if len(aretes_amelioration) == 0:
+        return aretes_amelioration
 
-    def trouver_racine(sommet):
-        nonlocal racine
-        if parent[sommet] == None:
-            racine = sommet
+    # points d'articulation restant après le premier appariement
+    complete = Graphe()
+    complete.ajouter_aretes(reseau.aretes())
+    complete.ajouter_aretes((u, v, None) for u, v in aretes_amelioration)
+    membres, coupures, arbre = arbre_des_blocs(complete)
+
+    for i in range(len(coupures)):
+        c = coupures[i]
+        sommets = [next(u for u in membres[b] if u != c) for b in arbre[len(membres) + i]]
+        for j in range(len(sommets) - 1):
+            aretes_amelioration.add((sommets[j], sommets[j + 1]))
 
-        else:
-            # si le sommet est un point d'articulation, on considère qu'il a été traité
-            # si le nombre de successeurs est >= 2, alors il faudra le traiter séparément
-            if (sommet in ens_artic) and (nb_successeurs(sommet, reseau, parent) < 2):
-                artic_deja_traite[sommet] = True
-            trouver_racine(parent[sommet])
-
-    def est_successeur(voisin, sommet):
-        return parent[voisin] == sommet
-
-    def recup_point_date_max():
-        nonlocal point_date_max
-        for point in ens_artic:
-            if (not artic_deja_traite[point]) and (debut[point] > debut[point_date_max]):
-                point_date_max = point
-
-    def articulation_non_racine():
-        trouver_racine(point_date_max)
-        artic_deja_traite[point_date_max] = True
-
-        for v, __not_used__ in reseau.voisins(point_date_max):
-            if est_successeur(v, point_date_max) \
-            and (v not in ens_artic) \
-            and (ancetre[v] >= debut[point_date_max]):
-                aretes_amelioration.add((racine, v))
-
-    def articulation_racine():
-        # liste des successeurs à relier
-        successeurs = list()
-        artic_deja_traite[point_date_max] = True
-        
-        for v, __not_used__ in reseau.voisins(point_date_max):
-            if est_successeur(v, point_date_max):
-                successeurs.append(v)
-        
-        for i in range(len(successeurs) - 1):
-            aretes_amelioration.add((successeurs[i], successeurs[i + 1]))
-
-    point_date_max = None
-    racine = None
-    while not artic_toutes_traitees():
-        # sélection du point d'articulation dont la date de début est maximale
-        recup_point_date_max()
-
-        # cas où le point d'articulation n'est pas une racine
-        if parent[point_date_max] != None:
-            articulation_non_racine()
-
-        # cas où le point d'articulation est une racine
-        else:
-            articulation_racine()
-    
     return aretes_amelioration
 
 
+# Maintient les ponts et les points d'articulation d'un graphe au fil des
+# ajouts d'arêtes, sans refaire de parcours complet à chaque ajout.
+#
+# On conserve une forêt couvrante (issue de numerotations()) dont chaque arête
+# est désignée par son extrémité fille. Les arêtes de la forêt sont regroupées
+# en blocs (composantes biconnexes) à l'aide d'un union-find : un sommet est un
+# point d'articulation s'il touche au moins deux blocs, et une arête de la
+# forêt est un pont si aucun cycle ne passe par elle.
+# Une nouvelle arête {u, v} :
+#   - entre deux arbres différents, relie les arbres et devient un pont ;
+#   - dans un même arbre, ferme un cycle : les arêtes du chemin de u à v ne sont
+#     plus des ponts, et les blocs du chemin fusionnent.
+# Le coût d'un ajout est donc proportionnel à la longueur du chemin parcouru.
+# Comme dans ponts(), une arête parallèle à une arête existante (autre ligne
+# entre les mêmes stations) ne modifie rien.
+class AnalyseIncrementale(object):
+    def __init__(self, graphe):
+        self.graphe = graphe
+        self.a_jour = False
+        graphe.abonner(self)
+
+    def initialiser(self):
+        debut, parent, ancetre = numerotations(self.graphe)
+        # copie : le résultat de numerotations() est partagé par le cache
+        self.parent = dict(parent)
+        self.blocs = EnsemblesDisjoints()
+        self.bloc = dict()
+        self.nb_ids_blocs = 0
+        self.nb_blocs = init_dict(parent, 0)
+        self.fils_ponts = set()
+        self.articulations = set()
+
+        # traitement des sommets par date de début croissante, afin que le
+        # bloc de l'arête du parent soit connu avant celui de ses fils
+        for u in ordre_exploration(debut):
+            p = parent[u]
+            if p is None:
+                continue
+            self.nb_blocs[u] += 1
+
+            # l'arête {p, u} commence un nouveau bloc si p sépare u du reste
+            if ancetre[u] >= debut[p]:
+                self.nouveau_bloc(u)
+                self.nb_blocs[p] += 1
+            else:
+                self.bloc[u] = self.bloc[p]
+
+            if ancetre[u] > debut[p]:
+                self.fils_ponts.add(u)
+
+        for u in self.nb_blocs:
+            if self.nb_blocs[u] >= 2:
+                self.articulations.add(u)
+
+        self.a_jour = True
+
+    # crée un nouveau bloc contenant l'arête de la forêt désignée par u
+    def nouveau_bloc(self, u):
+        self.bloc[u] = self.nb_ids_blocs
+        self.blocs.ajouter(self.nb_ids_blocs)
+        self.nb_ids_blocs += 1
+
+    def verifier(self):
+        if not self.a_jour:
+            self.initialiser()
+
+    def ponts(self):
+        self.verifier()
+        return {(self.parent[u], u) for u in self.fils_ponts}
+
+    def points_articulation(self):
+        self.verifier()
+        return set(self.articulations)
+
+    # Renvoie le chemin de u à v dans la forêt, sous la forme des deux listes de
+    # sommets remontant de u (resp. v) jusqu'à leur plus proche ancêtre commun
+    # exclu, ainsi que cet ancêtre. Les deux remontées sont faites en alternance
+    # pour que le coût reste proportionnel à la longueur du chemin.
+    # Renvoie None si u et v sont dans des arbres différents.
+    def chemin(self, u, v):
+        cote_u, cote_v = [u], [v]
+        vus_u, vus_v = {u}, {v}
+        while True:
+            if cote_u[-1] in vus_v:
+                commun = cote_u[-1]
+                break
+            if cote_v[-1] in vus_u:
+                commun = cote_v[-1]
+                break
+
+            p_u = self.parent[cote_u[-1]]
+            p_v = self.parent[cote_v[-1]]
+            if p_u is None and p_v is None:
+                return None
+            if p_u is not None:
+                cote_u.append(p_u)
+                vus_u.add(p_u)
+            if p_v is not None:
+                cote_v.append(p_v)
+                vus_v.add(p_v)
+
+        # on coupe chaque remontée juste avant l'ancêtre commun
+        return cote_u[:cote_u.index(commun)], cote_v[:cote_v.index(commun)], commun
+
+    # Renvoie les sommets du chemin où deux blocs différents se rejoignent :
+    # ce sont eux qui perdent un bloc lorsque le cycle est fermé.
+    def jonctions(self, cote_u, cote_v, commun):
+        res = list()
+        for cote in (cote_u, cote_v):
+            for i in range(1, len(cote)):
+                if self.blocs.trouver(self.bloc[cote[i - 1]]) != self.blocs.trouver(self.bloc[cote[i]]):
+                    res.append(cote[i])
+        if cote_u and cote_v \
+        and self.blocs.trouver(self.bloc[cote_u[-1]]) != self.blocs.trouver(self.bloc[cote_v[-1]]):
+            res.append(commun)
+        return res
+
+    # renvoie True si les sommets u et v sont déjà voisins
+    def sont_voisins(self, u, v):
+        if not self.graphe.contient_sommet(u):
+            return False
+        return any(w == v for w, __not_used__ in self.graphe.voisins(u))
+
+    # Renvoie les ponts et les points d'articulation qui disparaîtraient si
+    # l'arête {u, v} était ajoutée, sans modifier le graphe.
+    def tester_arete(self, u, v):
+        self.verifier()
+        if u == v or u not in self.parent or v not in self.parent or self.sont_voisins(u, v):
+            return set(), set()
+
+        res = self.chemin(u, v)
+        if res is None:
+            return set(), set()
+        cote_u, cote_v, commun = res
+
+        ens_ponts = {(self.parent[x], x) for x in cote_u + cote_v if x in self.fils_ponts}
+        ens_artic = {x for x in self.jonctions(cote_u, cote_v, commun) if self.nb_blocs[x] == 2}
+        return ens_ponts, ens_artic
+
+    # appelée par le graphe avant l'ajout effectif de l'arête {u, v}
+    def avant_ajout_arete(self, u, v):
+        if not self.a_jour or u == v or self.sont_voisins(u, v):
+            return
+
+        for x in (u, v):
+            if x not in self.parent:
+                self.parent[x] = None
+                self.nb_blocs[x] = 0
+
+        res = self.chemin(u, v)
+        if res is None:
+            self.relier_arbres(u, v)
+            return
+
+        cote_u, cote_v, commun = res
+        for x in self.jonctions(cote_u, cote_v, commun):
+            self.nb_blocs[x] -= 1
+            if self.nb_blocs[x] < 2:
+                self.articulations.discard(x)
+
+        # toutes les arêtes du chemin forment désormais un seul bloc, et
+        # aucune d'elles n'est plus un pont
+        chemin = cote_u + cote_v
+        for x in chemin:
+            self.blocs.unir(self.bloc[chemin[0]], self.bloc[x])
+            self.fils_ponts.discard(x)
+
+    # L'arête {u, v} relie deux arbres : l'arbre de v est re-enraciné en v
+    # (en inversant les arêtes du chemin de v à sa racine) puis accroché à u.
+    def relier_arbres(self, u, v):
+        remontee = [v]
+        while self.parent[remontee[-1]] is not None:
+            remontee.append(self.parent[remontee[-1]])
+
+        # l'arête {x_i, x_i+1} était désignée par x_i, elle l'est désormais
+        # par x_i+1 : on décale les informations le long du chemin
+        for i in range(len(remontee) - 1, 0, -1):
+            x, pere = remontee[i], remontee[i - 1]
+            self.parent[x] = pere
+            self.bloc[x] = self.bloc[pere]
+            if pere in self.fils_ponts:
+                self.fils_ponts.add(x)
+            else:
+                self.fils_ponts.discard(x)
+
+        # la nouvelle arête forme un bloc à elle seule, et c'est un pont
+        self.parent[v] = u
+        self.nouveau_bloc(v)
+        self.fils_ponts.add(v)
+        for x in (u, v):
+            self.nb_blocs[x] += 1
+            if self.nb_blocs[x] >= 2:
+                self.articulations.add(x)
+
+    # appelée par le graphe après un retrait : tout sera recalculé
+    def apres_retrait(self):
+        self.a_jour = False
+
+
+# Évaluation d'arêtes candidates, sans les ajouter au graphe.
+#
+# Une nouvelle arête {u, v} entre deux sommets d'une même composante connexe
+# ferme un cycle : dans l'arbre des blocs (voir DecompositionBiconnexe), les
+# blocs du chemin entre u et v fusionnent. Chaque sommet de u ou v est désigné
+# dans cet arbre par son nœud : le point d'articulation lui-même, ou l'unique
+# bloc qui le contient. Alors :
+#   - les ponts supprimés sont les blocs de deux sommets du chemin ;
+#   - les points d'articulation supprimés sont ceux de l'intérieur du chemin
+#     qui n'appartiennent qu'à deux blocs (les deux blocs du chemin, qui
+#     fusionnent) ; u et v gardent leurs autres blocs.
+# Une arête entre deux composantes, ou entre deux sommets d'un même bloc (par
+# exemple déjà voisins), ne supprime rien.
+#
+# L'arbre des blocs est enraciné une fois pour toutes, et chaque nœud reçoit
+# le nombre de ponts et de points d'articulation à deux blocs du chemin qui le
+# relie à sa racine : ces sommes préfixes donnent les nombres du chemin entre
+# deux nœuds à partir de leur plus proche ancêtre commun. Les ancêtres communs
+# de tout un lot de candidates sont obtenus en un seul parcours de l'arbre
+# (algorithme hors ligne de Tarjan, avec un union-find à compression des
+# chemins) : O(n + m + k) pour k candidates, au lieu d'une analyse complète
+# par candidate.
+class EvaluationCandidats(object):
+    def __init__(self, graphe):
+        self.decomposition = decomposition = composantes_biconnexes(graphe)
+        self.nb_blocs = nb = decomposition.nombre_blocs()
+        nb_noeuds = len(decomposition.debuts_arbre) - 1
+        debuts_arbre, cibles_arbre = decomposition.debuts_arbre, decomposition.cibles_arbre
+
+        # nœud de chaque sommet (-1 pour un sommet isolé)
+        self.noeud = array('i', decomposition.bloc_sommet)
+        for i, w in enumerate(decomposition.articulations):
+            self.noeud[w] = nb + i
+
+        # pont : bloc de deux sommets ; coupure simple : point d'articulation
+        # n'appartenant qu'à deux blocs
+        self.pont = array('b', [0]) * nb_noeuds
+        for b in range(nb):
+            if decomposition.debuts_blocs[b + 1] - decomposition.debuts_blocs[b] == 2:
+                self.pont[b] = 1
+        self.coupure = array('b', [0]) * nb_noeuds
+        for x in range(nb, nb_noeuds):
+            if debuts_arbre[x + 1] - debuts_arbre[x] == 2:
+                self.coupure[x] = 1
+
+        # parcours en profondeur de chaque arbre : parent, profondeur, racine
+        # et sommes préfixes depuis la racine (nœud compris)
+        self.parent = array('i', [-1]) * nb_noeuds
+        self.profondeur = array('i', [0]) * nb_noeuds
+        self.racine = array('i', [-1]) * nb_noeuds
+        self.cumul_ponts = array('i', [0]) * nb_noeuds
+        self.cumul_coupures = array('i', [0]) * nb_noeuds
+        # nœuds dans l'ordre du parcours (chaque parent avant ses enfants)
+        self.ordre = array('i')
+        for r in range(nb_noeuds):
+            if self.racine[r] >= 0:
+                continue
+            self.racine[r] = r
+            self.cumul_ponts[r] = self.pont[r]
+            self.cumul_coupures[r] = self.coupure[r]
+            pile = [r]
+            while pile:
+                x = pile.pop()
+                self.ordre.append(x)
+                for y in cibles_arbre[debuts_arbre[x]:debuts_arbre[x + 1]]:
+                    if y != self.parent[x]:
+                        self.parent[y] = x
+                        self.racine[y] = r
+                        self.profondeur[y] = self.profondeur[x] + 1
+                        self.cumul_ponts[y] = self.cumul_ponts[x] + self.pont[y]
+                        self.cumul_coupures[y] = self.cumul_coupures[x] + self.coupure[y]
+                        pile.append(y)
+
+    def ancetres_communs(self, paires):
+        """Renvoie le plus proche ancêtre commun de chaque paire (a, b) de
+        nœuds d'un même arbre (algorithme hors ligne de Tarjan)."""
+        requetes = dict()
+        for i, (a, b) in enumerate(paires):
+            requetes.setdefault(a, list()).append((b, i))
+            requetes.setdefault(b, list()).append((a, i))
+        res = array('i', [-1]) * len(paires)
+
+        # les nœuds sont terminés dans l'ordre inverse du parcours : tous les
+        # enfants d'un nœud le sont avant lui
+        ensembles = EnsemblesDisjoints()
+        ancetre = dict()
+        termine = array('b', [0]) * len(self.parent)
+        for x in reversed(self.ordre):
+            ensembles.ajouter(x)
+            ancetre[x] = x
+            termine[x] = 1
+            for y, i in requetes.get(x, ()):
+                if termine[y] and res[i] < 0:
+                    res[i] = ancetre[ensembles.trouver(y)]
+            p = self.parent[x]
+            if p >= 0:
+                ensembles.ajouter(p)
+                ensembles.unir(p, x)
+                ancetre[ensembles.trouver(p)] = p
+        return res
+
+    def evaluer(self, candidats):
+        """Renvoie, pour chaque arête candidate (u, v), le nombre de ponts et
+        le nombre de points d'articulation que son ajout supprimerait."""
+        indices = self.decomposition.indices
+        noeuds = list()
+        for u, v in candidats:
+            if indices is not None:
+                u, v = indices[u], indices[v]
+            noeuds.append((self.noeud[u], self.noeud[v]) if u != v else (-1, -1))
+
+        # seules les paires de nœuds d'un même arbre demandent un ancêtre commun
+        valides = [k for k, (a, b) in enumerate(noeuds) if a >= 0 and b >= 0 and self.racine[a] == self.racine[b]]
+        communs = self.ancetres_communs([noeuds[k] for k in valides])
+
+        res = [(0, 0)] * len(noeuds)
+        for k, l in zip(valides, communs):
+            a, b = noeuds[k]
+            # u et v dans un même bloc : le chemin ne contient que ce bloc et
+            # les nœuds de u et v s'ils sont des points d'articulation
+            longueur = self.profondeur[a] + self.profondeur[b] - 2 * self.profondeur[l]
+            if longueur <= (a >= self.nb_blocs) + (b >= self.nb_blocs):
+                continue
+            nb_ponts = self.cumul_ponts[a] + self.cumul_ponts[b] - 2 * self.cumul_ponts[l] + self.pont[l]
+            nb_coupures = self.cumul_coupures[a] + self.cumul_coupures[b] - 2 * self.cumul_coupures[l] \
+                + self.coupure[l] - self.coupure[a] - self.coupure[b]
+            res[k] = (nb_ponts, nb_coupures)
+        return res
+
+
+# Renvoie, pour chaque arête candidate (u, v) de la liste, le nombre de ponts et
+# le nombre de points d'articulation que son ajout au graphe supprimerait (voir
+# EvaluationCandidats, mémorisée par le graphe pour sa version actuelle).
+def evaluer_candidats(graphe, candidats):
+    evaluation = graphe.memoriser('evaluation_candidats', lambda: EvaluationCandidats(graphe))
+    return evaluation.evaluer(candidats)
+
+
+# Simulation de pannes :
+#
+# Dans l'arbre d'exploration, le retrait d'un sommet x sépare de sa composante
+# chaque fils c tel que ancetre[c] >= debut[x] (aucune arête ne remonte du
+# sous-arbre de c au-dessus de x) ; les autres fils restent reliés au parent de
+# x. Pour une racine, chaque fils forme une composante. Le retrait d'une arête
+# ne change les composantes que pour un pont : son sous-arbre est alors coupé
+# du reste. Les tailles des sous-arbres suffisent donc pour répondre pour tous
+# les sommets et toutes les arêtes en un seul parcours.
+
+# Renvoie le nombre de sommets du sous-arbre d'exploration de chaque sommet et
+# la racine de son arbre d'exploration (la taille de l'arbre de la racine est
+# celle de la composante connexe).
+@memorise
+def tailles_sous_arbres(graphe):
+    debut, parent, ancetre = numerotations(graphe)
+    ordre = ordre_exploration(debut)
+    taille = init_dict(ordre, 1)
+    racine = dict()
+
+    for u in ordre:
+        racine[u] = u if parent[u] is None else racine[parent[u]]
+    # ordre inverse : chaque sous-arbre est complet avant d'être ajouté au parent
+    for u in reversed(ordre):
+        if parent[u] is not None:
+            taille[parent[u]] += taille[u]
+
+    return taille, racine
+
+
+# Renvoie pour chaque sommet les tailles (par ordre décroissant) des morceaux
+# de sa composante connexe après sa panne.
+@memorise
+def pannes_sommets(graphe):
+    debut, parent, ancetre = numerotations(graphe)
+    taille, racine = tailles_sous_arbres(graphe)
+    separes = init_dict(graphe.sommets(), None)
+    for u in separes:
+        separes[u] = list()
+
+    # les fils séparés de leur parent par sa panne
+    for u in graphe.sommets():
+        p = parent[u]
+        if p is not None and (parent[p] is None or ancetre[u] >= debut[p]):
+            separes[p].append(taille[u])
+
+    res = dict()
+    for u in graphe.sommets():
+        reste = taille[racine[u]] - 1 - sum(separes[u])
+        morceaux = separes[u] + [reste] if reste > 0 else separes[u]
+        res[u] = tuple(sorted(morceaux, reverse=True))
+    return res
+
+
+# Renvoie pour chaque arête (u, v, ligne) les tailles (par ordre décroissant)
+# des morceaux de sa composante connexe après sa panne. Deux stations reliées
+# par plusieurs lignes le restent si l'une d'elles tombe en panne.
+@memorise
+def pannes_aretes(graphe):
+    debut, parent, ancetre = numerotations(graphe)
+    taille, racine = tailles_sous_arbres(graphe)
+    multiplicite = dict()
+    for u, v, ligne in graphe.aretes():
+        multiplicite[(u, v)] = multiplicite.get((u, v), 0) + 1
+
+    res = dict()
+    for u, v, ligne in graphe.aretes():
+        total = taille[racine[u]]
+        if u == v:
+            res[(u, v, ligne)] = (total,)
+            continue
+        fils = v if parent[v] == u else u if parent[u] == v else None
+        if fils is not None and ancetre[fils] > debut[parent[fils]] and multiplicite[(u, v)] == 1:
+            res[(u, v, ligne)] = tuple(sorted((taille[fils], total - taille[fils]), reverse=True))
+        else:
+            res[(u, v, ligne)] = (total,)
+    return res
+
+
+# renvoie le nombre de stations coupées du plus grand morceau restant
+def stations_perdues(morceaux):
+    return sum(morceaux) - max(morceaux, default=0)
+
+
+# voisins du graphe étudié, transmis une seule fois à chaque processus
+VOISINS_PANNES = dict()
+
+
+def initialiser_pannes(voisins):
+    VOISINS_PANNES.clear()
+    VOISINS_PANNES.update(voisins)
+
+
+# Renvoie, pour chaque combinaison de stations en panne, les tailles des
+# morceaux des composantes qui les contenaient. Chaque morceau contient un
+# voisin d'une station en panne : un parcours depuis ces voisins suffit.
+def evaluer_pannes(combinaisons):
+    res = list()
+    for combinaison in combinaisons:
+        retires = set(combinaison)
+        vus = set(retires)
+        morceaux = list()
+        for x in combinaison:
+            for depart in VOISINS_PANNES[x]:
+                if depart in vus:
+                    continue
+                vus.add(depart)
+                pile = [depart]
+                nb = 0
+                while pile:
+                    u = pile.pop()
+                    nb += 1
+                    for v in VOISINS_PANNES[u]:
+                        if v not in vus:
+                            vus.add(v)
+                            pile.append(v)
+                morceaux.append(nb)
+        res.append((combinaison, tuple(sorted(morceaux, reverse=True))))
+    return res
+
+
+# Simule la panne simultanée de k stations prises parmi les candidates (toutes
+# les stations par défaut), pour toutes les combinaisons possibles. Avec
+# processus > 1, les combinaisons sont réparties par paquets entre plusieurs
+# processus. Renvoie la liste des couples (combinaison, morceaux).
+def pannes_multiples(graphe, k, candidates=None, processus=1, paquet=1000):
+    if candidates is None:
+        candidates = sorted(graphe.sommets())
+    voisins = {u: frozenset(v for v, __not_used__ in graphe.voisins(u)) for u in graphe.sommets()}
+    combinaisons = itertools.combinations(candidates, k)
+    paquets = iter(lambda: list(itertools.islice(combinaisons, paquet)), [])
+
+    res = list()
+    if processus > 1:
+        with groupe_processus(processus, initializer=initialiser_pannes,
+                              initargs=(voisins,)) as executeur:
+            for resultats in executeur.map(evaluer_pannes, paquets):
+                res.extend(resultats)
+    else:
+        initialiser_pannes(voisins)
+        for combinaisons_paquet in paquets:
+            res.extend(evaluer_pannes(combinaisons_paquet))
+    return res
+
+
+# Écrit le rapport des pannes au format CSV (dans le fichier donné, ou sur la
+# sortie standard pour '-'), trié par nombre de stations perdues décroissant.
+# Pour k = 1 : une ligne par station et une par connexion ; sinon une ligne par
+# combinaison de k stations.
+def rapport_pannes(reseau, fichier, k=1, processus=1):
+    lignes = list()
+    if k == 1:
+        for u, morceaux in pannes_sommets(reseau).items():
+            lignes.append(('station', str(reseau.identifiant(u)), reseau.nom_sommet(u), morceaux))
+        for (u, v, ligne), morceaux in pannes_aretes(reseau).items():
+            lignes.append(('connexion', '{}-{}'.format(reseau.identifiant(u), reseau.identifiant(v)),
+                           '{} -- {} ({})'.format(reseau.nom_sommet(u), reseau.nom_sommet(v), ligne), morceaux))
+    else:
+        for combinaison, morceaux in pannes_multiples(reseau, k, processus=processus):
+            lignes.append(('stations', '+'.join(str(reseau.identifiant(u)) for u in combinaison),
+                           ' + '.join(reseau.nom_sommet(u) for u in combinaison), morceaux))
+    lignes.sort(key=lambda ligne: (-stations_perdues(ligne[3]), ligne[0], ligne[2]))
+
+    my_file = sys.stdout if fichier == '-' else open(fichier, 'w', encoding='utf-8', newline='')
+    try:
+        ecrivain = csv.writer(my_file)
+        ecrivain.writerow(('type', 'element', 'nom', 'composantes', 'stations_perdues', 'tailles'))
+        for genre, element, nom, morceaux in lignes:
+            ecrivain.writerow((genre, element, nom, len(morceaux), stations_perdues(morceaux),
+                               ' '.join(str(t) for t in morceaux)))
+    finally:
+        if my_file is not sys.stdout:
+            my_file.close()
+
+
+# Analyse parallèle par composante connexe :
+#
+# Les ponts, les points d'articulation et les améliorations d'un graphe ne
+# dépendent que de chacune de ses composantes connexes, analysées de façon
+# indépendante. Les composantes sont numérotées par un parcours des tableaux
+# du graphe compact, puis réparties en paquets de tailles voisines (les plus
+# grosses d'abord, chacune dans le paquet le moins chargé). Chaque paquet est
+# transmis à un processus sous la forme d'un sous-graphe compact, dont les
+# sommets gardent l'ordre de leurs identifiants : les parcours y visitent les
+# sommets dans le même ordre que sur le graphe entier, et les ponts et points
+# d'articulation obtenus sont exactement ceux de ponts() et
+# points_articulation().
+
+# Renvoie les paquets de sommets (listes croissantes de numéros du graphe
+# compact), chacun formé de composantes connexes entières.
+def paquets_composantes(compact, nb_paquets):
+    numeros, nb_composantes = compact.numeros_composantes()
+    membres = [list() for __not_used__ in range(nb_composantes)]
+    for u in range(len(numeros)):
+        membres[numeros[u]].append(u)
+
+    paquets = [list() for __not_used__ in range(max(1, min(nb_paquets, nb_composantes)))]
+    charges = [(0, i) for i in range(len(paquets))]
+    for composante in sorted(membres, key=len, reverse=True):
+        charge, i = heapq.heappop(charges)
+        paquets[i].extend(composante)
+        heapq.heappush(charges, (charge + len(composante), i))
+    return [sorted(paquet) for paquet in paquets if paquet]
+
+
+# Analyse un sous-graphe compact (dans un processus) : renvoie ses ponts, ses
+# points d'articulation et les arêtes des deux améliorations, désignés par les
+# identifiants des stations.
+def analyser_paquet(sous):
+    ident = sous.identifiant
+    return (
+        [(ident(u), ident(v)) for u, v in ponts(sous)],
+        [ident(u) for u in points_articulation(sous)],
+        [(ident(u), ident(v)) for u, v in amelioration_ponts(sous)],
+        [(ident(u), ident(v)) for u, v in amelioration_points_articulation(sous)],
+    )
+
+
+# Renvoie les ponts, les points d'articulation et les arêtes des améliorations
+# du graphe (dictionnaire indexé par le nom de chaque analyse), calculés par
+# composante connexe, en parallèle si processus > 1. Les ponts et les points
+# d'articulation sont mémorisés par le graphe, comme s'ils avaient été
+# calculés par ponts() et points_articulation().
+def analyse_par_composantes(graphe, processus=1, paquets_par_processus=4):
+    compact = graphe if isinstance(graphe, GrapheCompact) else graphe.figer()
+    sous_graphes = [compact.sous_graphe(paquet) for paquet in paquets_composantes(compact, processus * paquets_par_processus)]
+    if processus > 1 and len(sous_graphes) > 1:
+        with groupe_processus(processus) as executeur:
+            resultats = list(executeur.map(analyser_paquet, sous_graphes))
+    else:
+        resultats = [analyser_paquet(sous) for sous in sous_graphes]
+
+    # retour aux sommets du graphe : identifiants, ou numéros du graphe compact
+    sommet = compact.indices.__getitem__ if compact is graphe else (lambda u: u)
+    res = {'ponts': set(), 'points_articulation': set(),
+           'amelioration_ponts': set(), 'amelioration_points_articulation': set()}
+    for resultat in resultats:
+        for nom, elements in zip(('ponts', 'points_articulation', 'amelioration_ponts',
+                                  'amelioration_points_articulation'), resultat):
+            if nom == 'points_articulation':
+                res[nom].update(sommet(u) for u in elements)
+            else:
+                res[nom].update((sommet(u), sommet(v)) for u, v in elements)
+
+    res['ponts'] = graphe.memoriser('ponts', lambda: frozenset(res['ponts']))
+    res['points_articulation'] = graphe.memoriser('points_articulation', lambda: frozenset(res['points_articulation']))
+    return res
+
+
+# Criticité des stations et des connexions (centralité d'intermédiarité) :
+#
+# La criticité d'une station x est la somme, sur les paires de stations {s, t}
+# distinctes de x, de la proportion des plus courts chemins (en nombre de
+# connexions) de s à t qui passent par x ; celle d'une connexion est définie
+# de la même façon. Contrairement aux ponts et aux points d'articulation, elle
+# classe aussi les stations d'un réseau bien maillé.
+#
+# Algorithme de Brandes : un parcours en largeur depuis chaque source s compte
+# les plus courts chemins sigma[v] de s à chaque sommet v, puis les sommets
+# sont repris par distance décroissante pour accumuler la dépendance de s
+# envers chacun d'eux :
+#     delta[v] = somme, sur les successeurs w de v, de sigma[v] / sigma[w] * (1 + delta[w])
+# chaque terme étant aussi la part de la connexion {v, w}. Chaque paire étant
+# vue depuis ses deux extrémités, les sommes sont divisées par deux. Le coût
+# est d'un parcours par source, O(n * m) en tout.
+#
+# Pour un grand réseau, les parcours peuvent ne partir que de k sources (pivots)
+# tirées au hasard, les sommes étant multipliées par n / k : c'est une
+# estimation sans biais de la criticité. Les sources sont réparties par paquets
+# entre plusieurs processus si processus > 1.
+#
+# Deux stations reliées par plusieurs lignes ne forment qu'une connexion, et les
+# boucles sont ignorées.
+
+# adjacence simple du graphe étudié, transmise une seule fois à chaque processus
+ADJACENCE_CRITICITE = dict()
+
+
+def initialiser_criticite(debuts, cibles):
+    ADJACENCE_CRITICITE['debuts'] = debuts
+    ADJACENCE_CRITICITE['cibles'] = cibles
+
+
+# Renvoie l'adjacence au format CSR du graphe compact, sans arêtes multiples ni
+# boucles, les voisins de chaque sommet étant rangés par numéro croissant.
+def adjacence_simple(compact):
+    debuts, cibles = array('q', [0]), array('i')
+    for u in compact.sommets():
+        cibles.extend(sorted({v for v in compact.voisins_indices(u) if v != u}))
+        debuts.append(len(cibles))
+    return debuts, cibles
+
+
+# Parcours de Brandes depuis chaque source du paquet, sur l'adjacence transmise
+# par initialiser_criticite(). Renvoie les dépendances cumulées de chaque
+# sommet et de chaque case du tableau cibles (la case k, de w vers son voisin
+# v, reçoit la part de la connexion {v, w} quand v précède w dans un parcours).
+def brandes_sources(sources):
+    debuts, cibles = ADJACENCE_CRITICITE['debuts'], ADJACENCE_CRITICITE['cibles']
+    n = len(debuts) - 1
+    cumul_sommets = array('d', [0.0]) * n
+    cumul_cases = array('d', [0.0]) * len(cibles)
+    dist = array('i', [-1]) * n
+    sigma = array('d', [0.0]) * n
+    delta = array('d', [0.0]) * n
+
+    for s in sources:
+        dist[s] = 0
+        sigma[s] = 1.0
+        ordre = [s]
+        # la liste s'allonge pendant qu'on la parcourt : c'est la file du parcours
+        for u in ordre:
+            du = dist[u] + 1
+            for k in range(debuts[u], debuts[u + 1]):
+                v = cibles[k]
+                if dist[v] < 0:
+                    dist[v] = du
+                    ordre.append(v)
+                if dist[v] == du:
+                    sigma[v] += sigma[u]
+
+        for w in reversed(ordre):
+            dw = dist[w] - 1
+            coef = (1.0 + delta[w]) / sigma[w]
+            for k in range(debuts[w], debuts[w + 1]):
+                v = cibles[k]
+                if dist[v] == dw:
+                    part = sigma[v] * coef
+                    cumul_cases[k] += part
+                    delta[v] += part
+            if w != s:
+                cumul_sommets[w] += delta[w]
+
+        # seuls les sommets atteints sont remis à zéro
+        for w in ordre:
+            dist[w] = -1
+            sigma[w] = 0.0
+            delta[w] = 0.0
+    return cumul_sommets, cumul_cases
+
+
+# Renvoie la criticité de chaque sommet et de chaque connexion (u, v) du graphe,
+# désignée par ses extrémités dans l'ordre de leurs identifiants. Avec pivots,
+# l'estimation ne fait de parcours que depuis ce nombre de sources tirées au
+# hasard (graine donnée pour un tirage reproductible). Le résultat est mémorisé
+# par le graphe, sauf pour un tirage sans graine.
+def criticite(graphe, pivots=None, graine=None, processus=1, paquets_par_processus=4):
+    if pivots is not None and graine is None:
+        return calculer_criticite(graphe, pivots, graine, processus, paquets_par_processus)
+    return graphe.memoriser(('criticite', pivots, graine),
+                            lambda: calculer_criticite(graphe, pivots, graine, processus, paquets_par_processus))
+
+
+def calculer_criticite(graphe, pivots, graine, processus, paquets_par_processus):
+    compact = graphe if isinstance(graphe, GrapheCompact) else graphe.figer()
+    n = compact.nombre_sommets()
+    debuts, cibles = adjacence_simple(compact)
+
+    if pivots is None or pivots >= n:
+        sources = list(range(n))
+    else:
+        sources = sorted(random.Random(graine).sample(range(n), pivots))
+    nb_paquets = max(1, min(len(sources), processus * paquets_par_processus))
+    paquets = [sources[i::nb_paquets] for i in range(nb_paquets)]
+
+    if processus > 1 and nb_paquets > 1:
+        with groupe_processus(processus, initializer=initialiser_criticite,
+                              initargs=(debuts, cibles)) as executeur:
+            resultats = list(executeur.map(brandes_sources, paquets))
+    else:
+        initialiser_criticite(debuts, cibles)
+        resultats = [brandes_sources(paquet) for paquet in paquets]
+
+    cumul_sommets = array('d', [0.0]) * n
+    cumul_cases = array('d', [0.0]) * len(cibles)
+    for sommets_paquet, cases_paquet in resultats:
+        for u in range(n):
+            cumul_sommets[u] += sommets_paquet[u]
+        for k in range(len(cibles)):
+            cumul_cases[k] += cases_paquet[k]
+
+    # chaque paire est vue depuis ses deux extrémités ; un échantillon de
+    # sources est extrapolé à toutes les sources
+    facteur = 0.5 * n / len(sources) if sources else 0.0
+    sommet = compact.identifiants.__getitem__ if compact is not graphe else (lambda u: u)
+    res_sommets = {sommet(u): cumul_sommets[u] * facteur for u in range(n)}
+    res_aretes = dict()
+    for u in range(n):
+        for k in range(debuts[u], debuts[u + 1]):
+            v = cibles[k]
+            cle = (sommet(min(u, v)), sommet(max(u, v)))
+            res_aretes[cle] = res_aretes.get(cle, 0.0) + cumul_cases[k] * facteur
+    return res_sommets, res_aretes
+
+
+# Renvoie les k sommets (puis les k connexions) de plus grande criticité, avec
+# leur criticité, par criticité décroissante.
+def plus_critiques(graphe, k, pivots=None, graine=None, processus=1):
+    crit_sommets, crit_aretes = criticite(graphe, pivots, graine, processus)
+    cle = lambda element: (-element[1], repr(element[0]))
+    return sorted(crit_sommets.items(), key=cle)[:k], sorted(crit_aretes.items(), key=cle)[:k]
+
+
 # Fonctions gérant toutes les options du programme :
 
-def option_metro(reseau, args):
-    affichage = list()
+def option_metro(reseau, args, cache=False, processus=1):
+    charger_fichiers(reseau, fichiers_lignes('METRO_', args), processus, cache)
 
     if len(args) > 0:
-        lst_metro = args
-        for line in lst_metro:
-            file = 'METRO_' + line + '.txt'
-            charger_donnees(reseau, file)
-            affichage.append(line)
-        print('Chargement des lignes', affichage, 'de metro ... terminé.')
-
+        print('Chargement des lignes', args, 'de metro ... terminé.')
     else:
-        files = os.listdir('.')
-        for name in files:
-            if 'METRO_' in name:
-                charger_donnees(reseau, name)
         print('Chargement de toutes les lignes de metro ... terminé.')
 
-def option_rer(reseau, args):
-    affichage = list()
+def option_rer(reseau, args, cache=False, processus=1):
+    affichage = [line.upper() for line in args]
+    charger_fichiers(reseau, fichiers_lignes('RER_', affichage), processus, cache)
 
     if len(args) > 0:
-        lst_rer = args
-        for line in lst_rer:
-            file = 'RER_' + line.upper() + '.txt'
-            charger_donnees(reseau, file)
-            affichage.append(line.upper())
         print('Chargement des lignes', affichage, 'de rer ... terminé.')
-
     else:
-        files = os.listdir('.')
-        for name in files:
-            if 'RER_' in name:
-                charger_donnees(reseau, name)
         print('Chargement de toutes les lignes de rer ... terminé.')
 
+def option_donnees(reseau, motifs, cache=False, processus=1):
+    fichiers = list()
+    for motif in motifs:
+        fichiers.extend(trouver_fichiers(motif))
+    charger_fichiers(reseau, fichiers, processus, cache)
+    print('Chargement de', len(fichiers), 'fichiers de données ... terminé.')
+
+# Renvoie la vue du réseau restreint aux lignes données (voir VueLignes).
+# Les noms des lignes sont ceux des fichiers de données, qui distinguent les
+# majuscules (METRO_3b) : un nom absent du réseau est remplacé par celui d'une
+# ligne du réseau qui ne s'en distingue que par la casse.
+def option_lignes(reseau, lignes):
+    connues = reseau.lignes()
+    casse = {line.upper(): line for line in connues if isinstance(line, str)}
+    lignes = [line if line in connues else casse.get(line.upper(), line) for line in lignes]
+    inconnues = [line for line in lignes if line not in connues]
+    if inconnues:
+        print('Lignes absentes du réseau chargé :', inconnues)
+    print('Analyse restreinte aux lignes', lignes)
+    return reseau.vue_lignes(lignes)
+
+def option_aretes(fichiers, dossier=None):
+    reseau = GrapheFlux(fichiers, dossier)
+    print('Lecture en flux de', len(fichiers), 'fichiers d\'arêtes ... terminée.')
+    return reseau
+
+# sans noms de stations, les ponts et les points d'articulation d'un graphe
+# lu en flux sont désignés par leurs identifiants
+def option_ponts_flux(reseau):
+    ens_ponts = ponts_flux(reseau)
+    print('\nLe réseau contient les', len(ens_ponts), 'ponts suivants:')
+    for u, v in sorted(ens_ponts):
+        print('\t-', u, '--', v)
+
+def option_articulations_flux(reseau):
+    ens_artic = points_articulation_flux(reseau)
+    print('\nLe réseau contient les', len(ens_artic), 'points d\'articulation suivants:')
+    for i, u in enumerate(sorted(ens_artic), 1):
+        print('\t' + str(i), ':', u)
+
 def option_liste_stations(reseau):
     print('\nLe réseau contient les', reseau.nombre_sommets(), 'stations suivantes:')
     affichage = set()
     for ident in reseau.sommets():
-        affichage.add((reseau.nom_sommet(ident), ident))
+        affichage.add((reseau.nom_sommet(ident), reseau.identifiant(ident)))
     for st in sorted(affichage):
         print('\t-', st[0], '(' + str(st[1]) + ')')
 
@@ -390,16 +1637,174 @@ def option_articulations(reseau):
         print('\t' + str(i), ':', st)
         i += 1
 
-def option_ameliorer_articulations(reseau):
-    aretes_amelioration = amelioration_points_articulation(reseau)
+def option_ameliorer_articulations(reseau, aretes_amelioration=None):
+    if aretes_amelioration is None:
+        aretes_amelioration = amelioration_points_articulation(reseau)
     print('\nOn peut éliminer tous les points d\'articulation du réseau en rajoutant les', len(aretes_amelioration), 'arêtes suivantes:')
     afficher_ameliorations(reseau, aretes_amelioration)
 
-def option_ameliorer_ponts(reseau):
-    aretes_amelioration = amelioration_ponts(reseau)
-    print('\nOn peut éliminer tous les ponts du réseau en rajoutant les', len(aretes_amelioration), 'arêtes suivantes:')
+def option_ameliorer_ponts(reseau, aretes_amelioration=None):
+    if aretes_amelioration is None:
+        aretes_amelioration = amelioration_ponts(reseau)
+    isoles = ponts_isoles(reseau)
+    if isoles:
+        print('\nLes', len(isoles), 'ponts suivants relient deux stations sans autre connexion et ne peuvent pas être éliminés:')
+        for u, v in sorted(isoles):
+            print('\t-', reseau.nom_sommet(u), '--', reseau.nom_sommet(v))
+    autres = ' autres' if isoles else ''
+    print('\nOn peut éliminer tous les' + autres, 'ponts du réseau en rajoutant les', len(aretes_amelioration), 'arêtes suivantes:')
     afficher_ameliorations(reseau, aretes_amelioration)
 
+def option_par_composantes(reseau, processus=1):
+    analyses = analyse_par_composantes(reseau, processus)
+    print('\nAnalyse des composantes connexes par', processus, 'processus ... terminée.')
+    return analyses
+
+def option_criticite(reseau, k, pivots=None, graine=None, processus=1):
+    stations, connexions = plus_critiques(reseau, k, pivots, graine, processus)
+    estimation = '' if pivots is None or pivots >= reseau.nombre_sommets() else ' (estimation sur ' + str(pivots) + ' sources)'
+    print('\nLes', len(stations), 'stations les plus critiques' + estimation + ':')
+    for i, (u, score) in enumerate(stations, 1):
+        print('\t' + str(i), ':', reseau.nom_sommet(u), '(' + str(reseau.identifiant(u)) + ')', '-', round(score, 1))
+    print('\nLes', len(connexions), 'connexions les plus critiques' + estimation + ':')
+    for i, ((u, v), score) in enumerate(connexions, 1):
+        print('\t' + str(i), ':', reseau.nom_sommet(u), '--', reseau.nom_sommet(v), '-', round(score, 1))
+
+# Écrit au format CSV, sur la sortie standard, l'évaluation des arêtes
+# candidates du fichier (une paire d'identifiants "u v" ou "u/v" par ligne),
+# triées par nombre de ponts puis de points d'articulation supprimés.
+def option_candidats(reseau, fichier):
+    candidats, inconnus = list(), 0
+    for paquet in paquets_aretes(fichier):
+        for k in range(0, len(paquet), 2):
+            try:
+                candidats.append((reseau.indice(paquet[k]), reseau.indice(paquet[k + 1])))
+            except KeyError:
+                inconnus += 1
+    if inconnus:
+        print('\n' + str(inconnus), 'candidates ignorées (stations inconnues).', file=sys.stderr)
+
+    lignes = sorted(zip(candidats, evaluer_candidats(reseau, candidats)), key=lambda ligne: (-ligne[1][0], -ligne[1][1]))
+    ecrivain = csv.writer(sys.stdout)
+    ecrivain.writerow(('u', 'v', 'nom', 'ponts_supprimes', 'articulations_supprimees'))
+    for (u, v), (nb_ponts, nb_articulations) in lignes:
+        ecrivain.writerow((reseau.identifiant(u), reseau.identifiant(v),
+                           '{} -- {}'.format(reseau.nom_sommet(u), reseau.nom_sommet(v)), nb_ponts, nb_articulations))
+
+def option_pannes(reseau, fichier, k=1, processus=1):
+    if fichier != '-':
+        print('\nÉcriture du rapport des pannes dans', fichier, '...')
+    rapport_pannes(reseau, fichier, k, processus)
+
+# renvoie les stations désignées par un identifiant ou par un nom
+def trouver_stations(reseau, texte):
+    if texte.isdigit():
+        try:
+            return [reseau.indice(int(texte))]
+        except KeyError:
+            pass
+    return sorted(u for u in reseau.sommets() if (reseau.nom_sommet(u) or '').lower() == texte.lower())
+
+def option_trajet(reseau, depart, arrivee, penalite=PENALITE_CORRESPONDANCE):
+    departs, arrivees = trouver_stations(reseau, depart), trouver_stations(reseau, arrivee)
+    for texte, stations in ((depart, departs), (arrivee, arrivees)):
+        if len(stations) == 0:
+            print('\nStation inconnue :', texte)
+            return
+
+    # une station peut avoir plusieurs identifiants (un par ligne) : on garde
+    # le meilleur trajet entre toutes les possibilités
+    index = index_reperes(reseau, penalite)
+    duree, etapes = None, []
+    for u in departs:
+        for v in arrivees:
+            d, e = index.trajet(u, v)
+            if d is not None and (duree is None or d < duree):
+                duree, etapes = d, e
+
+    if duree is None:
+        print('\nAucun trajet ne relie', depart, 'à', arrivee + '.')
+        return
+    print('\nTrajet de', depart, 'à', arrivee, ':', int(duree // 60), 'min', int(duree % 60), 's')
+    # une ligne d'affichage par tronçon parcouru sur une même ligne
+    debut = 0
+    for i in range(1, len(etapes) + 1):
+        if i == len(etapes) or etapes[i][1] != etapes[debut][1]:
+            if i - 1 > debut:
+                print('\t-', etapes[debut][1], ':', reseau.nom_sommet(etapes[debut][0]), '->',
+                      reseau.nom_sommet(etapes[i - 1][0]))
+            debut = i
+
+def afficher_metriques(titre, metriques):
+    print('\t' + titre, ': distance moyenne', round(metriques['distance_moyenne'], 2),
+          '- diamètre', metriques['diametre'], '- rayon', metriques['rayon'])
+
+def option_distances(reseau, fichier):
+    # la matrice enregistrée lors d'une exécution précédente est réutilisée
+    # si elle correspond aux stations et aux connexions du réseau
+    donnees = charger_distances(fichier, reseau) if fichier != '-' else None
+    if donnees is None:
+        donnees = distances_sauts(reseau, None if fichier == '-' else fichier)
+    avant = metriques_distances(donnees[0])
+
+    complete = Graphe()
+    complete.ajouter_aretes(reseau.aretes())
+    complete.ajouter_aretes((u, v, None) for u, v in amelioration_ponts(reseau))
+    apres = metriques_distances(distances_sauts(complete)[0])
+
+    print('\nDistances en nombre de connexions entre les stations reliées:')
+    afficher_metriques('réseau actuel', avant)
+    afficher_metriques('après élimination des ponts', apres)
+
+def option_enregistrer(reseau, fichier):
+    # les analyses sont calculées (ou reprises du cache) pour être enregistrées
+    numerotations(reseau), ponts(reseau), points_articulation(reseau)
+    enregistrer_instantane(reseau, fichier)
+    print('\nInstantané du réseau enregistré dans', fichier + '.')
+
+# options dont les sorties sont enregistrées dans le cache des résultats, dans
+# l'ordre de leur affichage
+OPTIONS_RESULTATS = ('stations', 'par_composantes', 'ponts', 'articulations', 'am_ponts', 'am_artic')
+
+# renvoie les fichiers de données demandés, dans l'ordre de leur chargement
+def fichiers_demandes(args):
+    fichiers = list()
+    if args.metro != None:
+        fichiers.extend(fichiers_lignes('METRO_', args.metro))
+    if args.rer != None:
+        fichiers.extend(fichiers_lignes('RER_', [line.upper() for line in args.rer]))
+    if args.donnees != None:
+        for motif in args.donnees:
+            fichiers.extend(trouver_fichiers(motif))
+    return fichiers
+
+# renvoie les options demandées dont les sorties sont enregistrées
+def options_resultats(args):
+    analyses = args.ponts or args.articulations or args.am_ponts or args.am_artic
+    return [nom for nom in OPTIONS_RESULTATS if getattr(args, nom) and (nom != 'par_composantes' or analyses)]
+
+# Renvoie le cache des résultats et la clé de l'exécution demandée. Le cache
+# est inactif s'il n'est pas demandé, si le réseau ne vient pas de fichiers
+# de données, ou si une autre option que celles de OPTIONS_RESULTATS est
+# demandée (un fichier introuvable provoquera l'erreur habituelle au
+# chargement).
+def option_cache_resultats(args):
+    autres = (args.instantane, args.aretes, args.pannes, args.criticite, args.candidats,
+              args.distances, args.trajet, args.enregistrer, args.profil)
+    actif = args.cache_resultats != None and all(option is None for option in autres) \
+        and (args.metro != None or args.rer != None or args.donnees != None)
+    cle = None
+    if actif:
+        parametres = [args.metro, args.rer, args.donnees, args.lignes,
+                      args.processus if args.par_composantes else None]
+        try:
+            cle = cle_resultats(fichiers_demandes(args), parametres)
+        except OSError:
+            actif = False
+    resultats = CacheResultats(args.cache_resultats, int(args.cache_taille * 1024 * 1024),
+                               args.cache_age * 24 * 3600, actif)
+    return resultats, cle
+
 def afficher_ameliorations(reseau, ameliorations):
     affichage = set()
     for u, v in ameliorations:
@@ -424,6 +1829,51 @@ def args_options(reseau):
                         metavar='RER',
                         dest='rer')
 
+    parser.add_argument('--donnees',
+                        help='charge les fichiers de données d\'un dossier ou correspondant à un motif',
+                        nargs='+',
+                        metavar='MOTIF',
+                        dest='donnees')
+
+    parser.add_argument('--processus',
+                        help='nombre de processus lisant les fichiers de données, simulant les pannes ou analysant les composantes (--par-composantes) en parallèle',
+                        type=int,
+                        default=1,
+                        metavar='N',
+                        dest='processus')
+
+    parser.add_argument('--cache',
+                        help='utilise (et crée si besoin) un cache binaire à côté de chaque fichier de données',
+                        action='store_true',
+                        dest='cache')
+
+    parser.add_argument('--aretes',
+                        help='lit en flux des listes d\'arêtes "u v" (texte ou gzip) dans des tableaux, sans construire de graphe Python ; seules --ponts et --articulations s\'appliquent',
+                        nargs='+',
+                        metavar='FICHIER',
+                        dest='aretes')
+
+    parser.add_argument('--stockage',
+                        help='avec --aretes, range les tableaux du graphe dans des fichiers temporaires de ce dossier, projetés en mémoire',
+                        metavar='DOSSIER',
+                        dest='stockage')
+
+    parser.add_argument('--instantane',
+                        help='charge le réseau depuis un instantané enregistré avec --enregistrer (au lieu des fichiers de données)',
+                        metavar='FICHIER',
+                        dest='instantane')
+
+    parser.add_argument('--enregistrer',
+                        help='enregistre le réseau chargé et ses analyses dans un instantané binaire',
+                        metavar='FICHIER',
+                        dest='enregistrer')
+
+    parser.add_argument('--lignes',
+                        help='restreint les analyses aux lignes données parmi celles chargées (exemple: --lignes METRO_1 RER_A)',
+                        nargs='+',
+                        metavar='LIGNE',
+                        dest='lignes')
+
     parser.add_argument('--liste-stations', '-ls',
                         help='affiche les stations du réseau triées par ordre alphabétique',
                         action='store_true',
@@ -449,37 +1899,223 @@ def args_options(reseau):
                         action='store_true',
                         dest='am_ponts')
 
+    parser.add_argument('--par-composantes',
+                        help='calcule ponts, points d\'articulation et améliorations composante connexe par composante, réparties entre les processus (--processus)',
+                        action='store_true',
+                        dest='par_composantes')
+
+    parser.add_argument('--criticite',
+                        help='affiche les K stations et les K connexions les plus critiques : celles par lesquelles passent le plus de plus courts chemins (réparties entre les processus)',
+                        type=int,
+                        metavar='K',
+                        dest='criticite')
+
+    parser.add_argument('--pivots',
+                        help='estime la criticité à partir de plus courts chemins issus de N stations tirées au hasard (grands réseaux)',
+                        type=int,
+                        metavar='N',
+                        dest='pivots')
+
+    parser.add_argument('--graine',
+                        help='graine du tirage des stations de --pivots (résultat reproductible)',
+                        type=int,
+                        metavar='GRAINE',
+                        dest='graine')
+
+    parser.add_argument('--candidats',
+                        help='écrit au format CSV le nombre de ponts et de points d\'articulation que supprimerait chaque arête candidate du fichier (une paire d\'identifiants par ligne)',
+                        metavar='FICHIER',
+                        dest='candidats')
+
+    parser.add_argument('--pannes',
+                        help='écrit au format CSV (sur la sortie standard par défaut) les stations perdues lors de la panne de chaque station et de chaque connexion',
+                        nargs='?',
+                        const='-',
+                        metavar='FICHIER',
+                        dest='pannes')
+
+    parser.add_argument('--pannes-simultanees',
+                        help='nombre de stations en panne simultanément dans le rapport des pannes (toutes les combinaisons, réparties entre les processus)',
+                        type=int,
+                        default=1,
+                        metavar='K',
+                        dest='pannes_k')
+
+    parser.add_argument('--distances',
+                        help='affiche la distance moyenne, le diamètre et le rayon du réseau, avant et après élimination des ponts ; la matrice des distances est enregistrée (et relue) dans le fichier .npy donné (nécessite NumPy et SciPy)',
+                        nargs='?',
+                        const='-',
+                        metavar='FICHIER',
+                        dest='distances')
+
+    parser.add_argument('--trajet',
+                        help='affiche le trajet le plus court entre deux stations (identifiants ou noms)',
+                        nargs=2,
+                        metavar=('DEPART', 'ARRIVEE'),
+                        dest='trajet')
+
+    parser.add_argument('--penalite',
+                        help='durée (en secondes) ajoutée à chaque changement de ligne',
+                        type=float,
+                        default=PENALITE_CORRESPONDANCE,
+                        metavar='SECONDES',
+                        dest='penalite')
+
+    parser.add_argument('--cache-resultats',
+                        help='réaffiche sans recharger le réseau les stations, ponts, points d\'articulation et améliorations déjà calculés pour les mêmes fichiers de données (identifiés par leur contenu), enregistrés dans le dossier donné',
+                        nargs='?',
+                        const=DOSSIER_RESULTATS,
+                        metavar='DOSSIER',
+                        dest='cache_resultats')
+
+    parser.add_argument('--cache-taille',
+                        help='taille maximale (en Mio) du cache des résultats, dont les entrées les moins récemment utilisées sont supprimées',
+                        type=float,
+                        default=TAILLE_MAX_RESULTATS / (1024 * 1024),
+                        metavar='MIO',
+                        dest='cache_taille')
+
+    parser.add_argument('--cache-age',
+                        help='durée (en jours) après laquelle une entrée inutilisée du cache des résultats est supprimée',
+                        type=float,
+                        default=AGE_MAX_RESULTATS / (24 * 3600),
+                        metavar='JOURS',
+                        dest='cache_age')
+
+    parser.add_argument('--profile', '--timings',
+                        help='affiche pour chaque étape la durée, le pic de mémoire et des compteurs d\'opérations, et les enregistre au format JSON dans le fichier donné',
+                        nargs='?',
+                        const='-',
+                        metavar='FICHIER',
+                        dest='profil')
+
     args = parser.parse_args()
+    if args.instantane != None and (args.metro != None or args.rer != None or args.donnees != None):
+        parser.error('--instantane remplace le chargement des fichiers de données')
+    if args.instantane != None and args.lignes != None:
+        parser.error('--lignes ne s\'applique pas à un instantané')
+    if args.aretes != None and (args.metro != None or args.rer != None or args.donnees != None or args.instantane != None):
+        parser.error('--aretes ne se combine pas avec les autres sources de données')
+
+    resultats, cle = option_cache_resultats(args)
+    if resultats.rejouer(cle, options_resultats(args)):
+        return
+
+    profileur = Profileur(actif=args.profil != None)
+
+    if args.instantane != None:
+        data_loaded = True
+        with profileur.etape('chargement instantane'):
+            try:
+                reseau = charger_instantane(args.instantane)
+            except (OSError, InstantaneInvalide) as erreur:
+                print('Impossible de lire l\'instantané', args.instantane, ':', erreur)
+                return
+
+    if args.aretes != None:
+        data_loaded = True
+        with profileur.etape('lecture en flux'):
+            reseau = option_aretes(args.aretes, args.stockage)
+
+    profileur.observer(reseau)
 
     if args.metro != None:
         data_loaded = True
-        option_metro(reseau, args.metro)
+        with profileur.etape('chargement metro'), resultats.capturer('entete'):
+            option_metro(reseau, args.metro, args.cache, args.processus)
 
     if args.rer != None:
         data_loaded = True
-        option_rer(reseau, args.rer)
+        with profileur.etape('chargement rer'), resultats.capturer('entete'):
+            option_rer(reseau, args.rer, args.cache, args.processus)
+
+    if args.donnees != None:
+        data_loaded = True
+        with profileur.etape('chargement donnees'), resultats.capturer('entete'):
+            option_donnees(reseau, args.donnees, args.cache, args.processus)
     
-    if data_loaded:
+    if data_loaded and args.lignes != None:
+        with resultats.capturer('entete'):
+            reseau = option_lignes(reseau, args.lignes)
+        profileur.terminer()
+        profileur.observer(reseau)
+
+    if data_loaded and isinstance(reseau, GrapheFlux):
         print('Le réseau contient', reseau.nombre_sommets(), 'sommets et', reseau.nombre_aretes(), 'arêtes.')
 
+        if args.ponts:
+            with profileur.etape('ponts'):
+                option_ponts_flux(reseau)
+
+        if args.articulations:
+            with profileur.etape('points d\'articulation'):
+                option_articulations_flux(reseau)
+
+    elif data_loaded:
+        with resultats.capturer('entete'):
+            print('Le réseau contient', reseau.nombre_sommets(), 'sommets et', reseau.nombre_aretes(), 'arêtes.')
+
         if args.stations:
-            option_liste_stations(reseau)
+            with profileur.etape('liste des stations'), resultats.capturer('stations'):
+                option_liste_stations(reseau)
+
+        analyses = dict()
+        if args.par_composantes and (args.ponts or args.articulations or args.am_ponts or args.am_artic):
+            with profileur.etape('analyse par composantes'), resultats.capturer('par_composantes'):
+                analyses = option_par_composantes(reseau, args.processus)
 
         if args.ponts:
-            option_ponts(reseau)
+            with profileur.etape('ponts'), resultats.capturer('ponts'):
+                option_ponts(reseau)
 
         if args.articulations:
-            option_articulations(reseau)
+            with profileur.etape('points d\'articulation'), resultats.capturer('articulations'):
+                option_articulations(reseau)
 
         if args.am_ponts:
-            option_ameliorer_ponts(reseau)
+            with profileur.etape('amélioration des ponts'), resultats.capturer('am_ponts'):
+                option_ameliorer_ponts(reseau, analyses.get('amelioration_ponts'))
 
         if args.am_artic:
-            option_ameliorer_articulations(reseau)
+            with profileur.etape('amélioration des articulations'), resultats.capturer('am_artic'):
+                option_ameliorer_articulations(reseau, analyses.get('amelioration_points_articulation'))
+
+        if args.criticite != None:
+            with profileur.etape('criticite'):
+                option_criticite(reseau, args.criticite, args.pivots, args.graine, args.processus)
+
+        if args.candidats != None:
+            with profileur.etape('candidats'):
+                option_candidats(reseau, args.candidats)
+
+        if args.pannes != None:
+            with profileur.etape('pannes'):
+                option_pannes(reseau, args.pannes, args.pannes_k, args.processus)
+
+        if args.distances != None:
+            with profileur.etape('distances'):
+                option_distances(reseau, args.distances)
+
+        if args.trajet != None:
+            with profileur.etape('trajet'):
+                option_trajet(reseau, args.trajet[0], args.trajet[1], args.penalite)
+
+        if args.enregistrer != None:
+            with profileur.etape('enregistrement'):
+                option_enregistrer(reseau, args.enregistrer)
+
+        resultats.enregistrer(cle)
 
     else:
         print('Aucun réseau n\'a été chargé.')
 
+    profileur.terminer()
+    if profileur.actif:
+        profileur.afficher()
+        if args.profil != '-':
+            profileur.ecrire_json(args.profil, sommets=reseau.nombre_sommets(), aretes=reseau.nombre_aretes(),
+                                  cache_analyses=reseau.statistiques_cache())
+
 
 
 def main():
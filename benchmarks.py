@@ -0,0 +1,1042 @@
+"""
+
+Mini-projet d'algo des graphes : renforcement d'un réseau
+Auteur : Gérald LIN
+
+Mesures de performances des algorithmes sur des graphes synthétiques.
+Utilisation : python benchmarks.py [BANC ...] [--tailles N ... | --echelle MAX]
+                                    [--json FICHIER] [--comparer ANCIEN]
+Exemple : python benchmarks.py suite --echelle 1000000 --json resultats.json
+
+"""
+
+from graphe import *
+from ameliorations import *
+from plus_courts_chemins import *
+from distances import *
+from serveur import *
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+# Générateurs de graphes synthétiques :
+
+# chemin 0 - 1 - ... - (n - 1) : profondeur d'exploration maximale
+def generer_chemin(n):
+    G = Graphe()
+    G.ajouter_sommets((i, None) for i in range(n))
+    G.ajouter_aretes((i, i + 1, 'CHEMIN') for i in range(n - 1))
+    return G
+
+
+# grille carrée d'environ n sommets
+def generer_grille(n):
+    cote = max(1, int(n ** 0.5))
+    G = Graphe()
+    G.ajouter_sommets((i, None) for i in range(cote * cote))
+    for i in range(cote):
+        for j in range(cote):
+            u = i * cote + j
+            if j + 1 < cote:
+                G.ajouter_arete(u, u + 1, 'GRILLE')
+            if i + 1 < cote:
+                G.ajouter_arete(u, u + cote, 'GRILLE')
+    return G
+
+
+# arbre binaire complet à n sommets : toutes les arêtes sont des ponts
+def generer_arbre(n):
+    G = Graphe()
+    G.ajouter_sommets((i, None) for i in range(n))
+    G.ajouter_aretes(((i - 1) // 2, i, 'ARBRE') for i in range(1, n))
+    return G
+
+
+# chapelet de triangles reliés par des ponts, chaque triangle portant en plus
+# une station terminus : environ n / 2 ponts et n / 4 composantes feuilles
+def generer_chapelet(n):
+    G = Graphe()
+    nb_triangles = max(1, n // 4)
+    G.ajouter_sommets((i, None) for i in range(4 * nb_triangles))
+    for t in range(nb_triangles):
+        a, b, c, d = 4 * t, 4 * t + 1, 4 * t + 2, 4 * t + 3
+        G.ajouter_aretes([(a, b, 'CHAPELET'), (b, c, 'CHAPELET'), (c, a, 'CHAPELET'), (c, d, 'CHAPELET')])
+        if t > 0:
+            G.ajouter_arete(a - 4, a, 'CHAPELET')
+    return G
+
+
+# Réseau de transport : de longues lignes, chacune partant d'une station d'une
+# ligne existante et croisant les autres lignes en des stations de
+# correspondance partagées (environ une station sur sept). Les durées de
+# parcours sont tirées entre 1 et 3 minutes. La graine rend le graphe
+# reproductible.
+def generer_reseau(n, graine=0):
+    alea = random.Random(graine)
+    longueur = max(5, int(n ** 0.5))
+    G = Graphe()
+    nb_stations, numero = 1, 0
+    G.ajouter_sommet((0, None))
+    while nb_stations < n:
+        numero += 1
+        ligne = 'L' + str(numero)
+        arrets = [alea.randrange(nb_stations)]
+        while len(arrets) < longueur and nb_stations < n:
+            if alea.random() < 0.15:
+                station = alea.randrange(nb_stations)
+                if station in arrets:
+                    continue
+            else:
+                station = nb_stations
+                nb_stations += 1
+                G.ajouter_sommet((station, None))
+            arrets.append(station)
+        G.ajouter_aretes_ponderees(
+            (arrets[i], arrets[i + 1], ligne, 60 * alea.randint(1, 3)) for i in range(len(arrets) - 1)
+        )
+    return G
+
+
+# Arbre de branches : un tronc, puis des branches de longueurs aléatoires
+# partant de stations déjà desservies (comme les antennes d'une ligne de RER).
+# Toutes les connexions sont des ponts et toute station desservant une
+# branche est un point d'articulation.
+def generer_ramifications(n, graine=0):
+    alea = random.Random(graine)
+    G = Graphe()
+    G.ajouter_sommet((0, None))
+    nb_stations, numero = 1, 0
+    while nb_stations < n:
+        numero += 1
+        precedente = alea.randrange(nb_stations)
+        for __not_used__ in range(min(n - nb_stations, alea.randint(3, 30))):
+            G.ajouter_arete(precedente, nb_stations, 'B' + str(numero), 60 * alea.randint(1, 3))
+            precedente = nb_stations
+            nb_stations += 1
+    return G
+
+
+# Archipel : nb_reseaux réseaux de transport indépendants (generer_reseau())
+# d'environ n / nb_reseaux stations chacun, soit autant de composantes
+# connexes, comme un choix de lignes sans correspondances entre elles.
+def generer_archipel(n, nb_reseaux=16, graine=0):
+    G = Graphe()
+    taille = max(2, n // nb_reseaux)
+    for k in range(nb_reseaux):
+        reseau = generer_reseau(taille, graine + k)
+        decalage = k * taille
+        G.ajouter_sommets((u + decalage, None) for u in reseau.sommets())
+        G.ajouter_aretes_ponderees((u + decalage, v + decalage, '{}_{}'.format(ligne, k), reseau.duree(u, v, ligne))
+                                   for u, v, ligne in reseau.aretes())
+    return G
+
+
+GENERATEURS = {
+    'chemin': generer_chemin,
+    'grille': generer_grille,
+    'arbre': generer_arbre,
+    'chapelet': generer_chapelet,
+    'reseau': generer_reseau,
+    'ramifications': generer_ramifications,
+    'archipel': generer_archipel,
+}
+
+
+# écrit le graphe dans un fichier au format des données du réseau
+def ecrire_donnees(graphe, fichier):
+    with open(fichier, 'w', encoding='utf-8') as my_file:
+        my_file.write('# stations\n')
+        for u in graphe.sommets():
+            my_file.write('{}:Station {}\n'.format(u, u))
+        my_file.write('# connexions\n')
+        for u, v, ligne in graphe.aretes():
+            my_file.write('{}/{}/{}\n'.format(u, v, graphe.duree(u, v, ligne)))
+
+
+# Copie les fichiers du dossier "données" en plusieurs exemplaires dans le
+# dossier cible, en décalant les identifiants de chaque exemplaire : on obtient
+# un réseau synthétique de même structure, autant de fois plus grand.
+def repliquer_donnees(cible, copies, source='données'):
+    for fichier in trouver_fichiers(source):
+        name, identifiants, noms, connexions, durees = lire_fichier(fichier)
+        for k in range(copies):
+            decalage = k * 10 ** 8
+            chemin = os.path.join(cible, '{}_{}.txt'.format(name, k))
+            with open(chemin, 'w', encoding='utf-8') as my_file:
+                my_file.write('# stations\n')
+                for u, nom in zip(identifiants, noms):
+                    my_file.write('{}:{}\n'.format(u + decalage, nom))
+                my_file.write('# connexions\n')
+                for i in range(0, len(connexions), 2):
+                    my_file.write('{}/{}/{}\n'.format(connexions[i] + decalage, connexions[i + 1] + decalage, durees[i // 2]))
+
+
+# renvoie la meilleure durée (en secondes) sur plusieurs exécutions
+def mesurer(fonction, *args, repetitions=3):
+    meilleure = None
+    for __not_used__ in range(repetitions):
+        depart = time.perf_counter()
+        fonction(*args)
+        duree = time.perf_counter() - depart
+        if meilleure is None or duree < meilleure:
+            meilleure = duree
+    return meilleure
+
+
+# renvoie le résultat de fonction(*args) et la mémoire (en octets) allouée
+# par cet appel et encore utilisée à la fin de l'appel
+def mesurer_memoire(fonction, *args):
+    tracemalloc.start()
+    avant = tracemalloc.get_traced_memory()[0]
+    res = fonction(*args)
+    apres = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return res, apres - avant
+
+
+# renvoie le résultat de fonction(*args) et le pic de mémoire (en octets)
+# atteint pendant l'appel
+def mesurer_pic_memoire(fonction, *args):
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    avant = tracemalloc.get_traced_memory()[0]
+    res = fonction(*args)
+    pic = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return res, pic - avant
+
+
+# Bancs d'essai : chacun renvoie une liste de résultats (dictionnaires).
+
+def banc_numerotations(tailles):
+    resultats = list()
+    for nom, generateur in GENERATEURS.items():
+        for n in tailles:
+            G = generateur(n)
+            resultats.append({
+                'banc': 'numerotations',
+                'graphe': nom,
+                'sommets': G.nombre_sommets(),
+                'aretes': G.nombre_aretes(),
+                'secondes': mesurer(numerotations, G),
+            })
+    return resultats
+
+
+# comparaison de Graphe (dictionnaire d'ensembles) et de GrapheCompact (CSR)
+def banc_compact(tailles):
+    resultats = list()
+    for nom, generateur in GENERATEURS.items():
+        for n in tailles:
+            G, memoire_dict = mesurer_memoire(generateur, n)
+            C, memoire_csr = mesurer_memoire(G.figer)
+            for representation, graphe, memoire in (('dict', G, memoire_dict), ('csr', C, memoire_csr)):
+                resultats.append({
+                    'banc': 'compact',
+                    'graphe': nom,
+                    'representation': representation,
+                    'sommets': graphe.nombre_sommets(),
+                    'octets': memoire,
+                    'secondes': mesurer(numerotations, graphe),
+                })
+    return resultats
+
+
+def banc_feuilles(tailles):
+    resultats = list()
+    for nom in ('arbre', 'chapelet'):
+        for n in tailles:
+            G = GENERATEURS[nom](n)
+            resultats.append({
+                'banc': 'feuilles',
+                'graphe': nom,
+                'sommets': G.nombre_sommets(),
+                'ponts': len(ponts(G)),
+                'secondes': mesurer(csp_feuille, G),
+            })
+    return resultats
+
+
+# ajout d'arêtes aléatoires avec mise à jour des ponts et des points
+# d'articulation : analyse complète après chaque ajout, ou analyse incrémentale
+def banc_incremental(tailles, nb_ajouts=100):
+    resultats = list()
+    for nom in ('arbre', 'chapelet'):
+        for n in tailles:
+            alea = random.Random(n)
+            G = GENERATEURS[nom](n)
+            ajouts = [(alea.randrange(n), alea.randrange(n)) for __not_used__ in range(nb_ajouts)]
+
+            def complete():
+                H = GENERATEURS[nom](n)
+                for u, v in ajouts:
+                    H.ajouter_arete(u, v, 'AJOUT')
+                    ponts(H), points_articulation(H)
+
+            def incrementale():
+                H = GENERATEURS[nom](n)
+                analyse = AnalyseIncrementale(H)
+                analyse.verifier()
+                for u, v in ajouts:
+                    H.ajouter_arete(u, v, 'AJOUT')
+                    analyse.ponts(), analyse.points_articulation()
+
+            for mode, fonction in (('complete', complete), ('incrementale', incrementale)):
+                resultats.append({
+                    'banc': 'incremental',
+                    'graphe': nom,
+                    'mode': mode,
+                    'sommets': G.nombre_sommets(),
+                    'ajouts': nb_ajouts,
+                    'secondes': mesurer(fonction, repetitions=1),
+                })
+    return resultats
+
+
+# chargement d'un fichier de données : lecture du texte, ou du cache binaire
+def banc_chargement(tailles):
+    resultats = list()
+    with tempfile.TemporaryDirectory() as dossier:
+        for n in tailles:
+            fichier = os.path.join(dossier, 'GRILLE_{}.txt'.format(n))
+            ecrire_donnees(generer_grille(n), fichier)
+            charger_donnees(Graphe(), fichier, cache=True)
+
+            for mode, cache in (('texte', False), ('cache', True)):
+                resultats.append({
+                    'banc': 'chargement',
+                    'mode': mode,
+                    'sommets': n,
+                    'octets': os.path.getsize(fichier),
+                    'secondes': mesurer(lambda: charger_donnees(Graphe(), fichier, cache)),
+                })
+    return resultats
+
+
+# démarrage de --ponts : chargement puis ponts, depuis le texte, le cache
+# binaire ou un instantané (qui contient déjà les ponts)
+def banc_instantane(tailles):
+    resultats = list()
+    with tempfile.TemporaryDirectory() as dossier:
+        for n in tailles:
+            fichier = os.path.join(dossier, 'RESEAU_{}.txt'.format(n))
+            instantane = os.path.join(dossier, 'RESEAU_{}.snap'.format(n))
+            G = generer_reseau(n)
+            ecrire_donnees(G, fichier)
+            charger_donnees(Graphe(), fichier, cache=True)
+            ponts(G)
+            enregistrer_instantane(G, instantane)
+
+            def depuis_donnees(cache):
+                reseau = Graphe()
+                charger_donnees(reseau, fichier, cache)
+                return ponts(reseau)
+
+            for mode, fonction in (('texte', lambda: depuis_donnees(False)),
+                                   ('cache', lambda: depuis_donnees(True)),
+                                   ('instantane', lambda: ponts(charger_instantane(instantane)))):
+                resultats.append({
+                    'banc': 'instantane',
+                    'mode': mode,
+                    'sommets': G.nombre_sommets(),
+                    'secondes': mesurer(fonction),
+                })
+    return resultats
+
+
+# chargement du réseau fourni répliqué (environ n sommets) : lecture des
+# fichiers un par un, ou en parallèle par un groupe de processus
+def banc_parallele(tailles):
+    resultats = list()
+    processus = max(2, os.cpu_count() or 1)
+    for n in tailles:
+        with tempfile.TemporaryDirectory() as dossier:
+            repliquer_donnees(dossier, max(1, n // 400))
+            for mode, nb in (('serie', 1), ('parallele', processus)):
+                G = Graphe()
+                fichiers = charger_repertoire(G, dossier, nb)
+                resultats.append({
+                    'banc': 'parallele',
+                    'mode': mode,
+                    'processus': nb,
+                    'fichiers': len(fichiers),
+                    'sommets': G.nombre_sommets(),
+                    'secondes': mesurer(lambda: charger_repertoire(Graphe(), dossier, nb)),
+                })
+    return resultats
+
+
+# aretes() (premier appel, puis appel servi par le cache) et extraction du
+# voisinage d'un sommet par sous_graphe_induit()
+def banc_aretes(tailles):
+    resultats = list()
+    for nom in ('grille', 'chapelet'):
+        for n in tailles:
+            G = GENERATEURS[nom](n)
+            voisinage = [(v, None) for v, __not_used__ in G.voisins(0)] + [(0, None)]
+
+            def premier_appel():
+                G.cache_aretes = None
+                G.aretes()
+
+            for mesure, fonction in (('aretes', premier_appel),
+                                     ('aretes_cache', G.aretes),
+                                     ('sous_graphe', lambda: G.sous_graphe_induit(voisinage))):
+                resultats.append({
+                    'banc': 'aretes',
+                    'graphe': nom,
+                    'mesure': mesure,
+                    'sommets': G.nombre_sommets(),
+                    'secondes': mesurer(fonction),
+                })
+    return resultats
+
+
+# amelioration_ponts() : durée, nombre d'arêtes ajoutées comparé au minimum
+# ceil(k / 2) par arbre de l'arbre des ponts, et ponts restant une fois les
+# arêtes ajoutées (doit être 0, hors ponts isolés : voir ponts_isoles())
+def banc_ameliorer_ponts(tailles):
+    resultats = list()
+    for nom in ('arbre', 'chapelet', 'chemin'):
+        for n in tailles:
+            G = GENERATEURS[nom](n)
+            ens_ponts, composante, membres, arbre = decomposition_ponts(G)
+            minimum = sum((len(feuilles) + 1) // 2 for feuilles in feuilles_par_arbre(arbre))
+            duree = mesurer(lambda: amelioration_ponts(G), repetitions=1)
+
+            aretes_amelioration = amelioration_ponts(G)
+            G.ajouter_aretes((u, v, 'AJOUT') for u, v in aretes_amelioration)
+            resultats.append({
+                'banc': 'ameliorer_ponts',
+                'graphe': nom,
+                'sommets': G.nombre_sommets(),
+                'ponts': len(ens_ponts),
+                'ajouts': len(aretes_amelioration),
+                'minimum': minimum,
+                'ponts_restants': len(ponts(G)) - len(ponts_isoles(G)),
+                'secondes': duree,
+            })
+    return resultats
+
+
+def banc_ameliorer_articulations(tailles):
+    resultats = list()
+    for nom in ('arbre', 'chapelet', 'chemin'):
+        for n in tailles:
+            G = GENERATEURS[nom](n)
+            ens_artic = points_articulation(G)
+            duree = mesurer(lambda: amelioration_points_articulation(G), repetitions=1)
+
+            aretes_amelioration = amelioration_points_articulation(G)
+            G.ajouter_aretes((u, v, 'AJOUT') for u, v in aretes_amelioration)
+            resultats.append({
+                'banc': 'ameliorer_articulations',
+                'graphe': nom,
+                'sommets': G.nombre_sommets(),
+                'articulations': len(ens_artic),
+                'ajouts': len(aretes_amelioration),
+                'articulations_restantes': len(points_articulation(G)),
+                'secondes': duree,
+            })
+    return resultats
+
+
+# décomposition en blocs sur la représentation compacte, comparée aux
+# numérotations par dictionnaires (temps et pic de mémoire)
+def banc_biconnexes(tailles):
+    resultats = list()
+    for nom in ('chapelet', 'grille'):
+        for n in tailles:
+            G = GENERATEURS[nom](n)
+            compact = G.figer()
+            duree = mesurer(DecompositionBiconnexe, compact, repetitions=1)
+            decomposition, pic = mesurer_pic_memoire(DecompositionBiconnexe, compact)
+            G.vider_cache()
+            __not_used__, pic_dict = mesurer_pic_memoire(points_articulation, G)
+            resultats.append({
+                'banc': 'biconnexes',
+                'graphe': nom,
+                'sommets': compact.nombre_sommets(),
+                'aretes': compact.nombre_aretes(),
+                'blocs': decomposition.nombre_blocs(),
+                'articulations': len(decomposition.articulations),
+                'octets_pic': pic,
+                'octets_pic_dict': pic_dict,
+                'secondes': duree,
+            })
+    return resultats
+
+
+# pannes de toutes les stations : un seul parcours, ou un parcours par panne
+# (limité aux petits graphes)
+def banc_pannes(tailles, limite_parcours=10000):
+    resultats = list()
+    for nom in ('chapelet', 'grille'):
+        for n in tailles:
+            G = GENERATEURS[nom](n)
+
+            def un_parcours():
+                G.vider_cache()
+                pannes_sommets(G), pannes_aretes(G)
+
+            def parcours_par_panne():
+                pannes_multiples(G, 1)
+
+            modes = [('un_parcours', un_parcours)]
+            if G.nombre_sommets() <= limite_parcours:
+                modes.append(('parcours_par_panne', parcours_par_panne))
+            for mode, fonction in modes:
+                resultats.append({
+                    'banc': 'pannes',
+                    'graphe': nom,
+                    'mode': mode,
+                    'sommets': G.nombre_sommets(),
+                    'secondes': mesurer(fonction, repetitions=1),
+                })
+    return resultats
+
+
+# débit des requêtes de trajet (requêtes par seconde) sur le réseau chargé
+# depuis les données et sur des grilles : Dijkstra seul, ou guidé par l'index
+# de repères (dont le temps de construction est mesuré à part). Dijkstra seul
+# n'est mesuré que sur les petits graphes.
+def banc_trajets(tailles, nb_requetes=1000, limite_dijkstra=10000):
+    graphes = [('donnees', None)] + [('grille', n) for n in tailles]
+    resultats = list()
+    for nom, n in graphes:
+        if n is None:
+            G = Graphe()
+            charger_fichiers(G, fichiers_lignes('METRO_', []) + fichiers_lignes('RER_', []))
+        else:
+            G = generer_grille(n)
+        alea = random.Random(0)
+        gares = sorted(G.sommets())
+        requetes = [(alea.choice(gares), alea.choice(gares)) for __not_used__ in range(nb_requetes)]
+        reseau = reseau_pondere(G)
+        construction = mesurer(lambda: index_reperes(G), repetitions=1)
+
+        modes = [('reperes', index_reperes(G))]
+        if G.nombre_sommets() <= limite_dijkstra:
+            modes.insert(0, ('dijkstra', reseau))
+        for mode, moteur in modes:
+            duree = mesurer(lambda: [moteur.duree_trajet(s, t) for s, t in requetes], repetitions=1)
+            resultats.append({
+                'banc': 'trajets',
+                'graphe': nom,
+                'mode': mode,
+                'sommets': G.nombre_sommets(),
+                'etats': reseau.nombre_etats(),
+                'construction': construction if mode == 'reperes' else 0,
+                'requetes_par_seconde': round(nb_requetes / duree),
+                'secondes': duree,
+            })
+    return resultats
+
+
+# ponts de nb_combinaisons combinaisons de trois lignes d'un réseau de
+# transport synthétique : sur une copie filtrée du graphe pour chaque
+# combinaison, ou sur une vue (VueLignes) obtenue par l'index des lignes
+def banc_vues(tailles, nb_combinaisons=200):
+    resultats = list()
+    for n in tailles:
+        G = generer_reseau(n)
+        alea = random.Random(0)
+        lignes = sorted(G.lignes())
+        combinaisons = [frozenset(alea.sample(lignes, min(3, len(lignes)))) for __not_used__ in range(nb_combinaisons)]
+
+        def copies():
+            for combinaison in combinaisons:
+                copie = Graphe()
+                copie.ajouter_aretes(arete for arete in G.aretes() if arete[2] in combinaison)
+                ponts(copie)
+
+        def vues():
+            for combinaison in combinaisons:
+                ponts(G.vue_lignes(combinaison))
+
+        for mode, fonction in (('copie', copies), ('vue', vues)):
+            G.vider_cache()
+            resultats.append({
+                'banc': 'vues',
+                'mode': mode,
+                'sommets': n,
+                'lignes': len(lignes),
+                'combinaisons': nb_combinaisons,
+                'secondes': mesurer(fonction, repetitions=1),
+            })
+    return resultats
+
+
+# ponts, points d'articulation et améliorations d'un archipel (plusieurs
+# composantes connexes) : en série sur le graphe entier, ou par composante
+# avec analyse_par_composantes() dans un seul processus ou en parallèle
+def banc_composantes(tailles, nb_reseaux=16):
+    resultats = list()
+    processus = max(2, os.cpu_count() or 1)
+    for n in tailles:
+        G = generer_archipel(n, nb_reseaux)
+
+        def serie():
+            G.vider_cache()
+            ponts(G), points_articulation(G)
+            amelioration_ponts(G), amelioration_points_articulation(G)
+
+        def par_composantes(nb):
+            G.vider_cache()
+            analyse_par_composantes(G, nb)
+
+        for mode, nb, fonction in (('serie', 1, serie),
+                                   ('composantes', 1, lambda: par_composantes(1)),
+                                   ('composantes', processus, lambda: par_composantes(processus))):
+            resultats.append({
+                'banc': 'composantes',
+                'mode': '{} x{}'.format(mode, nb),
+                'sommets': G.nombre_sommets(),
+                'composantes': nb_reseaux,
+                'secondes': mesurer(fonction, repetitions=1),
+            })
+    return resultats
+
+
+# Évaluation d'arêtes candidates tirées au hasard : en un lot (arbre des blocs
+# et ancêtres communs), ou en ajoutant chaque candidate à une copie du graphe
+# avant de relancer ponts() et points_articulation() (sur quelques candidates
+# seulement, la durée étant ensuite ramenée au lot entier).
+def banc_candidats(tailles, nb_candidats=10000, nb_copies=10):
+    resultats = list()
+    for n in tailles:
+        G = generer_reseau(n)
+        alea = random.Random(n)
+        sommets = sorted(G.sommets())
+        candidats = [(alea.choice(sommets), alea.choice(sommets)) for __not_used__ in range(nb_candidats)]
+
+        def lot():
+            G.vider_cache()
+            evaluer_candidats(G, candidats)
+
+        def copies():
+            for u, v in candidats[:nb_copies]:
+                H = Graphe()
+                H.ajouter_aretes(G.aretes())
+                H.ajouter_arete(u, v, None)
+                ponts(H), points_articulation(H)
+
+        resultats.append({
+            'banc': 'candidats',
+            'mode': 'lot',
+            'sommets': n,
+            'candidats': nb_candidats,
+            'secondes': mesurer(lot, repetitions=1),
+        })
+        resultats.append({
+            'banc': 'candidats',
+            'mode': 'copies (extrapolé)',
+            'sommets': n,
+            'candidats': nb_candidats,
+            'secondes': mesurer(copies, repetitions=1) * nb_candidats / nb_copies,
+        })
+    return resultats
+
+
+# Criticité des stations (algorithme de Brandes) d'un réseau de transport
+# synthétique : calcul exact, en série ou réparti entre les processus, et
+# estimation à partir de quelques sources tirées au hasard. Pour l'estimation,
+# communs_top10 compte les stations du top 10 exact qu'elle retrouve.
+def banc_criticite(tailles, pivots=64):
+    resultats = list()
+    processus = max(2, os.cpu_count() or 1)
+    for n in tailles:
+        G = generer_reseau(n)
+        exact = None
+        for mode, nb, nb_pivots in (('exact', 1, None), ('exact', processus, None), ('pivots', 1, pivots)):
+            # graphe neuf à chaque mesure : rien n'est repris du cache
+            compact = G.figer()
+            depart = time.perf_counter()
+            top = [compact.identifiant(u) for u, __not_used__ in plus_critiques(compact, 10, nb_pivots, 1, nb)[0]]
+            res = {
+                'banc': 'criticite',
+                'mode': '{} x{}'.format(mode, nb),
+                'sommets': G.nombre_sommets(),
+                'secondes': time.perf_counter() - depart,
+            }
+            if exact is None:
+                exact = top
+            if nb_pivots is not None:
+                res['communs_top10'] = len(set(top) & set(exact))
+            resultats.append(res)
+    return resultats
+
+
+# Pic de mémoire (tracemalloc) et durée du chargement puis du calcul des ponts
+# et des points d'articulation d'un réseau de transport synthétique : Graphe
+# construit par charger_donnees(), ou graphe lu en flux (GrapheFlux) depuis le
+# même fichier, compressé ou non, avec ses tableaux en mémoire ou dans des
+# fichiers projetés (dont les pages ne sont pas comptées par tracemalloc).
+def banc_flux(tailles):
+    resultats = list()
+    with tempfile.TemporaryDirectory() as dossier:
+        for n in tailles:
+            G = generer_reseau(n)
+            fichier = os.path.join(dossier, 'RESEAU_{}.txt'.format(n))
+            ecrire_donnees(G, fichier)
+            with open(fichier, 'rb') as source, gzip.open(fichier + '.gz', 'wb') as cible:
+                cible.write(source.read())
+            nb_aretes = G.nombre_aretes()
+            del G
+
+            def graphe():
+                reseau = Graphe()
+                charger_donnees(reseau, fichier)
+                return ponts(reseau), points_articulation(reseau)
+
+            def flux(source, stockage):
+                reseau = GrapheFlux(source, stockage)
+                return ponts_flux(reseau), points_articulation_flux(reseau)
+
+            for mode, fonction in (('graphe', graphe),
+                                   ('flux', lambda: flux(fichier, None)),
+                                   ('flux gzip', lambda: flux(fichier + '.gz', None)),
+                                   ('flux disque', lambda: flux(fichier, dossier))):
+                depart = time.perf_counter()
+                __not_used__, pic = mesurer_pic_memoire(fonction)
+                resultats.append({
+                    'banc': 'flux',
+                    'mode': mode,
+                    'sommets': n,
+                    'aretes': nb_aretes,
+                    'pic_memoire': pic,
+                    'octets_par_arete': round(pic / max(1, nb_aretes), 1),
+                    'secondes': time.perf_counter() - depart,
+                })
+    return resultats
+
+
+# Requêtes d'un tableau de bord : combinaisons de lignes de métro tirées au
+# hasard parmi nb_combinaisons, qui reviennent donc plusieurs fois.
+def requetes_tableau_de_bord(nb_requetes, nb_combinaisons=20, graine=0):
+    alea = random.Random(graine)
+    lignes = [nom_ligne(fichier)[len('METRO_'):] for fichier in fichiers_lignes('METRO_', [])]
+    combinaisons = [sorted(alea.sample(lignes, alea.randint(1, 4))) for __not_used__ in range(nb_combinaisons)]
+    return [alea.choice(combinaisons) for __not_used__ in range(nb_requetes)]
+
+
+# Sert les requêtes par un serveur d'analyses démarré dans ce processus, avec
+# nb_clients clients simultanés. Renvoie la latence de chaque requête et la
+# durée totale.
+async def servir_requetes(socket, requetes, analyses, nb_clients, processus):
+    serveur = ServeurAnalyses(processus)
+    await serveur.demarrer(socket)
+    latences = list()
+
+    async def client(lignes_requetes):
+        connexion = await ClientAnalyses.connecter(socket)
+        for lignes in lignes_requetes:
+            depart = time.perf_counter()
+            reponse = await connexion.requete(metro=lignes, analyses=analyses)
+            latences.append(time.perf_counter() - depart)
+            if 'erreur' in reponse:
+                raise RuntimeError(reponse['erreur'])
+        await connexion.fermer()
+
+    depart = time.perf_counter()
+    await asyncio.gather(*(client(requetes[i::nb_clients]) for i in range(nb_clients)))
+    duree = time.perf_counter() - depart
+    serveur.arreter()
+    await serveur.attendre()
+    return latences, duree
+
+
+# Latence et débit des requêtes d'un tableau de bord (ponts, points
+# d'articulation et améliorations d'une combinaison de lignes de métro) :
+# un processus ameliorations.py par requête, comme aujourd'hui, ou un serveur
+# gardant données et analyses en mémoire, interrogé par un ou plusieurs
+# clients simultanés. La latence donnée (secondes) est la médiane, premières
+# requêtes (serveur froid) comprises. Les tailles ne sont pas utilisées : les
+# requêtes portent sur le réseau fourni.
+def banc_serveur(tailles, nb_requetes=400, nb_lancements=10, processus=2):
+    requetes = requetes_tableau_de_bord(nb_requetes)
+    analyses = list(ANALYSES_PAR_DEFAUT) + list(ANALYSES_LOURDES)
+    programme = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ameliorations.py')
+    mesures = list()
+
+    latences = list()
+    for lignes in requetes[:nb_lancements]:
+        depart = time.perf_counter()
+        subprocess.run([sys.executable, programme, '--metro'] + lignes + ['--ponts', '--articulations', '-ap', '-aa'],
+                       stdout=subprocess.DEVNULL, check=True)
+        latences.append(time.perf_counter() - depart)
+    mesures.append(('processus', 1, latences, sum(latences)))
+
+    with tempfile.TemporaryDirectory() as dossier:
+        for nb_clients in (1, 8):
+            socket = os.path.join(dossier, 'serveur_{}.sock'.format(nb_clients))
+            latences, duree = asyncio.run(servir_requetes(socket, requetes, analyses, nb_clients, processus))
+            mesures.append(('serveur', nb_clients, latences, duree))
+
+    resultats = list()
+    for mode, nb_clients, latences, duree in mesures:
+        latences = sorted(latences)
+        resultats.append({
+            'banc': 'serveur',
+            'mode': '{} x{}'.format(mode, nb_clients),
+            'requetes': len(latences),
+            'p95': round(latences[min(len(latences) - 1, int(0.95 * len(latences)))], 4),
+            'requetes_par_seconde': round(len(latences) / duree),
+            'secondes': latences[len(latences) // 2],
+        })
+    return resultats
+
+
+# Latence d'une exécution répétée d'ameliorations.py (tout le réseau : liste
+# des stations, ponts, points d'articulation et améliorations) : sans cache des
+# résultats, avec un cache vide (froid : calcul puis écriture), ou avec un
+# cache déjà rempli (chaud), le programme étant lancé comme script ou comme
+# module (python -m, dont le code compilé est réutilisé d'une exécution à
+# l'autre). La latence donnée (secondes) est la médiane des lancements. Les
+# tailles ne sont pas utilisées.
+def banc_demarrage(tailles, nb_lancements=10):
+    repertoire = os.path.dirname(os.path.abspath(__file__))
+    requete = ['--metro', '--rer', '-ls', '--ponts', '--articulations', '-ap', '-aa']
+    resultats = list()
+    with tempfile.TemporaryDirectory() as dossier:
+        for mode, lancement, options in (
+                ('sans cache', [os.path.join(repertoire, 'ameliorations.py')], []),
+                ('cache froid', [os.path.join(repertoire, 'ameliorations.py')], ['--cache-resultats']),
+                ('cache chaud', [os.path.join(repertoire, 'ameliorations.py')], ['--cache-resultats']),
+                ('cache chaud -m', ['-m', 'ameliorations'], ['--cache-resultats'])):
+            latences = list()
+            for k in range(nb_lancements):
+                cache = os.path.join(dossier, '{}_{}'.format(mode, k) if mode == 'cache froid' else 'chaud')
+                depart = time.perf_counter()
+                subprocess.run([sys.executable] + lancement + requete + options + ([cache] if options else []),
+                               stdout=subprocess.DEVNULL, check=True, cwd=repertoire)
+                latences.append(time.perf_counter() - depart)
+            resultats.append({
+                'banc': 'demarrage',
+                'mode': mode,
+                'secondes': sorted(latences)[len(latences) // 2],
+            })
+    return resultats
+
+
+# matrice des distances en sauts (parcours en largeur groupés, écrite dans un
+# fichier .npy projeté en mémoire) et métriques, sur le réseau complet chargé
+# depuis les données puis sur des grilles ; la matrice occupant n * n * 2
+# octets, les grilles sont limitées en taille
+def banc_distances(tailles, limite=10000):
+    graphes = [('donnees', None)] + [('grille', n) for n in tailles if n <= limite]
+    resultats = list()
+    with tempfile.TemporaryDirectory() as dossier:
+        for nom, n in graphes:
+            if n is None:
+                G = Graphe()
+                charger_fichiers(G, fichiers_lignes('METRO_', []) + fichiers_lignes('RER_', []))
+            else:
+                G = generer_grille(n)
+            fichier = os.path.join(dossier, nom + '.npy')
+            calcul = mesurer(distances_sauts, G, fichier, repetitions=1)
+            relecture = mesurer(charger_distances, fichier, G, repetitions=1)
+            metriques = metriques_distances(charger_distances(fichier, G)[0])
+            resultats.append({
+                'banc': 'distances',
+                'graphe': nom,
+                'sommets': G.nombre_sommets(),
+                'distance_moyenne': round(metriques['distance_moyenne'], 3),
+                'diametre': metriques['diametre'],
+                'octets': os.path.getsize(fichier),
+                'relecture': relecture,
+                'secondes': calcul,
+            })
+    return resultats
+
+
+# Suite complète : chargement d'un fichier de données puis chaque analyse du
+# programme, sur les graphes de type transport, de 10^2 à 10^6 sommets
+# (python benchmarks.py suite --echelle 1000000). Le cache des analyses est
+# vidé avant chaque mesure : les durées comprennent les calculs préalables
+# (numérotations, ponts, ...) dont chaque fonction dépend.
+FONCTIONS_SUITE = (
+    ('numerotations', numerotations),
+    ('ponts', ponts),
+    ('points_articulation', points_articulation),
+    ('csp_feuille', csp_feuille),
+    ('amelioration_ponts', amelioration_ponts),
+    ('amelioration_points_articulation', amelioration_points_articulation),
+)
+
+
+def banc_suite(tailles):
+    resultats = list()
+    with tempfile.TemporaryDirectory() as dossier:
+        for nom in ('reseau', 'ramifications', 'grille', 'chapelet'):
+            for n in tailles:
+                fichier = os.path.join(dossier, '{}_{}.txt'.format(nom, n))
+                ecrire_donnees(GENERATEURS[nom](n), fichier)
+                G = Graphe()
+                mesures = [('charger_donnees', mesurer(charger_donnees, G, fichier, repetitions=1))]
+                for fonction, calcul in FONCTIONS_SUITE:
+                    def analyse():
+                        G.vider_cache()
+                        calcul(G)
+                    mesures.append((fonction, mesurer(analyse, repetitions=1)))
+                os.remove(fichier)
+
+                for fonction, duree in mesures:
+                    resultats.append({
+                        'banc': 'suite',
+                        'graphe': nom,
+                        'fonction': fonction,
+                        'sommets': G.nombre_sommets(),
+                        'aretes': G.nombre_aretes(),
+                        'secondes': duree,
+                    })
+    return resultats
+
+
+BANCS = {
+    'ameliorer_articulations': banc_ameliorer_articulations,
+    'ameliorer_ponts': banc_ameliorer_ponts,
+    'aretes': banc_aretes,
+    'biconnexes': banc_biconnexes,
+    'chargement': banc_chargement,
+    'candidats': banc_candidats,
+    'compact': banc_compact,
+    'demarrage': banc_demarrage,
+    'composantes': banc_composantes,
+    'criticite': banc_criticite,
+    'distances': banc_distances,
+    'incremental': banc_incremental,
+    'instantane': banc_instantane,
+    'feuilles': banc_feuilles,
+    'flux': banc_flux,
+    'numerotations': banc_numerotations,
+    'pannes': banc_pannes,
+    'parallele': banc_parallele,
+    'serveur': banc_serveur,
+    'suite': banc_suite,
+    'trajets': banc_trajets,
+    'vues': banc_vues,
+}
+
+
+def afficher_resultats(resultats):
+    for res in resultats:
+        details = ' '.join(
+            '{}={}'.format(cle, valeur) for cle, valeur in res.items()
+            if cle not in ('banc', 'secondes')
+        )
+        print('{:<16} {:<48} {:>10.4f} s'.format(res['banc'], details, res['secondes']))
+
+
+# Clé d'un résultat : ce qui décrit la mesure (banc, graphe, fonction, ...,
+# nombre de sommets) sans les valeurs mesurées.
+def cle_resultat(res):
+    return tuple(sorted((cle, valeur) for cle, valeur in res.items() if isinstance(valeur, str) or cle == 'sommets'))
+
+
+# identifiant de la révision git courante (None hors d'un dépôt git)
+def revision():
+    try:
+        sortie = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)))
+    except OSError:
+        return None
+    return sortie.stdout.strip() or None
+
+
+def enregistrer_resultats(resultats, fichier):
+    with open(fichier, 'w') as my_file:
+        json.dump({
+            'revision': revision(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'resultats': resultats,
+        }, my_file, indent=2)
+
+
+# relit un fichier de résultats (les anciens fichiers ne contiennent que la
+# liste des résultats)
+def lire_resultats(fichier):
+    with open(fichier) as my_file:
+        donnees = json.load(my_file)
+    return donnees if isinstance(donnees, list) else donnees['resultats']
+
+
+# Compare les durées à celles d'un fichier de résultats précédent : rapport
+# nouvelle durée / ancienne durée pour chaque mesure présente dans les deux.
+def comparer_resultats(anciens, resultats, seuil=1.1):
+    index = {cle_resultat(res): res for res in anciens}
+    print('\nComparaison avec les résultats précédents (nouvelle durée / ancienne durée):')
+    for res in resultats:
+        ancien = index.get(cle_resultat(res))
+        if ancien is None or ancien['secondes'] <= 0:
+            continue
+        rapport = res['secondes'] / ancien['secondes']
+        details = ' '.join('{}={}'.format(cle, valeur) for cle, valeur in cle_resultat(res) if cle != 'banc')
+        marque = '  plus lent' if rapport > seuil else '  plus rapide' if rapport < 1 / seuil else ''
+        print('{:<16} {:<48} {:>8.2f}x{}'.format(res['banc'], details, rapport, marque))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mesures de performances des algorithmes du réseau.')
+    parser.add_argument('bancs',
+                        help='bancs d\'essai à exécuter (tous par défaut)',
+                        nargs='*',
+                        metavar='BANC')
+
+    parser.add_argument('--tailles',
+                        help='nombres de sommets des graphes générés',
+                        nargs='+',
+                        type=int,
+                        default=[1000, 10000, 100000],
+                        metavar='N')
+
+    parser.add_argument('--echelle',
+                        help='utilise les puissances de 10 de 100 à MAX comme tailles',
+                        type=int,
+                        metavar='MAX')
+
+    parser.add_argument('--json',
+                        help='enregistre les résultats au format JSON dans FICHIER',
+                        metavar='FICHIER',
+                        dest='json')
+
+    parser.add_argument('--comparer',
+                        help='compare les durées à celles d\'un fichier JSON de résultats précédent',
+                        metavar='ANCIEN',
+                        dest='comparer')
+
+    args = parser.parse_args()
+    for nom in args.bancs:
+        if nom not in BANCS:
+            parser.error('banc inconnu : ' + nom + ' (choix : ' + ', '.join(sorted(BANCS)) + ')')
+
+    tailles = args.tailles
+    if args.echelle is not None:
+        tailles = [10 ** k for k in range(2, len(str(args.echelle))) if 10 ** k <= args.echelle]
+
+    resultats = list()
+    for nom in args.bancs or sorted(BANCS):
+        resultats.extend(BANCS[nom](tailles))
+
+    afficher_resultats(resultats)
+
+    if args.comparer is not None:
+        comparer_resultats(lire_resultats(args.comparer), resultats)
+
+    if args.json is not None:
+        enregistrer_resultats(resultats, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,173 @@
+"""
+
+Mini-projet d'algo des graphes : renforcement d'un réseau
+Auteur : Gérald LIN
+
+Distances en nombre de connexions (sauts) entre toutes les paires de stations,
+calculées par paquets de parcours en largeur sur une matrice d'adjacence creuse,
+et métriques du réseau (distance moyenne, diamètre, excentricités).
+Nécessite NumPy et SciPy.
+
+"""
+
+import hashlib
+
+from graphe import *
+
+# NumPy et SciPy ne sont importés qu'au premier calcul (voir verifier_numpy()) :
+# leur import prend plus de temps que tout le reste du programme, qui n'en a
+# le plus souvent pas besoin.
+numpy = sparse = csgraph = None
+
+
+# valeur des paires de stations non reliées dans la matrice des distances
+NON_RELIES = -1
+
+# type des distances : deux octets par paire suffisent pour les réseaux
+# étudiés (diamètre inférieur à 32767 connexions)
+TYPE_DISTANCES = 'int16'
+
+
+def verifier_numpy():
+    global numpy, sparse, csgraph
+    if numpy is None:
+        try:
+            import numpy as module_numpy
+            from scipy import sparse as module_sparse
+            from scipy.sparse import csgraph as module_csgraph
+        except ImportError:
+            raise ImportError('Les distances nécessitent NumPy et SciPy (pip install numpy scipy).')
+        numpy, sparse, csgraph = module_numpy, module_sparse, module_csgraph
+
+
+# Renvoie la matrice d'adjacence (scipy.sparse, format CSR) du graphe et la
+# liste des identifiants des sommets, dans l'ordre des lignes de la matrice.
+# Les arêtes multiples ne comptent qu'une fois et les boucles sont ignorées.
+def matrice_adjacence(graphe):
+    verifier_numpy()
+    compact = graphe if isinstance(graphe, GrapheCompact) else graphe.figer()
+    n = compact.nombre_sommets()
+    debuts = numpy.frombuffer(compact.debuts, dtype='i{}'.format(compact.debuts.itemsize))
+    cibles = numpy.frombuffer(compact.cibles, dtype='i{}'.format(compact.cibles.itemsize))
+    lignes = numpy.repeat(numpy.arange(n), numpy.diff(debuts))
+
+    garder = lignes != cibles
+    matrice = sparse.csr_matrix((numpy.ones(int(garder.sum()), dtype='int8'),
+                                 (lignes[garder], cibles[garder])), shape=(n, n))
+    # les doublons ont été additionnés : on les ramène à 1
+    matrice.data[:] = 1
+    identifiants = list(compact.sommets()) if compact is graphe else compact.identifiants
+    return matrice, identifiants
+
+
+# Renvoie l'empreinte SHA-256 des connexions d'une matrice d'adjacence (voir
+# matrice_adjacence()) et des identifiants de ses sommets. Les voisins de
+# chaque sommet sont d'abord triés : l'empreinte ne dépend que des paires de
+# stations reliées, pas de l'ordre de parcours des ensembles de voisins.
+def empreinte_connexions(matrice, identifiants):
+    matrice.sum_duplicates()
+    empreinte = hashlib.sha256(repr(list(identifiants)).encode('utf-8'))
+    empreinte.update(numpy.asarray(matrice.indptr, dtype='int64').tobytes())
+    empreinte.update(numpy.asarray(matrice.indices, dtype='int64').tobytes())
+    return empreinte.hexdigest()
+
+
+# Calcule les distances depuis un paquet de sources : parcours en largeur de
+# scipy.sparse.csgraph (compilés) lancés depuis toutes les sources du paquet,
+# puis conversion des distances (réels, infinis pour les sommets non reliés)
+# dans le type de la matrice résultat.
+def distances_paquet(matrice, sources, resultat):
+    paquet = csgraph.shortest_path(matrice, directed=False, unweighted=True, indices=sources)
+    if paquet.size and numpy.isfinite(paquet).any() \
+    and paquet[numpy.isfinite(paquet)].max() > numpy.iinfo(resultat.dtype).max:
+        raise ValueError('Distance trop grande pour le type ' + str(resultat.dtype) + '.')
+    paquet[numpy.isinf(paquet)] = NON_RELIES
+    resultat[:] = paquet
+
+
+# Renvoie la matrice des distances (en sauts) entre tous les sommets du graphe,
+# NON_RELIES pour les paires non reliées, et la liste des identifiants des
+# sommets. Les sources sont traitées par paquets pour borner la mémoire.
+# Si un fichier est donné, la matrice y est écrite au format .npy et renvoyée
+# projetée en mémoire (numpy.memmap) : elle pourra être relue par
+# charger_distances() sans être recalculée. Les identifiants et l'empreinte des
+# connexions sont enregistrés à côté (fichier_sommets(), fichier_empreinte()).
+def distances_sauts(graphe, fichier=None, paquet=256):
+    matrice, identifiants = matrice_adjacence(graphe)
+    n = matrice.shape[0]
+    if fichier is None:
+        distances = numpy.empty((n, n), dtype=TYPE_DISTANCES)
+    else:
+        distances = numpy.lib.format.open_memmap(fichier, mode='w+', dtype=TYPE_DISTANCES, shape=(n, n))
+
+    for debut in range(0, n, paquet):
+        sources = numpy.arange(debut, min(n, debut + paquet))
+        distances_paquet(matrice, sources, distances[debut:debut + len(sources)])
+
+    if fichier is not None:
+        distances.flush()
+        numpy.save(fichier_sommets(fichier), numpy.array(identifiants))
+        with open(fichier_empreinte(fichier), 'w', encoding='utf-8') as my_file:
+            my_file.write(empreinte_connexions(matrice, identifiants))
+    return distances, identifiants
+
+
+# fichier des identifiants associé à une matrice : X.npy -> X.sommets.npy
+def fichier_sommets(fichier):
+    return fichier[:-4] + '.sommets.npy' if fichier.endswith('.npy') else fichier + '.sommets.npy'
+
+
+# fichier de l'empreinte des connexions associé à une matrice : X.npy -> X.empreinte
+def fichier_empreinte(fichier):
+    return fichier[:-4] + '.empreinte' if fichier.endswith('.npy') else fichier + '.empreinte'
+
+
+# Relit une matrice écrite par distances_sauts(), sans la charger en mémoire
+# (projection en lecture seule). Renvoie None si le fichier est absent ou s'il
+# ne correspond pas au graphe donné : mêmes sommets, et même empreinte des
+# connexions (une matrice calculée avant l'ajout ou le retrait d'une connexion
+# donnerait des distances fausses).
+def charger_distances(fichier, graphe=None):
+    verifier_numpy()
+    try:
+        distances = numpy.load(fichier, mmap_mode='r')
+        identifiants = numpy.load(fichier_sommets(fichier)).tolist()
+        with open(fichier_empreinte(fichier), 'r', encoding='utf-8') as my_file:
+            empreinte = my_file.read().strip()
+    except (OSError, ValueError):
+        return None
+    if graphe is not None:
+        if identifiants != sorted(graphe.sommets()):
+            return None
+        if empreinte != empreinte_connexions(*matrice_adjacence(graphe)):
+            return None
+    return distances, identifiants
+
+
+# Renvoie les métriques de la matrice des distances : excentricité de chaque
+# sommet (distance au sommet le plus éloigné de sa composante), distance
+# moyenne entre les paires de sommets distincts reliés, diamètre et rayon.
+# La matrice est lue par paquets de lignes (elle peut être projetée en mémoire).
+def metriques_distances(distances, paquet=1024):
+    verifier_numpy()
+    n = distances.shape[0]
+    excentricites = numpy.zeros(n, dtype='int64')
+    somme, paires = 0, 0
+    for debut in range(0, n, paquet):
+        bloc = numpy.asarray(distances[debut:debut + paquet], dtype='int64')
+        relies = bloc > 0
+        excentricites[debut:debut + len(bloc)] = bloc.max(axis=1, initial=0)
+        somme += int(bloc[relies].sum())
+        paires += int(relies.sum())
+
+    # le rayon ne concerne que les sommets ayant au moins un voisin
+    non_isoles = excentricites[excentricites > 0]
+    return {
+        'sommets': n,
+        'paires_reliees': paires // 2,
+        'distance_moyenne': somme / paires if paires else 0.0,
+        'diametre': int(excentricites.max(initial=0)),
+        'rayon': int(non_isoles.min()) if len(non_isoles) else 0,
+        'excentricites': excentricites,
+    }
+
@@ -0,0 +1,222 @@
+"""
+
+Mini-projet d'algo des graphes : renforcement d'un réseau
+Auteur : Gérald LIN
+
+Lecture en flux de très grandes listes d'arêtes (texte ou gzip) : les arêtes
+sont lues par paquets et rangées dans des tableaux au format CSR, en mémoire
+ou dans des fichiers projetés en mémoire, sans objet Python par station ni par
+connexion.
+
+"""
+
+from graphe import *
+from array import array
+import bisect
+import gzip
+import heapq
+import itertools
+import mmap
+import os
+
+
+# nombre d'arêtes lues par paquet
+TAILLE_PAQUET = 1 << 16
+
+
+# Ouvre un fichier texte, décompressé à la volée s'il est au format gzip
+# (reconnu à sa signature, quelle que soit son extension).
+def ouvrir_texte(fichier):
+    with open(fichier, 'rb') as my_file:
+        signature = my_file.read(2)
+    if signature == b'\x1f\x8b':
+        return gzip.open(fichier, 'rt', encoding='utf-8')
+    return open(fichier, 'r', encoding='utf-8')
+
+
+# Générateur des arêtes d'un fichier par paquets : chaque paquet est un
+# tableau des extrémités (deux cases par arête) d'au plus taille arêtes.
+# Une arête est une ligne "u v" ou "u/v[/durée]" ; les lignes vides, les
+# commentaires (#) et les stations "u:nom" du format des données sont
+# ignorés, si bien que les fichiers de données se lisent aussi.
+def paquets_aretes(fichier, taille=TAILLE_PAQUET):
+    paquet = array('q')
+    with ouvrir_texte(fichier) as my_file:
+        for ligne in my_file:
+            ligne = ligne.strip()
+            if not ligne or ligne[0] == '#' or ':' in ligne:
+                continue
+            champs = ligne.split('/') if '/' in ligne else ligne.split()
+            paquet.append(int(champs[0]))
+            paquet.append(int(champs[1]))
+            if len(paquet) >= 2 * taille:
+                yield paquet
+                paquet = array('q')
+    if paquet:
+        yield paquet
+
+
+# fusionne deux tableaux triés sans doublon en un tableau trié sans doublon
+def fusionner_tries(a, b):
+    return array('q', (u for u, __not_used__ in itertools.groupby(heapq.merge(a, b))))
+
+
+class Stockage(object):
+    """Tableaux du graphe lu en flux : des array en mémoire, ou, si un
+    dossier est donné, des fichiers temporaires de ce dossier projetés en
+    mémoire (leurs pages peuvent alors être libérées par le système et relues
+    à la demande)."""
+
+    def __init__(self, dossier=None):
+        self.dossier = dossier
+        self.projections = list()
+
+    def tableau(self, type_cases, longueur):
+        """Renvoie un tableau de longueur donnée, initialisé à zéro. Sur
+        disque, c'est un fichier temporaire du dossier, supprimé dès que le
+        tableau n'est plus utilisé."""
+        if self.dossier is None:
+            return array(type_cases, [0]) * longueur
+        taille = max(1, longueur) * array(type_cases).itemsize
+        with self.fichier_temporaire() as my_file:
+            my_file.truncate(taille)
+            projection = mmap.mmap(my_file.fileno(), taille)
+        self.projections.append(projection)
+        return memoryview(projection).cast(type_cases)[:longueur]
+
+    def fichier_temporaire(self):
+        """Renvoie un fichier temporaire binaire, dans le dossier s'il y en a un."""
+        import tempfile
+        return tempfile.TemporaryFile(dir=self.dossier)
+
+
+class GrapheFlux(CacheAnalyses):
+    """Graphe lu en flux depuis une liste d'arêtes, au format CSR.
+
+    Comme dans GrapheCompact, les sommets sont numérotés de 0 à n - 1 dans
+    l'ordre croissant de leurs identifiants (tableau identifiants), et les
+    voisins du sommet i sont les cases debuts[i] à debuts[i + 1] - 1 du
+    tableau cibles ; il n'y a ni noms de stations ni lignes. Les boucles,
+    ignorées par les analyses, ne sont pas conservées.
+
+    La construction se fait en trois lectures des arêtes, par paquets :
+      - la lecture du fichier, qui recopie les arêtes dans un fichier
+        temporaire binaire et rassemble les identifiants par fusions
+        successives de tableaux triés (comme un tri fusion) ;
+      - le calcul des degrés, les identifiants étant remplacés par leurs
+        numéros (recherche dichotomique) dans un second fichier temporaire ;
+      - le remplissage du tableau cibles.
+    La mémoire utilisée est de 8 octets par sommet et 4 octets par extrémité
+    d'arête pour le graphe lui-même (dans des fichiers projetés si un dossier
+    est donné), plus un paquet d'arêtes, au lieu de plusieurs objets Python
+    par station et par connexion pour un Graphe.
+    """
+
+    def __init__(self, fichiers, dossier=None, taille_paquet=TAILLE_PAQUET):
+        """Lit les arêtes du fichier (ou de la liste de fichiers) donné. Avec
+        un dossier, les tableaux du graphe y sont écrits et projetés en
+        mémoire."""
+        if isinstance(fichiers, str):
+            fichiers = [fichiers]
+        self.stockage = Stockage(dossier)
+        self.taille_paquet = taille_paquet
+        self.composantes = None
+        self.version = 0
+        self.vider_cache()
+
+        with self.stockage.fichier_temporaire() as extremites:
+            self.identifiants = self.lire_aretes(fichiers, extremites)
+            with self.stockage.fichier_temporaire() as numeros:
+                degres = self.numeroter(extremites, numeros)
+                self.remplir(numeros, degres)
+
+    def lire_aretes(self, fichiers, extremites):
+        # les identifiants de chaque paquet forment un tableau trié ; deux
+        # tableaux de tailles voisines sont fusionnés, comme dans un compteur
+        # binaire, ce qui limite le coût total des fusions
+        tries = list()
+        for fichier in fichiers:
+            for paquet in paquets_aretes(fichier, self.taille_paquet):
+                paquet.tofile(extremites)
+                nouveau = array('q', sorted(set(paquet)))
+                while tries and len(tries[-1]) <= 2 * len(nouveau):
+                    nouveau = fusionner_tries(tries.pop(), nouveau)
+                tries.append(nouveau)
+        identifiants = array('q')
+        while tries:
+            identifiants = fusionner_tries(tries.pop(), identifiants)
+        return identifiants
+
+    def paquets(self, fichier, type_cases):
+        """Relit un fichier temporaire par paquets d'extrémités."""
+        fichier.seek(0)
+        taille = 2 * self.taille_paquet * array(type_cases).itemsize
+        while True:
+            octets = fichier.read(taille)
+            if not octets:
+                return
+            yield array(type_cases, octets)
+
+    def numeroter(self, extremites, numeros):
+        identifiants = self.identifiants
+        degres = array('q', [0]) * (len(identifiants) + 1)
+        for paquet in self.paquets(extremites, 'q'):
+            indices = array('i', (bisect.bisect_left(identifiants, u) for u in paquet))
+            for k in range(0, len(indices), 2):
+                u, v = indices[k], indices[k + 1]
+                if u != v:
+                    degres[u + 1] += 1
+                    degres[v + 1] += 1
+            indices.tofile(numeros)
+        for i in range(1, len(degres)):
+            degres[i] += degres[i - 1]
+        return degres
+
+    def remplir(self, numeros, degres):
+        self.debuts = self.stockage.tableau('q', len(degres))
+        self.debuts[:] = degres
+        self.cibles = self.stockage.tableau('i', degres[-1])
+        cibles = self.cibles
+        # degres devient la prochaine case libre de chaque sommet
+        for paquet in self.paquets(numeros, 'i'):
+            for k in range(0, len(paquet), 2):
+                u, v = paquet[k], paquet[k + 1]
+                if u != v:
+                    cibles[degres[u]] = v
+                    degres[u] += 1
+                    cibles[degres[v]] = u
+                    degres[v] += 1
+        self.nb_aretes = len(cibles) // 2
+
+    def identifiant(self, sommet):
+        """Renvoie l'identifiant de la station numéro sommet."""
+        return self.identifiants[sommet]
+
+    def indice(self, identifiant):
+        """Renvoie le numéro de la station d'identifiant donné; s'il n'existe
+        pas, provoque une erreur."""
+        i = bisect.bisect_left(self.identifiants, identifiant)
+        if i == len(self.identifiants) or self.identifiants[i] != identifiant:
+            raise KeyError(identifiant)
+        return i
+
+    def nombre_aretes(self):
+        """Renvoie le nombre d'arêtes (boucles exclues)."""
+        return self.nb_aretes
+
+    def nombre_sommets(self):
+        """Renvoie le nombre de sommets du graphe."""
+        return len(self.identifiants)
+
+    def sommets(self):
+        """Renvoie les numéros des sommets."""
+        return range(self.nombre_sommets())
+
+    def voisins_indices(self, sommet):
+        """Renvoie les numéros des voisins du sommet donné."""
+        return self.cibles[self.debuts[sommet]:self.debuts[sommet + 1]]
+
+    def voisins(self, sommet):
+        """Renvoie la liste des voisins du sommet donné, sous la forme de
+        couples (voisin, ligne) comme dans Graphe, sans nom de ligne."""
+        return [(v, None) for v in self.voisins_indices(sommet)]
@@ -12,23 +12,151 @@ Auteur : Gérald LIN
 """
 Implémentation d'un graphe non orienté à l'aide d'un dictionnaire: les clés
 sont les sommets, et les valeurs sont les sommets adjacents à un sommet donné.
-Les boucles sont autorisées. Les poids ne sont pas autorisés.
+Les boucles sont autorisées. Chaque arête peut porter une durée de parcours
+(voir duree()), conservée à part dans un dictionnaire.
 
 On utilise la représentation la plus simple: une arête {u, v} sera présente
 deux fois dans le dictionnaire: v est dans l'ensemble des voisins de u, et u
 est dans l'ensemble des voisins de v.
 """
 
+from array import array
 
-class Graphe(object):
+
+def cle_arete(u, v, ligne):
+    """Renvoie la clé (a, b, ligne) de l'arête {u, v}, avec a <= b comme dans
+    aretes()."""
+    return (u, v, ligne) if u <= v else (v, u, ligne)
+
+
+class EnsemblesDisjoints(object):
+    """Structure union-find : partition d'un ensemble d'éléments hashables,
+    avec compression des chemins et union par rang. Les opérations trouver et
+    unir se font en temps quasi constant (amorti)."""
+
+    def __init__(self, elements=()):
+        """Initialise la partition en singletons des éléments donnés."""
+        self.parent = dict()
+        self.rang = dict()
+        for x in elements:
+            self.ajouter(x)
+
+    def ajouter(self, x):
+        """Ajoute l'élément x dans un nouvel ensemble s'il est absent."""
+        if x not in self.parent:
+            self.parent[x] = x
+            self.rang[x] = 0
+
+    def trouver(self, x):
+        """Renvoie le représentant de l'ensemble contenant x."""
+        racine = x
+        while self.parent[racine] != racine:
+            racine = self.parent[racine]
+        # compression du chemin parcouru
+        while self.parent[x] != racine:
+            self.parent[x], x = racine, self.parent[x]
+        return racine
+
+    def unir(self, x, y):
+        """Fusionne les ensembles contenant x et y. Renvoie True s'ils étaient
+        distincts, False sinon."""
+        x, y = self.trouver(x), self.trouver(y)
+        if x == y:
+            return False
+        # le représentant de rang le plus élevé devient la racine
+        if self.rang[x] < self.rang[y]:
+            x, y = y, x
+        self.parent[y] = x
+        if self.rang[x] == self.rang[y]:
+            self.rang[x] += 1
+        return True
+
+
+class CacheAnalyses(object):
+    """Mémorisation des résultats d'analyse d'un graphe (numérotations, ponts,
+    points d'articulation, ...). La classe qui en hérite tient à jour un
+    compteur version, incrémenté à chaque modification du graphe : les
+    résultats mémorisés pour une version antérieure sont oubliés."""
+
+    def memoriser(self, cle, calcul):
+        """Renvoie le résultat mémorisé sous la clé donnée pour la version
+        actuelle du graphe, en l'obtenant par calcul() s'il est absent.
+        Le résultat est partagé entre les appelants : il ne doit pas être
+        modifié."""
+        if self.version_analyses != self.version:
+            self.analyses = dict()
+            self.version_analyses = self.version
+
+        if cle in self.analyses:
+            self.succes_cache += 1
+        else:
+            self.echecs_cache += 1
+            self.analyses[cle] = calcul()
+        return self.analyses[cle]
+
+    def oublier(self, cle, resultat):
+        """Oublie le résultat mémorisé sous la clé donnée, s'il s'agit
+        toujours de resultat (par exemple un calcul qui a échoué)."""
+        if self.version_analyses == self.version and self.analyses.get(cle) is resultat:
+            del self.analyses[cle]
+
+    def composante(self, sommet):
+        """Renvoie le représentant de la composante connexe du sommet : deux
+        sommets sont dans la même composante si et seulement s'ils ont le même
+        représentant. L'index des composantes (attribut composantes) est
+        construit à la première demande à partir de sommets() et aretes(), et
+        la classe qui en hérite le remet à None quand il doit être recalculé."""
+        if self.composantes is None:
+            self.composantes = EnsemblesDisjoints(self.sommets())
+            for u, v, __not_used__ in self.aretes():
+                self.composantes.unir(u, v)
+        return self.composantes.trouver(sommet)
+
+    def statistiques_cache(self):
+        """Renvoie le nombre de résultats servis par le cache (succes) et le
+        nombre de résultats calculés (echecs)."""
+        return {'succes': self.succes_cache, 'echecs': self.echecs_cache}
+
+    def vider_cache(self):
+        """Oublie tous les résultats mémorisés et remet les compteurs à zéro."""
+        self.analyses = dict()
+        self.version_analyses = self.version
+        self.succes_cache = 0
+        self.echecs_cache = 0
+
+
+class Graphe(CacheAnalyses):
     def __init__(self):
         """Initialise un graphe sans arêtes"""
         self.dictionnaire = dict()
         self.noms = dict()
+        # index des composantes connexes, tenu à jour lors des ajouts
+        # (None s'il doit être recalculé après un retrait)
+        self.composantes = EnsemblesDisjoints()
+        # objets prévenus des modifications du graphe (voir abonner())
+        self.observateurs = list()
+        # ensemble des arêtes, calculé à la demande (None après une modification)
+        self.cache_aretes = None
+        # durée de parcours des arêtes qui en ont une (voir cle_arete())
+        self.durees = dict()
+        # index des arêtes par ligne : ligne -> ensemble des couples (a, b)
+        # avec a <= b, tenu à jour lors des ajouts et des retraits
+        self.index_lignes = dict()
+        # numéro de version, incrémenté à chaque modification du graphe
+        self.version = 0
+        self.vider_cache()
+
+    def abonner(self, observateur):
+        """Enregistre un observateur des modifications du graphe. Sa méthode
+        avant_ajout_arete(u, v) est appelée avant chaque ajout d'arête, et sa
+        méthode apres_retrait() après chaque retrait d'arête ou de sommet."""
+        self.observateurs.append(observateur)
 
-    def ajouter_arete(self, u, v, ligne):
+    def ajouter_arete(self, u, v, ligne, duree=None):
         """Ajoute une arête entre les sommmets u et v, en créant les sommets
-        manquants le cas échéant."""
+        manquants le cas échéant. La durée de parcours est facultative."""
+        for observateur in self.observateurs:
+            observateur.avant_ajout_arete(u, v)
         # vérification de l'existence de u et v, et création(s) sinon
         if u not in self.dictionnaire:
             self.dictionnaire[u] = set()
@@ -39,13 +167,54 @@ class Graphe(object):
         # ajout de u (resp. v) parmi les voisins de v (resp. u)
         self.dictionnaire[u].add((v, ligne))
         self.dictionnaire[v].add((u, ligne))
+        self.index_lignes.setdefault(ligne, set()).add((u, v) if u <= v else (v, u))
+        if duree is not None:
+            self.durees[cle_arete(u, v, ligne)] = duree
+        self.marquer_modification()
+        if self.composantes is not None:
+            self.composantes.ajouter(u)
+            self.composantes.ajouter(v)
+            self.composantes.unir(u, v)
 
     def ajouter_aretes(self, iterable):
         """Ajoute toutes les arêtes de l'itérable donné au graphe. N'importe
         quel type d'itérable est acceptable, mais il faut qu'il ne contienne
         que des couples d'éléments (quel que soit le type du couple)."""
+        # les observateurs doivent être prévenus de chaque ajout
+        if self.observateurs:
+            for u, v, ligne in iterable:
+                self.ajouter_arete(u, v, ligne)
+            return
+
+        # insertion en masse : mêmes opérations que ajouter_arete sans appel de
+        # méthode par arête, l'index des composantes étant recalculé à la demande
+        dictionnaire, noms, index_lignes = self.dictionnaire, self.noms, self.index_lignes
         for u, v, ligne in iterable:
-            self.ajouter_arete(u, v, ligne)
+            if u not in dictionnaire:
+                dictionnaire[u] = set()
+                noms[u] = None
+            if v not in dictionnaire:
+                dictionnaire[v] = set()
+                noms[v] = None
+            dictionnaire[u].add((v, ligne))
+            dictionnaire[v].add((u, ligne))
+            if ligne not in index_lignes:
+                index_lignes[ligne] = set()
+            index_lignes[ligne].add((u, v) if u <= v else (v, u))
+        self.composantes = None
+        self.marquer_modification()
+
+    def ajouter_aretes_ponderees(self, iterable):
+        """Ajoute les arêtes de l'itérable donné, qui contient des quadruplets
+        (u, v, ligne, duree), en mémorisant leurs durées de parcours."""
+        durees = self.durees
+
+        def triplets():
+            for u, v, ligne, duree in iterable:
+                durees[cle_arete(u, v, ligne)] = duree
+                yield u, v, ligne
+
+        self.ajouter_aretes(triplets())
 
     def ajouter_sommet(self, sommet):
         """Ajoute un sommet (de n'importe quel type hashable) au graphe."""
@@ -53,31 +222,43 @@ class Graphe(object):
         if u not in self.dictionnaire:
             self.dictionnaire[u] = set()
             self.noms[u] = nom
+            self.marquer_modification()
+            if self.composantes is not None:
+                self.composantes.ajouter(u)
 
     def ajouter_sommets(self, iterable):
         """Ajoute tous les sommets de l'itérable donné au graphe. N'importe
         quel type d'itérable est acceptable, mais il faut qu'il ne contienne
         que des éléments hashables."""
-        for sommet in iterable:
-            self.ajouter_sommet(sommet)
+        dictionnaire, noms = self.dictionnaire, self.noms
+        for u, nom in iterable:
+            if u not in dictionnaire:
+                dictionnaire[u] = set()
+                noms[u] = nom
+                if self.composantes is not None:
+                    self.composantes.ajouter(u)
+        self.marquer_modification()
 
     def aretes(self):
         """Renvoie l'ensemble des arêtes du graphe. Une arête est représentée
         par un tuple (a, b) avec a <= b afin de permettre le renvoi de boucles.
+        L'ensemble est conservé jusqu'à la prochaine modification du graphe.
         """
-        res = set()
-        for u in self.dictionnaire:
-            for v, ligne in self.dictionnaire[u]:
-                tmp = sorted((u, v))
-                tmp.append(ligne)
-                res.add(tuple(tmp))
-
-        return res
+        if self.cache_aretes is None:
+            # chaque arête est vue depuis ses deux extrémités : on ne la garde
+            # que depuis la plus petite, ce qui évite tout tri
+            self.cache_aretes = frozenset(
+                (u, v, ligne)
+                for u, voisins in self.dictionnaire.items()
+                for v, ligne in voisins
+                if u <= v
+            )
+        return self.cache_aretes
 
     def boucles(self):
         """Renvoie les boucles du graphe, c'est-à-dire les arêtes reliant un
         sommet à lui-même."""
-        return {(u, u) for u in self.dictionnaire if u in self.dictionnaire[u]}
+        return {(u, u) for u, v, __not_used__ in self.aretes() if u == v}
 
     def contient_arete(self, u, v, ligne):
         """Renvoie True si l'arête {u, v} existe, False sinon."""
@@ -96,6 +277,44 @@ class Graphe(object):
             raise ValueError("Le sommet n'existe pas.")
         return len(self.dictionnaire[sommet])
 
+    def duree(self, u, v, ligne):
+        """Renvoie la durée de parcours de l'arête {u, v} de la ligne donnée
+        (1 si elle n'en a pas)."""
+        return self.durees.get(cle_arete(u, v, ligne), 1)
+
+    def identifiant(self, sommet):
+        """Renvoie l'identifiant de la station du sommet, c'est-à-dire le
+        sommet lui-même (comme GrapheCompact.identifiant())."""
+        return sommet
+
+    def indice(self, identifiant):
+        """Renvoie le sommet d'identifiant donné, c'est-à-dire l'identifiant
+        lui-même (comme GrapheCompact.indice()); s'il n'existe pas, provoque
+        une erreur."""
+        if not self.contient_sommet(identifiant):
+            raise KeyError(identifiant)
+        return identifiant
+
+    def lignes(self):
+        """Renvoie l'ensemble des noms des lignes qui ont au moins une arête."""
+        return set(self.index_lignes)
+
+    def aretes_ligne(self, ligne):
+        """Renvoie les arêtes de la ligne donnée, sous la forme de couples
+        (a, b) avec a <= b (ensemble vide pour une ligne inconnue). L'ensemble
+        est celui de l'index : il ne doit pas être modifié."""
+        return self.index_lignes.get(ligne, frozenset())
+
+    def marquer_modification(self):
+        """Signale une modification du graphe : la version est incrémentée et
+        les résultats calculés sur la version précédente seront recalculés."""
+        self.version += 1
+        self.cache_aretes = None
+
+    def meme_composante(self, u, v):
+        """Renvoie True si les sommets u et v sont reliés par un chemin."""
+        return self.composante(u) == self.composante(v)
+
     def nombre_aretes(self):
         """Renvoie le nombre d'arêtes du graphe."""
         # attention à la division par 2 (chaque arête étant comptée deux fois)
@@ -115,7 +334,21 @@ class Graphe(object):
             raise ValueError("Le sommet est invalide.")
             
         self.dictionnaire[u].remove((v, ligne))  # plante si u ou v n'existe pas
-        self.dictionnaire[v].remove((u, ligne))  # plante si u ou v n'existe pas
+        if u != v:  # une boucle n'est présente qu'une fois
+            self.dictionnaire[v].remove((u, ligne))
+        self.durees.pop(cle_arete(u, v, ligne), None)
+        self.retirer_index_ligne(u, v, ligne)
+        self.marquer_modification()
+        # un retrait peut scinder une composante : l'index sera recalculé
+        self.composantes = None
+        for observateur in self.observateurs:
+            observateur.apres_retrait()
+
+    def retirer_index_ligne(self, u, v, ligne):
+        aretes = self.index_lignes[ligne]
+        aretes.discard((u, v) if u <= v else (v, u))
+        if not aretes:
+            del self.index_lignes[ligne]
 
     def retirer_aretes(self, iterable):
         """Retire toutes les arêtes de l'itérable donné du graphe. N'importe
@@ -127,10 +360,19 @@ class Graphe(object):
     def retirer_sommet(self, sommet):
         """Efface le sommet du graphe, et retire toutes les arêtes qui lui
         sont incidentes."""
-        del self.dictionnaire[sommet[0]]
-        # retirer le sommet des ensembles de voisins
-        for u in self.dictionnaire:
-            self.dictionnaire[u].discard(sommet)
+        u = sommet[0]
+        # retirer le sommet des ensembles de voisins : seuls ses voisins sont
+        # concernés
+        for v, ligne in self.dictionnaire.pop(u):
+            if v != u:
+                self.dictionnaire[v].discard((u, ligne))
+            self.durees.pop(cle_arete(u, v, ligne), None)
+            self.retirer_index_ligne(u, v, ligne)
+        del self.noms[u]
+        self.marquer_modification()
+        self.composantes = None
+        for observateur in self.observateurs:
+            observateur.apres_retrait()
 
     def retirer_sommets(self, iterable):
         """Efface les sommets de l'itérable donné du graphe, et retire toutes
@@ -143,12 +385,20 @@ class Graphe(object):
         return set(self.dictionnaire.keys())
 
     def sous_graphe_induit(self, iterable):
-        """Renvoie le sous-graphe induit par l'itérable de sommets donné."""
+        """Renvoie le sous-graphe induit par l'itérable de sommets donné.
+        Seules les listes de voisins des sommets donnés sont parcourues."""
         G = Graphe()
         G.ajouter_sommets(iterable)
-        for u, v, ligne in self.aretes():
-            if G.contient_sommet(u) and G.contient_sommet(v):
-                G.ajouter_arete(u, v, ligne)
+        G.ajouter_aretes(
+            (u, v, ligne)
+            for u in G.dictionnaire
+            for v, ligne in self.dictionnaire.get(u, ())
+            if v in G.dictionnaire
+        )
+        for u, v, ligne in G.aretes():
+            cle = (u, v, ligne)
+            if cle in self.durees:
+                G.durees[cle] = self.durees[cle]
         return G
 
     def voisins(self, sommet):
@@ -156,4 +406,348 @@ class Graphe(object):
         return self.dictionnaire[sommet]
 
     def nom_sommet(self, elm):
-        return self.noms[elm]
\ No newline at end of file
+        return self.noms[elm]
+
+    def figer(self):
+        """Renvoie une copie compacte et non modifiable du graphe (voir
+        GrapheCompact)."""
+        return GrapheCompact(self)
+
+    def vue_lignes(self, lignes):
+        """Renvoie la vue du graphe restreint aux lignes données (voir
+        VueLignes), mémorisée pour la version actuelle du graphe."""
+        lignes = frozenset(lignes)
+        return self.memoriser(('vue_lignes', lignes), lambda: VueLignes(self, lignes))
+
+
+class VueLignes(CacheAnalyses):
+    """Graphe restreint aux arêtes de certaines lignes, sans copie des
+    listes de voisins.
+
+    Les sommets de la vue sont les extrémités des arêtes de ces lignes : leur
+    ensemble, seule donnée conservée par la vue, est obtenu à la première
+    consultation à partir de l'index des lignes du graphe, en un temps
+    proportionnel au nombre d'arêtes de ces seules lignes. Les voisins d'un
+    sommet sont ceux du graphe, filtrés à chaque demande selon leur ligne, et
+    les arêtes sont lues dans l'index des lignes. La vue offre les méthodes
+    de consultation de Graphe : les algorithmes (ponts(),
+    points_articulation(), ...) s'y appliquent sans modification, et leurs
+    résultats sont mémorisés par la vue.
+
+    La vue suit la version du graphe : après une modification du graphe, ses
+    sommets et ses analyses sont recalculés. Elle ne peut pas être modifiée
+    elle-même.
+    """
+
+    def __init__(self, graphe, lignes):
+        """Construit la vue du graphe restreint aux lignes données."""
+        self.graphe = graphe
+        self.lignes_vue = frozenset(lignes)
+        self.version_vue = None
+        self.vider_cache()
+
+    @property
+    def version(self):
+        return self.graphe.version
+
+    def actualiser(self):
+        """Oublie les sommets et l'index des composantes calculés si le
+        graphe a été modifié depuis leur calcul."""
+        if self.version_vue != self.graphe.version:
+            self.version_vue = self.graphe.version
+            self.ensemble_sommets = None
+            self.composantes = None
+
+    def aretes(self):
+        """Renvoie l'ensemble des arêtes de la vue, sous la forme
+        (a, b, ligne) avec a <= b, lu dans l'index des lignes du graphe."""
+        return frozenset(
+            (u, v, ligne)
+            for ligne in self.lignes_vue
+            for u, v in self.graphe.aretes_ligne(ligne)
+        )
+
+    def boucles(self):
+        """Renvoie les boucles de la vue."""
+        return {(u, u) for u, v, __not_used__ in self.aretes() if u == v}
+
+    def composante(self, sommet):
+        """Renvoie le représentant de la composante connexe du sommet dans
+        la vue (voir Graphe.composante())."""
+        self.actualiser()
+        return CacheAnalyses.composante(self, sommet)
+
+    def contient_arete(self, u, v, ligne):
+        """Renvoie True si l'arête {u, v} de la ligne donnée est dans la vue."""
+        return ligne in self.lignes_vue and self.graphe.contient_arete(u, v, ligne)
+
+    def contient_sommet(self, u):
+        """Renvoie True si le sommet u est dans la vue, False sinon."""
+        return u in self.sommets_vue()
+
+    def degre(self, sommet):
+        """Renvoie le nombre de voisins du sommet dans la vue; s'il n'y est
+        pas, provoque une erreur."""
+        if not self.contient_sommet(sommet):
+            raise ValueError("Le sommet n'existe pas.")
+        return len(self.voisins(sommet))
+
+    def duree(self, u, v, ligne):
+        """Renvoie la durée de parcours de l'arête (voir Graphe.duree())."""
+        return self.graphe.duree(u, v, ligne)
+
+    def identifiant(self, sommet):
+        """Renvoie l'identifiant de la station du sommet (le sommet lui-même)."""
+        return sommet
+
+    def indice(self, identifiant):
+        """Renvoie le sommet d'identifiant donné; s'il n'est pas dans la vue,
+        provoque une erreur."""
+        if not self.contient_sommet(identifiant):
+            raise KeyError(identifiant)
+        return identifiant
+
+    def lignes(self):
+        """Renvoie l'ensemble des lignes de la vue qui ont au moins une arête."""
+        return {ligne for ligne in self.lignes_vue if self.graphe.aretes_ligne(ligne)}
+
+    def meme_composante(self, u, v):
+        """Renvoie True si les sommets u et v sont reliés dans la vue."""
+        return self.composante(u) == self.composante(v)
+
+    def nombre_aretes(self):
+        """Renvoie le nombre d'arêtes de la vue."""
+        return sum(len(self.graphe.aretes_ligne(ligne)) for ligne in self.lignes_vue)
+
+    def nombre_boucles(self):
+        """Renvoie le nombre d'arêtes de la forme {u, u}."""
+        return len(self.boucles())
+
+    def nombre_sommets(self):
+        """Renvoie le nombre de sommets de la vue."""
+        return len(self.sommets_vue())
+
+    def sommets(self):
+        """Renvoie l'ensemble des sommets de la vue."""
+        return set(self.sommets_vue())
+
+    def sommets_vue(self):
+        """Renvoie l'ensemble (à ne pas modifier) des extrémités des arêtes
+        des lignes de la vue, calculé à la première demande."""
+        self.actualiser()
+        if self.ensemble_sommets is None:
+            self.ensemble_sommets = frozenset(
+                sommet
+                for ligne in self.lignes_vue
+                for arete in self.graphe.aretes_ligne(ligne)
+                for sommet in arete
+            )
+        return self.ensemble_sommets
+
+    def voisins(self, sommet):
+        """Renvoie l'ensemble des voisins (voisin, ligne) du sommet par les
+        lignes de la vue, filtrés parmi ceux du graphe; si le sommet n'est
+        pas dans la vue, provoque une erreur."""
+        if not self.contient_sommet(sommet):
+            raise KeyError(sommet)
+        lignes_vue = self.lignes_vue
+        return frozenset((v, ligne) for v, ligne in self.graphe.voisins(sommet) if ligne in lignes_vue)
+
+    def nom_sommet(self, elm):
+        return self.graphe.nom_sommet(elm)
+
+    def figer(self):
+        """Renvoie une copie compacte de la vue (voir GrapheCompact)."""
+        return GrapheCompact(self)
+
+
+class GrapheCompact(CacheAnalyses):
+    """Représentation figée d'un graphe, au format CSR (compressed sparse row).
+
+    Les sommets sont renumérotés de 0 à n - 1 dans l'ordre croissant de leurs
+    identifiants d'origine. Les voisins du sommet i sont les cases
+    debuts[i] à debuts[i + 1] - 1 du tableau cibles, et le nom de la ligne de
+    chaque demi-arête est donné par son numéro dans la table des lignes, sa
+    durée de parcours par la case correspondante du tableau durees.
+    Les tableaux utilisés sont des array, bien plus économes en mémoire que
+    des ensembles de tuples.
+
+    Les méthodes de consultation sont celles de Graphe : les algorithmes
+    s'appliquent donc sans modification, en manipulant les numéros de sommets.
+    Le graphe n'étant jamais modifié, sa version reste 0.
+    """
+
+    def __init__(self, graphe):
+        """Construit la version compacte du graphe donné."""
+        self.identifiants = sorted(graphe.sommets())
+        self.noms = [graphe.nom_sommet(u) for u in self.identifiants]
+        self.indices = {u: i for i, u in enumerate(self.identifiants)}
+        self.composantes = None
+        self.cache_aretes = None
+        self.version = 0
+        self.vider_cache()
+        self.lignes = list()
+        numeros_lignes = dict()
+
+        self.debuts = array('l', [0])
+        self.cibles = array('i')
+        self.etiquettes = array('i')
+        self.durees = array('d')
+        for u in self.identifiants:
+            for v, ligne in graphe.voisins(u):
+                if ligne not in numeros_lignes:
+                    numeros_lignes[ligne] = len(self.lignes)
+                    self.lignes.append(ligne)
+                self.cibles.append(self.indices[v])
+                self.etiquettes.append(numeros_lignes[ligne])
+                self.durees.append(graphe.duree(u, v, ligne))
+            self.debuts.append(len(self.cibles))
+
+    def __getstate__(self):
+        """État transmis par pickle (vers un autre processus) : les tableaux
+        du graphe, sans les résultats mémorisés."""
+        etat = dict(self.__dict__)
+        etat['analyses'] = dict()
+        etat['composantes'] = None
+        etat['cache_aretes'] = None
+        return etat
+
+    def aretes(self):
+        """Renvoie l'ensemble des arêtes du graphe, sous la forme (a, b, ligne)
+        avec a <= b."""
+        if self.cache_aretes is None:
+            lignes = self.lignes
+            self.cache_aretes = frozenset(
+                (u, v, lignes[k])
+                for u in self.sommets()
+                for v, k in zip(self.voisins_indices(u), self.etiquettes[self.debuts[u]:self.debuts[u + 1]])
+                if u <= v
+            )
+        return self.cache_aretes
+
+    def boucles(self):
+        """Renvoie les boucles du graphe."""
+        return {(u, u) for u in self.sommets() if u in self.voisins_indices(u)}
+
+    def contient_arete(self, u, v, ligne):
+        """Renvoie True si l'arête {u, v} existe, False sinon."""
+        if self.contient_sommet(u) and self.contient_sommet(v):
+            return (v, ligne) in self.voisins(u)
+        return False
+
+    def contient_sommet(self, u):
+        """Renvoie True si le sommet u existe, False sinon."""
+        return isinstance(u, int) and 0 <= u < self.nombre_sommets()
+
+    def degre(self, sommet):
+        """Renvoie le nombre de voisins du sommet; s'il n'existe pas, provoque
+        une erreur."""
+        if not self.contient_sommet(sommet):
+            raise ValueError("Le sommet n'existe pas.")
+        return self.debuts[sommet + 1] - self.debuts[sommet]
+
+    def duree(self, u, v, ligne):
+        """Renvoie la durée de parcours de l'arête {u, v} de la ligne donnée;
+        si elle n'existe pas, provoque une erreur."""
+        for k in range(self.debuts[u], self.debuts[u + 1]):
+            if self.cibles[k] == v and self.lignes[self.etiquettes[k]] == ligne:
+                return self.durees[k]
+        raise ValueError("L'arête n'existe pas.")
+
+    def identifiant(self, sommet):
+        """Renvoie l'identifiant d'origine du sommet."""
+        return self.identifiants[sommet]
+
+    def indice(self, identifiant):
+        """Renvoie le numéro du sommet d'identifiant d'origine donné."""
+        return self.indices[identifiant]
+
+    def meme_composante(self, u, v):
+        """Renvoie True si les sommets u et v sont reliés par un chemin."""
+        return self.composante(u) == self.composante(v)
+
+    def nombre_aretes(self):
+        """Renvoie le nombre d'arêtes du graphe."""
+        return len(self.cibles) // 2
+
+    def nombre_boucles(self):
+        """Renvoie le nombre d'arêtes de la forme {u, u}."""
+        return len(self.boucles())
+
+    def nombre_sommets(self):
+        """Renvoie le nombre de sommets du graphe."""
+        return len(self.identifiants)
+
+    def sommets(self):
+        """Renvoie les sommets du graphe, c'est-à-dire les entiers de 0 à
+        n - 1."""
+        return range(self.nombre_sommets())
+
+    def voisins(self, sommet):
+        """Renvoie la liste des voisins du sommet donné, sous la forme de
+        couples (voisin, ligne) comme dans Graphe."""
+        debut, fin = self.debuts[sommet], self.debuts[sommet + 1]
+        lignes = self.lignes
+        return [(v, lignes[k]) for v, k in zip(self.cibles[debut:fin], self.etiquettes[debut:fin])]
+
+    def voisins_indices(self, sommet):
+        """Renvoie le tableau des numéros des voisins du sommet donné, sans
+        les noms de lignes (parcours plus rapides)."""
+        return self.cibles[self.debuts[sommet]:self.debuts[sommet + 1]]
+
+    def nom_sommet(self, elm):
+        return self.noms[elm]
+
+    def numeros_composantes(self):
+        """Renvoie le tableau des numéros de composante connexe des sommets,
+        les composantes étant numérotées dans l'ordre de leur plus petit
+        sommet, et le nombre de composantes. Un parcours des tableaux suffit,
+        sans construire l'ensemble des arêtes."""
+        n = self.nombre_sommets()
+        debuts, cibles = self.debuts, self.cibles
+        numeros = array('i', [-1]) * n
+        nb_composantes = 0
+        for racine in range(n):
+            if numeros[racine] >= 0:
+                continue
+            numeros[racine] = nb_composantes
+            pile = [racine]
+            while pile:
+                u = pile.pop()
+                for k in range(debuts[u], debuts[u + 1]):
+                    v = cibles[k]
+                    if numeros[v] < 0:
+                        numeros[v] = nb_composantes
+                        pile.append(v)
+            nb_composantes += 1
+        return numeros, nb_composantes
+
+    def sous_graphe(self, sommets):
+        """Renvoie le sous-graphe compact induit par la liste croissante de
+        sommets donnée. Ils y sont renumérotés de 0 à len(sommets) - 1 dans
+        le même ordre, et gardent leurs identifiants et leurs noms."""
+        nouveaux = {u: i for i, u in enumerate(sommets)}
+        sous = GrapheCompact.__new__(GrapheCompact)
+        sous.identifiants = [self.identifiants[u] for u in sommets]
+        sous.noms = [self.noms[u] for u in sommets]
+        sous.indices = {u: i for i, u in enumerate(sous.identifiants)}
+        sous.composantes = None
+        sous.cache_aretes = None
+        sous.version = 0
+        sous.vider_cache()
+        sous.lignes = list(self.lignes)
+
+        sous.debuts = array('l', [0])
+        sous.cibles = array('i')
+        sous.etiquettes = array('i')
+        sous.durees = array('d')
+        debuts, cibles, etiquettes, durees = self.debuts, self.cibles, self.etiquettes, self.durees
+        for u in sommets:
+            for k in range(debuts[u], debuts[u + 1]):
+                v = nouveaux.get(cibles[k])
+                if v is not None:
+                    sous.cibles.append(v)
+                    sous.etiquettes.append(etiquettes[k])
+                    sous.durees.append(durees[k])
+            sous.debuts.append(len(sous.cibles))
+        return sous
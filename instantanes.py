@@ -0,0 +1,236 @@
+"""
+
+Mini-projet d'algo des graphes : renforcement d'un réseau
+Auteur : Gérald LIN
+
+Instantanés d'un réseau : enregistrement d'un graphe complet (stations, noms,
+adjacence, lignes, durées) et des analyses déjà calculées dans un fichier
+binaire, relu sans copie par projection en mémoire (mmap).
+
+"""
+
+from graphe import *
+from array import array
+import itertools
+import json
+import mmap
+import struct
+import sys
+import zlib
+
+
+# Format d'un instantané :
+#   - un en-tête : signature, version du format, boutisme, nombre de sections,
+#     somme de contrôle CRC-32 et taille du reste du fichier,
+#   - la table des sections : nom, position et taille de chacune,
+#   - les sections, alignées sur 8 octets :
+#       identifiants   identifiants des stations, triés (entiers sur 8 octets)
+#       fins_noms      position de fin du nom de chaque station (en caractères)
+#       noms           noms des stations mis bout à bout (UTF-8)
+#       lignes         table des noms de lignes (JSON)
+#       debuts, cibles, etiquettes, durees
+#                      adjacence au format CSR de GrapheCompact
+#     et, si elles avaient été calculées, les analyses (avec les numéros des
+#     sommets dans l'ordre des identifiants, -1 pour l'absence de parent) :
+#       debut, parent, ancetre   numérotations()
+#       ponts                    extrémités des ponts, deux cases par pont
+#       articulations            points d'articulation
+# La somme de contrôle porte sur tout ce qui suit l'en-tête.
+
+INSTANTANE_MAGIQUE = b'RSXS'
+INSTANTANE_VERSION = 1
+INSTANTANE_ENTETE = struct.Struct('<4sHBxIIQ')
+INSTANTANE_SECTION = struct.Struct('<16sQQ')
+
+# nom absent (station créée par une arête) : un caractère nul dans le fichier
+NOM_ABSENT = '\x00'
+
+TYPES_SECTIONS = {
+    'identifiants': 'q', 'fins_noms': 'I', 'debuts': 'q', 'cibles': 'i', 'etiquettes': 'i',
+    'durees': 'd', 'debut': 'i', 'parent': 'i', 'ancetre': 'i', 'ponts': 'i', 'articulations': 'i',
+}
+
+
+class InstantaneInvalide(ValueError):
+    """Fichier qui n'est pas un instantané lisible : signature, version ou
+    somme de contrôle incorrecte."""
+
+
+# Renvoie les analyses mémorisées par le graphe pour sa version actuelle,
+# traduites en numéros de sommets du graphe compact.
+def analyses_compactes(graphe, compact):
+    analyses = graphe.analyses if graphe.version_analyses == graphe.version else dict()
+    numero = (lambda u: u) if graphe is compact else compact.indices.__getitem__
+    n = compact.nombre_sommets()
+    sections = dict()
+
+    if 'numerotations' in analyses:
+        debut, parent, ancetre = analyses['numerotations']
+        tableaux = array('i', [0]) * n, array('i', [-1]) * n, array('i', [0]) * n
+        for u in debut:
+            i = numero(u)
+            tableaux[0][i] = debut[u]
+            tableaux[1][i] = -1 if parent[u] is None else numero(parent[u])
+            tableaux[2][i] = ancetre[u]
+        sections['debut'], sections['parent'], sections['ancetre'] = tableaux
+    if 'ponts' in analyses:
+        sections['ponts'] = array('i', (numero(u) for pont in sorted(analyses['ponts'], key=repr) for u in pont))
+    if 'points_articulation' in analyses:
+        sections['articulations'] = array('i', sorted(numero(u) for u in analyses['points_articulation']))
+    return sections
+
+
+# Enregistre le graphe (Graphe ou GrapheCompact) dans un instantané, avec les
+# analyses qu'il a déjà mémorisées (numérotations, ponts, points
+# d'articulation). Les identifiants des stations doivent être des entiers.
+def enregistrer_instantane(graphe, fichier):
+    compact = graphe if isinstance(graphe, GrapheCompact) else graphe.figer()
+    if not all(isinstance(u, int) for u in compact.identifiants):
+        raise TypeError('Les identifiants des stations doivent être des entiers.')
+
+    noms = [NOM_ABSENT if nom is None else nom for nom in (compact.nom_sommet(i) for i in compact.sommets())]
+    sections = {
+        'identifiants': array('q', compact.identifiants),
+        'fins_noms': array('I', itertools.accumulate(map(len, noms))),
+        'noms': ''.join(noms).encode('utf-8'),
+        'lignes': json.dumps(list(compact.lignes), ensure_ascii=False).encode('utf-8'),
+        'debuts': array('q', compact.debuts),
+        'cibles': array('i', compact.cibles),
+        'etiquettes': array('i', compact.etiquettes),
+        'durees': array('d', compact.durees),
+    }
+    sections.update(analyses_compactes(graphe, compact))
+
+    # position de chaque section, après l'en-tête et la table
+    position = INSTANTANE_ENTETE.size + INSTANTANE_SECTION.size * len(sections)
+    table, corps = list(), list()
+    for nom, contenu in sections.items():
+        octets = contenu.tobytes() if isinstance(contenu, array) else contenu
+        remplissage = -position % 8
+        position += remplissage
+        table.append(INSTANTANE_SECTION.pack(nom.encode('ascii'), position, len(octets)))
+        corps.append(b'\0' * remplissage)
+        corps.append(octets)
+        position += len(octets)
+
+    charge = b''.join(table + corps)
+    entete = INSTANTANE_ENTETE.pack(INSTANTANE_MAGIQUE, INSTANTANE_VERSION, sys.byteorder == 'little',
+                                    len(sections), zlib.crc32(charge), len(charge))
+    with open(fichier, 'wb') as my_file:
+        my_file.write(entete)
+        my_file.write(charge)
+
+
+class GrapheInstantane(GrapheCompact):
+    """Graphe compact relu depuis un instantané.
+
+    Le fichier est projeté en mémoire : les tableaux de l'adjacence sont des
+    vues sur cette projection, sans copie, et les pages ne sont lues qu'à
+    leur premier accès. Les noms des stations ne sont décodés qu'à la
+    première demande, et les analyses enregistrées ne sont reconstruites que
+    lorsqu'un algorithme les demande (voir memoriser()) : afficher les ponts
+    d'un réseau déjà analysé ne demande ni parcours ni construction du graphe.
+    """
+
+    def __init__(self, fichier, verifier=True):
+        """Ouvre l'instantané. Avec verifier=True, la somme de contrôle est
+        vérifiée (lecture de tout le fichier) ; une erreur InstantaneInvalide
+        est levée si le fichier n'est pas un instantané valide."""
+        with open(fichier, 'rb') as my_file:
+            try:
+                self.projection = mmap.mmap(my_file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise InstantaneInvalide('Fichier vide.')
+        vue = memoryview(self.projection)
+
+        try:
+            magique, version, petit_boutiste, nb_sections, somme, taille = INSTANTANE_ENTETE.unpack_from(vue)
+        except struct.error:
+            raise InstantaneInvalide('Fichier trop court.')
+        if magique != INSTANTANE_MAGIQUE or version != INSTANTANE_VERSION:
+            raise InstantaneInvalide("Ce fichier n'est pas un instantané (version {}).".format(INSTANTANE_VERSION))
+        if len(vue) != INSTANTANE_ENTETE.size + taille or \
+           (verifier and zlib.crc32(vue[INSTANTANE_ENTETE.size:]) != somme):
+            raise InstantaneInvalide("La somme de contrôle de l'instantané est incorrecte.")
+
+        self.sections = dict()
+        for k in range(nb_sections):
+            nom, position, longueur = INSTANTANE_SECTION.unpack_from(vue, INSTANTANE_ENTETE.size + k * INSTANTANE_SECTION.size)
+            nom = nom.rstrip(b'\0').decode('ascii')
+            octets = vue[position:position + longueur]
+            if nom in TYPES_SECTIONS:
+                octets = self.tableau(octets, TYPES_SECTIONS[nom], bool(petit_boutiste))
+            self.sections[nom] = octets
+
+        self.identifiants = self.sections['identifiants']
+        self.debuts = self.sections['debuts']
+        self.cibles = self.sections['cibles']
+        self.etiquettes = self.sections['etiquettes']
+        self.durees = self.sections['durees']
+        self.lignes = json.loads(bytes(self.sections['lignes']).decode('utf-8'))
+        self.noms_decodes = None
+        self.indices_calcules = None
+        self.composantes = None
+        self.cache_aretes = None
+        self.version = 0
+        self.vider_cache()
+
+    @staticmethod
+    def tableau(octets, type_cases, petit_boutiste):
+        """Renvoie une vue typée sur les octets, ou une copie retournée si le
+        fichier a été écrit sur une machine de boutisme différent."""
+        if petit_boutiste == (sys.byteorder == 'little'):
+            return octets.cast(type_cases)
+        res = array(type_cases, bytes(octets))
+        res.byteswap()
+        return res
+
+    @property
+    def noms(self):
+        if self.noms_decodes is None:
+            texte = bytes(self.sections['noms']).decode('utf-8')
+            self.noms_decodes = list()
+            debut = 0
+            for fin in self.sections['fins_noms']:
+                nom = texte[debut:fin]
+                self.noms_decodes.append(None if nom == NOM_ABSENT else nom)
+                debut = fin
+        return self.noms_decodes
+
+    @property
+    def indices(self):
+        if self.indices_calcules is None:
+            self.indices_calcules = {u: i for i, u in enumerate(self.identifiants)}
+        return self.indices_calcules
+
+    def analyses_enregistrees(self):
+        """Renvoie les noms des analyses présentes dans l'instantané."""
+        res = list()
+        for cle, section in (('numerotations', 'debut'), ('ponts', 'ponts'), ('points_articulation', 'articulations')):
+            if section in self.sections:
+                res.append(cle)
+        return res
+
+    def memoriser(self, cle, calcul):
+        """Comme CacheAnalyses.memoriser(), mais une analyse enregistrée dans
+        l'instantané est reconstruite depuis le fichier au lieu d'être
+        calculée."""
+        if self.version_analyses == self.version and cle not in self.analyses \
+           and cle in self.analyses_enregistrees():
+            self.analyses[cle] = self.lire_analyse(cle)
+        return GrapheCompact.memoriser(self, cle, calcul)
+
+    def lire_analyse(self, cle):
+        sections = self.sections
+        if cle == 'numerotations':
+            parent = {i: (None if p < 0 else p) for i, p in enumerate(sections['parent'])}
+            return dict(enumerate(sections['debut'])), parent, dict(enumerate(sections['ancetre']))
+        if cle == 'ponts':
+            extremites = sections['ponts']
+            return frozenset(zip(extremites[0::2], extremites[1::2]))
+        return frozenset(sections['articulations'])
+
+
+def charger_instantane(fichier, verifier=True):
+    """Relit un instantané enregistré par enregistrer_instantane()."""
+    return GrapheInstantane(fichier, verifier)
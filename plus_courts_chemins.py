@@ -0,0 +1,227 @@
+"""
+
+Mini-projet d'algo des graphes : renforcement d'un réseau
+Auteur : Gérald LIN
+
+Durées de trajet entre stations : algorithme de Dijkstra (tas binaire) et
+index de repères (ALT : A*, repères et inégalité triangulaire).
+
+"""
+
+from graphe import *
+from array import array
+import heapq
+
+
+# pénalité (en secondes) d'un changement de ligne
+PENALITE_CORRESPONDANCE = 120
+
+INFINI = float('inf')
+
+
+class ReseauPondere(object):
+    """Graphe des états d'un réseau pondéré, au format CSR.
+
+    Un voyageur est dans l'état (station, ligne) lorsqu'il se trouve à la
+    station à bord de la ligne. Les états de deux stations voisines sur une
+    ligne sont reliés par la durée de parcours de la connexion. Chaque station
+    a de plus un état "gare" (sans ligne), relié à chacun de ses états par une
+    demi-pénalité : changer de ligne (descendre puis remonter) coûte ainsi une
+    pénalité complète. Le graphe des états reste non orienté, ce qui permet
+    d'utiliser les mêmes distances aux repères dans les deux sens.
+
+    Un trajet part de la gare de départ et arrive à la gare d'arrivée : la
+    montée initiale et la descente finale, qui coûtent une pénalité à elles
+    deux, sont retirées de la durée renvoyée.
+
+    Les gares sont les états 0 à n - 1, dans l'ordre croissant des
+    identifiants des stations ; les voisins de l'état x sont les cases
+    debuts[x] à debuts[x + 1] - 1 des tableaux cibles et poids.
+    """
+
+    def __init__(self, graphe, penalite=PENALITE_CORRESPONDANCE):
+        """Construit le graphe des états du graphe donné (les durées des
+        connexions sont données par graphe.duree())."""
+        self.penalite = penalite
+        self.gares = sorted(graphe.sommets())
+        self.numeros = {u: i for i, u in enumerate(self.gares)}
+        # station (numéro de gare) et ligne de chaque état
+        self.stations = array('i', range(len(self.gares)))
+        self.lignes = [None] * len(self.gares)
+        numeros_etats = dict()
+
+        def etat(u, ligne):
+            if (u, ligne) not in numeros_etats:
+                numeros_etats[(u, ligne)] = len(self.lignes)
+                self.stations.append(self.numeros[u])
+                self.lignes.append(ligne)
+            return numeros_etats[(u, ligne)]
+
+        liens = list()
+        for u, v, ligne in sorted(graphe.aretes(), key=repr):
+            if u != v:
+                liens.append((etat(u, ligne), etat(v, ligne), graphe.duree(u, v, ligne)))
+        for x in range(len(self.gares), len(self.lignes)):
+            liens.append((self.stations[x], x, penalite / 2))
+
+        # passage au format CSR : degrés, positions de départ, remplissage
+        degres = array('l', [0]) * (len(self.lignes) + 1)
+        for a, b, __not_used__ in liens:
+            degres[a + 1] += 1
+            degres[b + 1] += 1
+        for x in range(1, len(degres)):
+            degres[x] += degres[x - 1]
+        self.debuts = array('l', degres)
+        self.cibles = array('i', [0]) * degres[-1]
+        self.poids = array('d', [0]) * degres[-1]
+        for a, b, duree in liens:
+            for x, y in ((a, b), (b, a)):
+                self.cibles[degres[x]] = y
+                self.poids[degres[x]] = duree
+                degres[x] += 1
+
+    def nombre_etats(self):
+        """Renvoie le nombre d'états (gares comprises)."""
+        return len(self.lignes)
+
+    def distances(self, source):
+        """Renvoie le tableau des distances de l'état source à tous les états
+        (INFINI pour les états inaccessibles)."""
+        dist = array('d', [INFINI]) * self.nombre_etats()
+        dist[source] = 0.0
+        tas = [(0.0, source)]
+        debuts, cibles, poids = self.debuts, self.cibles, self.poids
+
+        while tas:
+            d, x = heapq.heappop(tas)
+            if d > dist[x]:
+                continue
+            for k in range(debuts[x], debuts[x + 1]):
+                y = cibles[k]
+                nd = d + poids[k]
+                if nd < dist[y]:
+                    dist[y] = nd
+                    heapq.heappush(tas, (nd, y))
+        return dist
+
+    def recherche(self, source, cible, potentiel=None):
+        """Recherche un plus court chemin de l'état source à l'état cible.
+        Sans potentiel, c'est l'algorithme de Dijkstra arrêté dès que la cible
+        est atteinte ; avec un potentiel (minorant cohérent de la distance à la
+        cible), c'est l'algorithme A*. Renvoie la distance (INFINI si la cible
+        est inaccessible) et le dictionnaire des prédécesseurs."""
+        dist = {source: 0.0}
+        pred = {source: None}
+        tas = [(0.0 if potentiel is None else potentiel(source), source)]
+        fermes = set()
+        debuts, cibles, poids = self.debuts, self.cibles, self.poids
+
+        while tas:
+            __not_used__, x = heapq.heappop(tas)
+            if x in fermes:
+                continue
+            if x == cible:
+                return dist[x], pred
+            fermes.add(x)
+            d = dist[x]
+            for k in range(debuts[x], debuts[x + 1]):
+                y = cibles[k]
+                nd = d + poids[k]
+                if nd < dist.get(y, INFINI):
+                    dist[y] = nd
+                    pred[y] = x
+                    heapq.heappush(tas, (nd if potentiel is None else nd + potentiel(y), y))
+        return INFINI, pred
+
+    def trajet(self, depart, arrivee, potentiel=None):
+        """Renvoie la durée du trajet le plus court de la station depart à la
+        station arrivee (None si elles ne sont pas reliées), et la liste des
+        étapes (station, ligne) de ce trajet."""
+        s, t = self.numeros[depart], self.numeros[arrivee]
+        if s == t:
+            return 0, [(depart, None)]
+        d, pred = self.recherche(s, t, potentiel)
+        if d == INFINI:
+            return None, []
+
+        etapes = list()
+        x = pred[t]
+        while x != s:
+            if x >= len(self.gares):
+                etapes.append((self.gares[self.stations[x]], self.lignes[x]))
+            x = pred[x]
+        etapes.reverse()
+        return d - self.penalite, etapes
+
+    def duree_trajet(self, depart, arrivee):
+        """Renvoie la durée du trajet le plus court de la station depart à la
+        station arrivee (None si elles ne sont pas reliées)."""
+        return self.trajet(depart, arrivee)[0]
+
+
+class IndexReperes(object):
+    """Index de repères pour les requêtes répétées (ALT).
+
+    Les distances de quelques gares repères à tous les états sont calculées
+    une fois pour toutes. Par l'inégalité triangulaire, |d(L, t) - d(L, x)|
+    minore la distance de x à t pour tout repère L : ce minorant guide la
+    recherche A*, qui n'explore alors qu'une petite partie du réseau et donne
+    les mêmes durées que Dijkstra.
+
+    Les repères sont choisis loin les uns des autres : chaque nouveau repère
+    est la gare la plus éloignée des repères déjà choisis (une gare
+    inaccessible depuis ceux-ci est prise en priorité).
+    """
+
+    def __init__(self, reseau, nb_reperes=8):
+        """Choisit les repères et calcule leurs distances à tous les états."""
+        self.reseau = reseau
+        self.reperes = list()
+        self.tables = list()
+        nb_gares = len(reseau.gares)
+        proximite = array('d', [INFINI]) * nb_gares
+
+        candidat = 0
+        for __not_used__ in range(min(nb_reperes, nb_gares)):
+            self.reperes.append(candidat)
+            table = reseau.distances(candidat)
+            self.tables.append(table)
+            for g in range(nb_gares):
+                if table[g] < proximite[g]:
+                    proximite[g] = table[g]
+            candidat = max(range(nb_gares), key=proximite.__getitem__)
+            if proximite[candidat] == 0:
+                break
+
+    def potentiel(self, cible):
+        """Renvoie la fonction minorant la distance d'un état à la cible."""
+        vers_cible = [(table, table[cible]) for table in self.tables if table[cible] != INFINI]
+
+        def minorant(x):
+            res = 0.0
+            for table, dt in vers_cible:
+                dx = table[x]
+                if dx != INFINI and abs(dt - dx) > res:
+                    res = abs(dt - dx)
+            return res
+
+        return minorant
+
+    def trajet(self, depart, arrivee):
+        """Comme ReseauPondere.trajet(), guidé par les repères."""
+        return self.reseau.trajet(depart, arrivee, self.potentiel(self.reseau.numeros[arrivee]))
+
+    def duree_trajet(self, depart, arrivee):
+        """Comme ReseauPondere.duree_trajet(), guidé par les repères."""
+        return self.trajet(depart, arrivee)[0]
+
+
+def reseau_pondere(graphe, penalite=PENALITE_CORRESPONDANCE):
+    """Renvoie le graphe des états du graphe, mémorisé pour sa version."""
+    return graphe.memoriser(('reseau_pondere', penalite), lambda: ReseauPondere(graphe, penalite))
+
+
+def index_reperes(graphe, penalite=PENALITE_CORRESPONDANCE, nb_reperes=8):
+    """Renvoie l'index de repères du graphe, mémorisé pour sa version."""
+    return graphe.memoriser(('index_reperes', penalite, nb_reperes),
+                            lambda: IndexReperes(reseau_pondere(graphe, penalite), nb_reperes))
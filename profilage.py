@@ -0,0 +1,118 @@
+"""
+
+Mini-projet d'algo des graphes : renforcement d'un réseau
+Auteur : Gérald LIN
+
+Mesures par étape du programme (--profile / --timings) : durée, pic de
+mémoire et compteurs d'opérations, affichés ou enregistrés au format JSON.
+
+"""
+
+import contextlib
+import json
+import sys
+import time
+
+
+# Compteurs d'opérations, incrémentés par les algorithmes avec compter() :
+#   - visites_dfs : sommets découverts par les parcours en profondeur,
+#   - appels_voisins : appels à la méthode voisins() du graphe profilé,
+#   - initialisations : cases initialisées par init_dict() (marquages des
+#     sommets avant chaque parcours).
+# Les compteurs ne sont incrémentés que pendant un profilage.
+COMPTEURS = dict()
+PROFILAGE_ACTIF = [False]
+
+
+def compter(nom, nombre=1):
+    if PROFILAGE_ACTIF[0]:
+        COMPTEURS[nom] = COMPTEURS.get(nom, 0) + nombre
+
+
+class Profileur(object):
+    """Mesure chaque étape délimitée par etape() : durée réelle, pic de
+    mémoire allouée (tracemalloc) et compteurs d'opérations.
+
+    Un profileur inactif ne mesure rien, ce qui permet de laisser les étapes
+    en place dans le programme sans en ralentir l'exécution. Pendant un
+    profilage, tracemalloc ralentit les allocations : les durées mesurées
+    servent à comparer les étapes et les versions entre elles.
+    """
+
+    def __init__(self, actif=True):
+        self.actif = actif
+        self.etapes = list()
+        self.graphe = None
+
+    def observer(self, graphe):
+        """Compte les appels à graphe.voisins() pendant le profilage, en
+        remplaçant la méthode par une version comptée pour ce seul objet."""
+        if not self.actif:
+            return
+        self.graphe = graphe
+        voisins = graphe.voisins
+
+        def voisins_comptes(sommet):
+            compter('appels_voisins')
+            return voisins(sommet)
+
+        graphe.voisins = voisins_comptes
+
+    @contextlib.contextmanager
+    def etape(self, nom):
+        """Mesure le bloc d'instructions qui suit (with profileur.etape(...))."""
+        if not self.actif:
+            yield
+            return
+
+        # importé seulement pour un profilage, comme platform dans
+        # ecrire_json() : le démarrage du programme reste rapide sans profilage
+        import tracemalloc
+        COMPTEURS.clear()
+        PROFILAGE_ACTIF[0] = True
+        tracemalloc.start()
+        tracemalloc.reset_peak()
+        depart = time.perf_counter()
+        try:
+            yield
+        finally:
+            duree = time.perf_counter() - depart
+            pic = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            PROFILAGE_ACTIF[0] = False
+            self.etapes.append({
+                'etape': nom,
+                'secondes': duree,
+                'pic_memoire': pic,
+                'compteurs': dict(sorted(COMPTEURS.items())),
+            })
+
+    def terminer(self):
+        """Rend au graphe observé sa méthode voisins() d'origine."""
+        if self.graphe is not None and 'voisins' in vars(self.graphe):
+            del self.graphe.voisins
+        self.graphe = None
+
+    def afficher(self, sortie=sys.stdout):
+        """Affiche un tableau des étapes mesurées."""
+        print('\nProfil des étapes (durée, pic de mémoire, compteurs):', file=sortie)
+        for res in self.etapes:
+            compteurs = ' '.join('{}={}'.format(cle, valeur) for cle, valeur in res['compteurs'].items())
+            print('\t{:<32} {:9.4f} s {:10.1f} Kio  {}'.format(
+                res['etape'], res['secondes'], res['pic_memoire'] / 1024, compteurs), file=sortie)
+
+    def ecrire_json(self, fichier, **contexte):
+        """Enregistre les mesures au format JSON, avec le contexte donné
+        (taille du réseau, ...) et des informations sur l'exécution, afin de
+        suivre l'évolution des performances d'une version à l'autre."""
+        import platform
+        donnees = {
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'commande': sys.argv,
+            'python': platform.python_version(),
+            'plateforme': platform.platform(),
+            'etapes': self.etapes,
+        }
+        donnees.update(contexte)
+        with open(fichier, 'w', encoding='utf-8') as my_file:
+            json.dump(donnees, my_file, indent=2, ensure_ascii=False)
@@ -0,0 +1,175 @@
+"""
+
+Mini-projet d'algo des graphes : renforcement d'un réseau
+Auteur : Gérald LIN
+
+Cache sur disque des résultats de la ligne de commande : la liste des
+stations, les ponts, les points d'articulation et les améliorations calculés
+pour un ensemble de fichiers de données sont enregistrés, et une exécution
+identique les réaffiche sans charger les fichiers ni construire le graphe.
+
+"""
+
+import contextlib
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+
+
+DOSSIER_RESULTATS = 'cache_resultats'
+
+# limites du cache : taille totale des entrées et durée depuis leur dernière
+# utilisation, au-delà desquelles les plus anciennes sont supprimées
+TAILLE_MAX_RESULTATS = 64 * 1024 * 1024
+AGE_MAX_RESULTATS = 30 * 24 * 3600
+
+# fichiers du programme dont dépendent les résultats, c'est-à-dire tous les
+# modules importés par ameliorations.py (à compléter avec tout nouveau
+# module) : une nouvelle version du programme n'utilise pas les résultats
+# des précédentes
+SOURCES_PROGRAMME = ('graphe.py', 'plus_courts_chemins.py', 'distances.py', 'profilage.py', 'instantanes.py',
+                     'flux.py', 'resultats.py', 'ameliorations.py')
+
+
+# renvoie l'empreinte SHA-256 du contenu d'un fichier
+def empreinte_fichier(fichier):
+    empreinte = hashlib.sha256()
+    with open(fichier, 'rb') as my_file:
+        for bloc in iter(lambda: my_file.read(1 << 20), b''):
+            empreinte.update(bloc)
+    return empreinte.hexdigest()
+
+
+# Renvoie la clé des résultats pour les fichiers de données donnés (dans
+# l'ordre de leur chargement) et les paramètres qui modifient les résultats.
+# Un fichier est désigné par son nom (qui donne le nom de sa ligne) et par
+# l'empreinte de son contenu : la clé change dès qu'un fichier est modifié,
+# quel que soit l'endroit où il se trouve.
+def cle_resultats(fichiers, parametres=()):
+    dossier = os.path.dirname(os.path.abspath(__file__))
+    programme = [empreinte_fichier(os.path.join(dossier, source)) for source in SOURCES_PROGRAMME]
+    donnees = [(os.path.basename(fichier), empreinte_fichier(fichier)) for fichier in fichiers]
+    texte = json.dumps([programme, donnees, list(parametres)], ensure_ascii=False)
+    return hashlib.sha256(texte.encode('utf-8')).hexdigest()
+
+
+class CacheResultats(object):
+    """Résultats enregistrés dans un dossier, un fichier JSON par clé.
+
+    Une entrée contient les sorties affichées par le programme pour chaque
+    option (le chargement et la taille du réseau sous le nom 'entete'). Les
+    sorties d'exécutions successives avec la même clé mais d'autres options
+    sont ajoutées à la même entrée.
+
+    La date de modification d'une entrée est celle de sa dernière utilisation.
+    Après chaque écriture, les entrées inutilisées depuis plus de age_max
+    secondes sont supprimées, puis les plus anciennes tant que la taille
+    totale dépasse taille_max octets.
+
+    Comme un Profileur, un cache inactif ne capture ni n'enregistre rien.
+    """
+
+    def __init__(self, dossier=DOSSIER_RESULTATS, taille_max=TAILLE_MAX_RESULTATS, age_max=AGE_MAX_RESULTATS,
+                 actif=True):
+        self.actif = actif
+        self.dossier = dossier
+        self.taille_max = taille_max
+        self.age_max = age_max
+        self.sorties = dict()
+
+    def chemin(self, cle):
+        return os.path.join(self.dossier, cle + '.json')
+
+    def lire(self, cle):
+        """Renvoie l'entrée de la clé donnée, ou None si elle est absente,
+        illisible ou trop ancienne."""
+        chemin = self.chemin(cle)
+        try:
+            if time.time() - os.path.getmtime(chemin) > self.age_max:
+                return None
+            with open(chemin, 'r', encoding='utf-8') as my_file:
+                entree = json.load(my_file)
+            os.utime(chemin)
+        except (OSError, ValueError):
+            return None
+        return entree
+
+    def ecrire(self, cle, sorties):
+        """Ajoute les sorties données (dictionnaire option -> texte) à
+        l'entrée de la clé, puis applique les limites du cache. Le cache
+        n'étant qu'une accélération, une écriture impossible (dossier non
+        créable, disque plein, ...) est signalée sur la sortie d'erreur sans
+        interrompre le programme."""
+        entree = self.lire(cle) or {'sorties': dict()}
+        entree['sorties'].update(sorties)
+        # écriture dans un fichier temporaire puis renommage : une exécution
+        # simultanée ne lit jamais une entrée à moitié écrite
+        temporaire = '{}.{}.tmp'.format(self.chemin(cle), os.getpid())
+        try:
+            os.makedirs(self.dossier, exist_ok=True)
+            with open(temporaire, 'w', encoding='utf-8') as my_file:
+                json.dump(entree, my_file, ensure_ascii=False)
+            os.replace(temporaire, self.chemin(cle))
+            self.evincer()
+        except OSError as erreur:
+            with contextlib.suppress(OSError):
+                os.remove(temporaire)
+            print('Résultats non enregistrés dans le cache :', erreur, file=sys.stderr)
+
+    def evincer(self):
+        """Supprime les entrées trop anciennes, puis les moins récemment
+        utilisées jusqu'à respecter la taille maximale. Renvoie le nombre
+        d'entrées supprimées."""
+        entrees = list()
+        with os.scandir(self.dossier) as fichiers:
+            for fichier in fichiers:
+                if fichier.name.endswith('.json'):
+                    etat = fichier.stat()
+                    entrees.append((etat.st_mtime, etat.st_size, fichier.path))
+        entrees.sort()
+
+        maintenant = time.time()
+        taille = sum(entree[1] for entree in entrees)
+        supprimees = 0
+        for date, octets, chemin in entrees:
+            if maintenant - date <= self.age_max and taille <= self.taille_max:
+                break
+            with contextlib.suppress(OSError):
+                os.remove(chemin)
+                supprimees += 1
+            taille -= octets
+        return supprimees
+
+    def rejouer(self, cle, options):
+        """Affiche les sorties enregistrées de l'en-tête puis des options
+        données, si elles le sont toutes. Renvoie True si c'est le cas."""
+        entree = self.lire(cle) if self.actif else None
+        if entree is None or any(nom not in entree['sorties'] for nom in ['entete'] + list(options)):
+            return False
+        for nom in ['entete'] + list(options):
+            sys.stdout.write(entree['sorties'][nom])
+        return True
+
+    @contextlib.contextmanager
+    def capturer(self, nom):
+        """Affiche normalement la sortie du bloc d'instructions qui suit, et
+        la mémorise sous le nom donné (à la suite de la précédente de même
+        nom) pour enregistrer()."""
+        if not self.actif:
+            yield
+            return
+        tampon = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(tampon):
+                yield
+        finally:
+            sys.stdout.write(tampon.getvalue())
+            self.sorties[nom] = self.sorties.get(nom, '') + tampon.getvalue()
+
+    def enregistrer(self, cle):
+        """Écrit dans le cache les sorties capturées."""
+        if self.actif:
+            self.ecrire(cle, self.sorties)
@@ -0,0 +1,355 @@
+"""
+
+Mini-projet d'algo des graphes : renforcement d'un réseau
+Auteur : Gérald LIN
+
+Mode serveur : les fichiers des lignes lus, les réseaux construits pour chaque
+combinaison de lignes et leurs analyses restent en mémoire entre les requêtes.
+Les requêtes et les réponses sont des objets JSON, un par ligne, échangés sur
+une socket Unix (ou TCP sur localhost avec --port).
+
+Démarrage : python serveur.py [--socket CHEMIN | --port PORT] [--processus N] [--cache]
+Requête :   python serveur.py --interroger --metro 1 4 14 --analyses ponts ameliorer_ponts
+Exemple de requête JSON :
+    {"id": 1, "metro": ["1", "4", "14"], "rer": ["A"], "analyses": ["ponts", "articulations"]}
+Une liste de lignes vide désigne toutes les lignes, comme pour ameliorations.py.
+
+"""
+
+from ameliorations import *
+import argparse
+import asyncio
+import collections
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+SOCKET_SERVEUR = 'reseau.sock'
+
+# longueur maximale d'une ligne de requête ou de réponse
+LIMITE_LIGNE = 1 << 24
+
+# nombre de réseaux (combinaisons de lignes) gardés en mémoire
+NB_RESEAUX_MEMORISES = 32
+
+
+# Analyses proposées par le serveur : chacune renvoie un résultat sérialisable
+# en JSON, trié pour que la réponse ne dépende pas de l'ordre des ensembles.
+
+def analyse_stations(reseau):
+    return sorted([u, reseau.nom_sommet(u)] for u in reseau.sommets())
+
+def analyse_ponts(reseau):
+    return sorted(sorted(pont) for pont in ponts(reseau))
+
+def analyse_articulations(reseau):
+    return sorted(points_articulation(reseau))
+
+def analyse_ameliorer_ponts(reseau):
+    return sorted(sorted(arete) for arete in amelioration_ponts(reseau))
+
+def analyse_ameliorer_articulations(reseau):
+    return sorted(sorted(arete) for arete in amelioration_points_articulation(reseau))
+
+
+ANALYSES = {
+    'stations': analyse_stations,
+    'ponts': analyse_ponts,
+    'articulations': analyse_articulations,
+    'ameliorer_ponts': analyse_ameliorer_ponts,
+    'ameliorer_articulations': analyse_ameliorer_articulations,
+}
+
+# analyses confiées aux processus de calcul, pour ne pas bloquer les autres
+# requêtes pendant leur calcul
+ANALYSES_LOURDES = ('ameliorer_ponts', 'ameliorer_articulations')
+
+ANALYSES_PAR_DEFAUT = ('ponts', 'articulations')
+
+
+class DonneesServeur(object):
+    """Fichiers de données lus et réseaux construits par le serveur.
+
+    Chaque fichier n'est lu qu'une fois (lire_fichier()). Le réseau d'une
+    combinaison de fichiers est construit à partir des données lues, puis
+    gardé avec ses analyses mémorisées ; seuls les nb_reseaux derniers
+    réseaux demandés sont conservés. Les fichiers sont insérés dans l'ordre
+    de leurs noms : une même combinaison donne toujours le même réseau, et
+    donc les mêmes résultats, quel que soit l'ordre des lignes demandées.
+    """
+
+    def __init__(self, cache=False, nb_reseaux=NB_RESEAUX_MEMORISES):
+        self.cache = cache
+        self.nb_reseaux = nb_reseaux
+        self.fichiers = dict()
+        self.reseaux = collections.OrderedDict()
+
+    def donnees(self, fichier):
+        """Renvoie les données du fichier, lues à la première demande."""
+        if fichier not in self.fichiers:
+            self.fichiers[fichier] = lire_fichier(fichier, self.cache)
+        return self.fichiers[fichier]
+
+    def reseau(self, fichiers):
+        """Renvoie le réseau formé par les fichiers donnés."""
+        cle = tuple(sorted(set(fichiers)))
+        if cle in self.reseaux:
+            self.reseaux.move_to_end(cle)
+            return self.reseaux[cle]
+
+        reseau = Graphe()
+        for fichier in cle:
+            inserer_donnees(reseau, self.donnees(fichier))
+        self.reseaux[cle] = reseau
+        if len(self.reseaux) > self.nb_reseaux:
+            self.reseaux.popitem(last=False)
+        return reseau
+
+
+# Renvoie les fichiers des lignes désignées par une requête.
+def fichiers_requete(requete):
+    fichiers = list()
+    for cle, prefixe in (('metro', 'METRO_'), ('rer', 'RER_')):
+        if cle in requete:
+            lignes = requete[cle]
+            if not isinstance(lignes, list):
+                raise ValueError('"' + cle + '" doit être une liste de lignes.')
+            lignes = [str(line) for line in lignes]
+            fichiers.extend(fichiers_lignes(prefixe, [line.upper() for line in lignes] if cle == 'rer' else lignes))
+    if len(fichiers) == 0:
+        raise ValueError('La requête ne désigne aucune ligne ("metro" ou "rer").')
+    return fichiers
+
+
+# Processus de calcul : chacun garde ses propres données, lues à la première
+# requête, comme le serveur (voir initialiser_pannes() pour le même principe).
+DONNEES_TRAVAILLEUR = [None]
+
+
+def initialiser_travailleur(cache):
+    DONNEES_TRAVAILLEUR[0] = DonneesServeur(cache)
+
+
+def calculer_analyse(fichiers, nom):
+    return ANALYSES[nom](DONNEES_TRAVAILLEUR[0].reseau(fichiers))
+
+
+class ServeurAnalyses(object):
+    """Serveur asyncio répondant aux requêtes d'analyse.
+
+    Les connexions sont servies simultanément ; sur une même connexion, les
+    réponses arrivent dans l'ordre des requêtes. Les analyses rapides sont
+    calculées dans la boucle d'événements et mémorisées par le réseau
+    (ponts(), points_articulation(), ...). Les analyses lourdes sont
+    calculées par un groupe de processus : le résultat en attente est
+    mémorisé aussitôt, si bien que des requêtes identiques simultanées
+    partagent un même calcul.
+
+    Avec processus=0, toutes les analyses sont calculées dans la boucle.
+    """
+
+    def __init__(self, processus=1, cache=False):
+        self.donnees = DonneesServeur(cache)
+        self.executeur = None
+        if processus > 0:
+            self.executeur = ProcessPoolExecutor(max_workers=processus, initializer=initialiser_travailleur,
+                                                 initargs=(cache,))
+        self.serveur = None
+        self.arret = None
+        self.connexions = dict()
+        self.statistiques = {'requetes': 0, 'erreurs': 0}
+
+    async def demarrer(self, socket=SOCKET_SERVEUR, port=None):
+        """Ouvre la socket Unix donnée, ou le port TCP sur localhost."""
+        self.arret = asyncio.Event()
+        if port is not None:
+            self.serveur = await asyncio.start_server(self.servir, '127.0.0.1', port, limit=LIMITE_LIGNE)
+        else:
+            if os.path.exists(socket):
+                os.remove(socket)
+            self.serveur = await asyncio.start_unix_server(self.servir, socket, limit=LIMITE_LIGNE)
+
+    async def attendre(self):
+        """Sert les requêtes jusqu'à la commande d'arrêt, puis ferme tout."""
+        await self.arret.wait()
+        self.serveur.close()
+        # la fermeture des connexions termine les tâches qui les servent
+        for ecrivain in list(self.connexions.values()):
+            ecrivain.close()
+        await asyncio.gather(*self.connexions, return_exceptions=True)
+        await self.serveur.wait_closed()
+        if self.executeur is not None:
+            self.executeur.shutdown()
+
+    def arreter(self):
+        self.arret.set()
+
+    async def servir(self, lecteur, ecrivain):
+        tache = asyncio.current_task()
+        self.connexions[tache] = ecrivain
+        try:
+            async for ligne in lecteur:
+                if not ligne.strip():
+                    continue
+                reponse = await self.repondre(ligne)
+                ecrivain.write(json.dumps(reponse, ensure_ascii=False).encode('utf-8') + b'\n')
+                await ecrivain.drain()
+        except (ConnectionError, ValueError):
+            # client parti, ou ligne trop longue
+            pass
+        finally:
+            self.connexions.pop(tache, None)
+            ecrivain.close()
+
+    async def repondre(self, ligne):
+        """Renvoie la réponse (dictionnaire) à une ligne de requête."""
+        self.statistiques['requetes'] += 1
+        requete = dict()
+        try:
+            requete = json.loads(ligne)
+            if not isinstance(requete, dict):
+                raise ValueError('La requête doit être un objet JSON.')
+            reponse = await self.traiter(requete)
+        except Exception as erreur:
+            # toute erreur (requête invalide, fichier absent, analyse ou
+            # processus en échec) est renvoyée au client, dont la session continue
+            self.statistiques['erreurs'] += 1
+            reponse = {'erreur': str(erreur) or type(erreur).__name__}
+        if 'id' in requete:
+            reponse['id'] = requete['id']
+        return reponse
+
+    async def traiter(self, requete):
+        commande = requete.get('commande', 'analyser')
+        if commande == 'statistiques':
+            return dict(self.statistiques, fichiers=len(self.donnees.fichiers),
+                        reseaux=len(self.donnees.reseaux))
+        if commande == 'arreter':
+            self.arreter()
+            return {'arret': True}
+        if commande != 'analyser':
+            raise ValueError('Commande inconnue : ' + str(commande))
+
+        analyses = requete.get('analyses', ANALYSES_PAR_DEFAUT)
+        for nom in analyses:
+            if nom not in ANALYSES:
+                raise ValueError('Analyse inconnue : ' + str(nom))
+        fichiers = tuple(sorted(set(fichiers_requete(requete))))
+        reseau = self.donnees.reseau(fichiers)
+
+        reponse = {'sommets': reseau.nombre_sommets(), 'aretes': reseau.nombre_aretes()}
+        resultats = await asyncio.gather(*(self.analyse(reseau, fichiers, nom) for nom in analyses))
+        reponse.update(zip(analyses, resultats))
+        return reponse
+
+    async def analyse(self, reseau, fichiers, nom):
+        if nom not in ANALYSES_LOURDES or self.executeur is None:
+            return reseau.memoriser(('serveur', nom), lambda: ANALYSES[nom](reseau))
+
+        boucle = asyncio.get_running_loop()
+        cle = ('serveur', nom)
+
+        # un calcul en échec (analyse, ou processus arrêté) n'est pas gardé :
+        # la requête suivante le relance
+        def terminer(futur):
+            if futur.cancelled() or futur.exception() is not None:
+                reseau.oublier(cle, futur)
+
+        def lancer():
+            futur = boucle.run_in_executor(self.executeur, calculer_analyse, fichiers, nom)
+            futur.add_done_callback(terminer)
+            return futur
+
+        calcul = reseau.memoriser(cle, lancer)
+        # un client qui se déconnecte n'annule pas le calcul partagé
+        return await asyncio.shield(calcul)
+
+
+async def executer_serveur(socket=SOCKET_SERVEUR, port=None, processus=1, cache=False):
+    serveur = ServeurAnalyses(processus, cache)
+    await serveur.demarrer(socket, port)
+    print('Serveur prêt sur', 'localhost:' + str(port) if port is not None else socket, flush=True)
+    await serveur.attendre()
+
+
+class ClientAnalyses(object):
+    """Client d'un serveur d'analyses : une connexion, des requêtes
+    envoyées l'une après l'autre."""
+
+    def __init__(self, lecteur, ecrivain):
+        self.lecteur = lecteur
+        self.ecrivain = ecrivain
+        self.numero = 0
+
+    @classmethod
+    async def connecter(cls, socket=SOCKET_SERVEUR, port=None):
+        if port is not None:
+            lecteur, ecrivain = await asyncio.open_connection('127.0.0.1', port, limit=LIMITE_LIGNE)
+        else:
+            lecteur, ecrivain = await asyncio.open_unix_connection(socket, limit=LIMITE_LIGNE)
+        return cls(lecteur, ecrivain)
+
+    async def requete(self, **requete):
+        """Envoie la requête (metro=[...], rer=[...], analyses=[...] ou
+        commande=...) et renvoie la réponse du serveur."""
+        self.numero += 1
+        requete.setdefault('id', self.numero)
+        self.ecrivain.write(json.dumps(requete).encode('utf-8') + b'\n')
+        await self.ecrivain.drain()
+        ligne = await self.lecteur.readline()
+        if not ligne:
+            raise ConnectionError('Le serveur a fermé la connexion.')
+        return json.loads(ligne)
+
+    async def fermer(self):
+        self.ecrivain.close()
+        await self.ecrivain.wait_closed()
+
+
+# envoie une requête unique au serveur et renvoie sa réponse
+def interroger(socket=SOCKET_SERVEUR, port=None, **requete):
+    async def echange():
+        client = await ClientAnalyses.connecter(socket, port)
+        try:
+            return await client.requete(**requete)
+        finally:
+            await client.fermer()
+    return asyncio.run(echange())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serveur d\'analyses du réseau gardant les données en mémoire.')
+    parser.add_argument('--socket', default=SOCKET_SERVEUR,
+                        help='chemin de la socket Unix (par défaut ' + SOCKET_SERVEUR + ')')
+    parser.add_argument('--port', type=int,
+                        help='écoute sur ce port TCP de localhost au lieu de la socket Unix')
+    parser.add_argument('--processus', type=int, default=max(1, (os.cpu_count() or 2) // 2),
+                        help='nombre de processus calculant les analyses lourdes (0 : aucun)')
+    parser.add_argument('--cache', action='store_true',
+                        help='utilise (et crée si besoin) un cache binaire à côté de chaque fichier de données')
+    parser.add_argument('--interroger', action='store_true',
+                        help='envoie une requête à un serveur démarré et affiche la réponse')
+    parser.add_argument('--metro', nargs='*', metavar='LIGNE')
+    parser.add_argument('--rer', nargs='*', metavar='LIGNE')
+    parser.add_argument('--analyses', nargs='+', choices=sorted(ANALYSES), default=list(ANALYSES_PAR_DEFAUT))
+    parser.add_argument('--commande', choices=('analyser', 'statistiques', 'arreter'), default='analyser')
+    args = parser.parse_args()
+
+    if not args.interroger:
+        try:
+            asyncio.run(executer_serveur(args.socket, args.port, args.processus, args.cache))
+        except KeyboardInterrupt:
+            pass
+        return
+
+    requete = {'commande': args.commande, 'analyses': args.analyses}
+    if args.metro is not None:
+        requete['metro'] = args.metro
+    if args.rer is not None:
+        requete['rer'] = args.rer
+    print(json.dumps(interroger(args.socket, args.port, **requete), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()